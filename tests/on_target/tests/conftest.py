@@ -2,12 +2,17 @@ import os
 import re
 import pytest
 import types
-from utils.flash_tools import recover_device
-from utils.uart import Uart, UartBinary
+from utils.flash_tools import recover_device, FLASH_STATS
+from utils.firmware_scheduler import order_items, count_flashes, DURATIONS_CACHE_KEY
+from utils.uart import Uart, UartBinary, UartDict, UartView, UartBinaryView
+from utils.uart_mux import mux_port_url
 import sys
 sys.path.append(os.getcwd())
-from utils.logger import get_logger
+from utils.logger import get_logger, log_event
 from utils.nrfcloud import NRFCloud, NRFCloudFOTA
+from utils.message_observer import MessageObserver
+from utils.power_capture import PowerCapture, PPK2Source, SimulatedSource
+from utils.artifact_index import get_index
 
 logger = get_logger()
 
@@ -20,17 +25,77 @@ NRFCLOUD_API_KEY = os.getenv('NRFCLOUD_API_KEY')
 RUNNER_DEVICE_TYPE = os.getenv('RUNNER_DEVICE_TYPE')
 ARTIFACT_PATH = os.getenv('ARTIFACT_PATH')
 STAGE = os.getenv('STAGE')
+ARTIFACT_VERSION = os.getenv('ARTIFACT_VERSION')
+# Control address of a running utils/uart_mux.py owning the serial ports
+UART_MUX = os.getenv('UART_MUX')
+# log_dictionary.json of images built with dictionary based logging
+LOG_DICTIONARY = os.getenv('LOG_DICTIONARY')
+# "ppk2" or "simulated" to enable the power_capture fixture
+POWER_CAPTURE = os.getenv('POWER_CAPTURE')
+PPK2_PORT = os.getenv('PPK2_PORT')
+PPK2_VOLTAGE_MV = int(os.getenv('PPK2_VOLTAGE_MV', 3700))
+
+LOG_BAUDRATE = 115200
+TRACE_BAUDRATE = 1000000
 
 TRACEPORT_INDEX = 1
 
 if RUNNER_DEVICE_TYPE == "nrf9160dk":
     TRACEPORT_INDEX = 2
 
+# Set per board by utils/board_runner.py
+if os.getenv('TRACEPORT_INDEX'):
+    TRACEPORT_INDEX = int(os.getenv('TRACEPORT_INDEX'))
+
 if RUNNER_DEVICE_TYPE in ["thingy91", "thingy91x"]:
     HEX_FILE_NAME = "zephyr.signed.hex"
 else:
     HEX_FILE_NAME = "merged.hex"
 
+# Measured test durations for the next firmware ordering, see pytest_sessionfinish
+_durations = {}
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--no-firmware-order", action="store_true", default=False,
+        help="run tests in file order instead of grouping them by firmware image"
+    )
+
+def pytest_sessionstart(session):
+    log_event("session_start", artifact_version=ARTIFACT_VERSION, device_type=RUNNER_DEVICE_TYPE, stage=STAGE)
+
+def pytest_collection_modifyitems(session, config, items):
+    # Skip tests whose firmware is not in ARTIFACT_PATH before any board setup
+    if ARTIFACT_PATH:
+        for item in items:
+            missing = [f for f in getattr(item, "fixturenames", []) if f in ARTIFACT_FIXTURES and not find_artifact(f)]
+            if missing:
+                item.add_marker(pytest.mark.skip(reason=f"Artifacts not found: {', '.join(missing)}"))
+    flashes_in_file_order = count_flashes(items)
+    if not config.getoption("--no-firmware-order"):
+        # No cache with -p no:cacheprovider
+        cache = getattr(config, "cache", None)
+        items[:] = order_items(items, cache.get(DURATIONS_CACHE_KEY, {}) if cache else {})
+    config._image_changes = (count_flashes(items), flashes_in_file_order)
+
+def pytest_sessionfinish(session, exitstatus):
+    cache = getattr(session.config, "cache", None)
+    if _durations and cache:
+        durations = cache.get(DURATIONS_CACHE_KEY, {})
+        durations.update(_durations)
+        cache.set(DURATIONS_CACHE_KEY, durations)
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not hasattr(config, "_image_changes"):
+        return
+    scheduled, file_order = config._image_changes
+    terminalreporter.write_sep("-", "firmware scheduling")
+    terminalreporter.write_line(
+        f"flashes avoided: {file_order - scheduled + FLASH_STATS['skipped']} "
+        f"(image changes {scheduled} instead of {file_order}, reflash skipped {FLASH_STATS['skipped']}, "
+        f"flashed {FLASH_STATS['flashes']})"
+    )
+
 def pytest_itemcollected(item):
     item._nodeid = f"{RUNNER_DEVICE_TYPE}::{STAGE}::{item._nodeid}"
 
@@ -43,6 +108,10 @@ def get_uarts():
     if not UART_ID:
         raise RuntimeError("UART_ID not set")
     uarts = [x for x in sorted(serial_paths) if UART_ID in x]
+    if UART_MUX:
+        # The mux owns the baudrate, the socket:// URL carries none
+        uarts = [mux_port_url(UART_MUX, x, TRACE_BAUDRATE if i == TRACEPORT_INDEX else LOG_BAUDRATE)
+                 for i, x in enumerate(uarts)]
     return uarts
 
 def scan_log_for_assertions(log):
@@ -52,20 +121,40 @@ def scan_log_for_assertions(log):
 
 @pytest.hookimpl(tryfirst=True)
 def pytest_runtest_logstart(nodeid, location):
+    log_event("test_start", test=nodeid)
     logger.info(f"Starting test: {nodeid}")
 
 @pytest.hookimpl(trylast=True)
 def pytest_runtest_logfinish(nodeid, location):
     logger.info(f"Finished test: {nodeid}")
+    log_event("test_finish", test=nodeid)
 
-@pytest.fixture(scope="function")
-def dut_board(request):
+def pytest_runtest_logreport(report):
+    if report.when == "call":
+        _durations[report.nodeid] = report.duration
+    log_event("test_result", test=report.nodeid, when=report.when, outcome=report.outcome, duration=report.duration)
+
+@pytest.fixture(scope="session")
+def dut_uarts():
+    # Ports are opened once per session, tests get views of them from dut_board
     all_uarts = get_uarts()
     if not all_uarts:
         pytest.fail("No UARTs found")
-    log_uart_string = all_uarts[0]
-    uart = Uart(log_uart_string, timeout=UART_TIMEOUT)
-    modem_traces_uart = UartBinary(all_uarts[TRACEPORT_INDEX], timeout=UART_TIMEOUT)
+    if LOG_DICTIONARY:
+        uart = UartDict(all_uarts[0], LOG_DICTIONARY, baudrate=LOG_BAUDRATE, timeout=None)
+    else:
+        uart = Uart(all_uarts[0], baudrate=LOG_BAUDRATE, timeout=None)
+    modem_traces_uart = UartBinary(all_uarts[TRACEPORT_INDEX], baudrate=TRACE_BAUDRATE, timeout=None)
+
+    yield types.SimpleNamespace(uart=uart, modem_traces_uart=modem_traces_uart)
+
+    uart.stop()
+    modem_traces_uart.stop()
+
+@pytest.fixture(scope="function")
+def dut_board(request, dut_uarts):
+    uart = UartView(dut_uarts.uart, timeout=UART_TIMEOUT)
+    modem_traces_uart = UartBinaryView(dut_uarts.modem_traces_uart, timeout=UART_TIMEOUT)
 
     yield types.SimpleNamespace(
         uart=uart,
@@ -73,13 +162,31 @@ def dut_board(request):
     )
 
     uart_log = uart.whole_log
-    uart.stop()
+    uart.release()
 
     scan_log_for_assertions(uart_log)
 
     sample_name = request.node.name
     modem_traces_uart.stop()
     modem_traces_uart.save_to_file(os.path.join("outcomes/", f"trace_{sample_name}.bin"))
+    modem_traces_uart.release()
+
+@pytest.fixture(scope="function")
+def power_capture(request, dut_board):
+    if not POWER_CAPTURE:
+        pytest.skip("POWER_CAPTURE environment variable not set")
+    if POWER_CAPTURE == "simulated":
+        source = SimulatedSource()
+    else:
+        source = PPK2Source(port=PPK2_PORT, voltage_mv=PPK2_VOLTAGE_MV)
+    capture = PowerCapture(source)
+    capture.start()
+    capture.attach_uart(dut_board.uart)
+
+    yield capture
+
+    capture.stop()
+    capture.save(os.path.join("outcomes/", f"power_{request.node.name}"))
 
 @pytest.fixture(scope="function")
 def dut_cloud(dut_board):
@@ -91,11 +198,14 @@ def dut_cloud(dut_board):
     cloud = NRFCloud(api_key=NRFCLOUD_API_KEY)
     device_id = DEVICE_UUID
 
-    yield types.SimpleNamespace(
-        **dut_board.__dict__,
-        cloud=cloud,
-        device_id=device_id,
-    )
+    # Pushed over MQTT with NRFCLOUD_MQTT_BROKER set, polled over REST otherwise
+    with MessageObserver(cloud) as messages:
+        yield types.SimpleNamespace(
+            **dut_board.__dict__,
+            cloud=cloud,
+            device_id=device_id,
+            messages=messages,
+        )
 
 @pytest.fixture(scope="function")
 def dut_fota(dut_board):
@@ -119,82 +229,84 @@ def dut_fota(dut_board):
     )
     fota.cancel_incomplete_jobs(device_id)
 
-def find_hex_file(test_name):
-    potential_path = os.path.join(ARTIFACT_PATH, f"{RUNNER_DEVICE_TYPE}-{test_name}/{HEX_FILE_NAME}")
-    if os.path.isfile(potential_path):
-        return potential_path
+# Artifact fixture to (builds searched in order, file name)
+ARTIFACT_FIXTURES = {}
+for transport in ["coap", "rest", "mqtt"]:
+    for sample in ["device_message", "cell_location", "fota", "fota_fmfu"]:
+        ARTIFACT_FIXTURES[f"{transport}_{sample}_hex_file"] = ([f"nrf_cloud_{transport}_{sample}"], HEX_FILE_NAME)
+    ARTIFACT_FIXTURES[f"{transport}_fota_test_zip_file"] = (
+        [f"nrf_cloud_{transport}_fota_test", f"nrf_cloud_{transport}_fota_fmfu"], "dfu_application.zip"
+    )
+
+def find_artifact(fixture_name):
+    if not ARTIFACT_PATH or not os.path.isdir(ARTIFACT_PATH):
+        return None
+    builds, name = ARTIFACT_FIXTURES[fixture_name]
+    return get_index(ARTIFACT_PATH).find(RUNNER_DEVICE_TYPE, builds, name)
+
+def artifact_fixture(fixture_name):
+    kind = "ZIP" if fixture_name.endswith("_zip_file") else "HEX"
+    return find_artifact(fixture_name) or pytest.skip(f"{kind} file not found")
 
 @pytest.fixture(scope="session")
 def coap_device_message_hex_file():
-    return find_hex_file("nrf_cloud_coap_device_message") or pytest.skip("HEX file not found")
+    return artifact_fixture("coap_device_message_hex_file")
 
 @pytest.fixture(scope="session")
 def coap_cell_location_hex_file():
-    return find_hex_file("nrf_cloud_coap_cell_location") or pytest.skip("HEX file not found")
+    return artifact_fixture("coap_cell_location_hex_file")
 
 @pytest.fixture(scope="session")
 def coap_fota_hex_file():
-    return find_hex_file("nrf_cloud_coap_fota") or pytest.skip("HEX file not found")
+    return artifact_fixture("coap_fota_hex_file")
 
 @pytest.fixture(scope="session")
 def coap_fota_fmfu_hex_file():
     # just skip if HEX file not found, thingy91 doesn't have support for fmfu because of missing external flash
-    return find_hex_file("nrf_cloud_coap_fota_fmfu") or pytest.skip("HEX file not found")
+    return artifact_fixture("coap_fota_fmfu_hex_file")
 
 @pytest.fixture(scope="session")
 def coap_fota_test_zip_file():
-    for test_name in ["nrf_cloud_coap_fota_test", "nrf_cloud_coap_fota_fmfu"]:
-        potential_path = os.path.join(ARTIFACT_PATH, f"{RUNNER_DEVICE_TYPE}-{test_name}/dfu_application.zip")
-        if os.path.isfile(potential_path):
-            return potential_path
-    pytest.skip("ZIP file not found")
+    return artifact_fixture("coap_fota_test_zip_file")
 
 @pytest.fixture(scope="session")
 def rest_device_message_hex_file():
-    return find_hex_file("nrf_cloud_rest_device_message") or pytest.skip("HEX file not found")
+    return artifact_fixture("rest_device_message_hex_file")
 
 @pytest.fixture(scope="session")
 def rest_cell_location_hex_file():
-    return find_hex_file("nrf_cloud_rest_cell_location") or pytest.skip("HEX file not found")
+    return artifact_fixture("rest_cell_location_hex_file")
 
 @pytest.fixture(scope="session")
 def rest_fota_hex_file():
-    return find_hex_file("nrf_cloud_rest_fota") or pytest.skip("HEX file not found")
+    return artifact_fixture("rest_fota_hex_file")
 
 @pytest.fixture(scope="session")
 def rest_fota_fmfu_hex_file():
     # just skip if HEX file not found, thingy91 doesn't have support for fmfu because of missing external flash
-    return find_hex_file("nrf_cloud_rest_fota_fmfu") or pytest.skip("HEX file not found")
+    return artifact_fixture("rest_fota_fmfu_hex_file")
 
 @pytest.fixture(scope="session")
 def rest_fota_test_zip_file():
-    for test_name in ["nrf_cloud_rest_fota_test", "nrf_cloud_rest_fota_fmfu"]:
-        potential_path = os.path.join(ARTIFACT_PATH, f"{RUNNER_DEVICE_TYPE}-{test_name}/dfu_application.zip")
-        if os.path.isfile(potential_path):
-            return potential_path
-    pytest.skip("ZIP file not found")
+    return artifact_fixture("rest_fota_test_zip_file")
 
 @pytest.fixture(scope="session")
 def mqtt_device_message_hex_file():
-    return find_hex_file("nrf_cloud_mqtt_device_message") or pytest.skip("HEX file not found")
+    return artifact_fixture("mqtt_device_message_hex_file")
 
 @pytest.fixture(scope="session")
 def mqtt_cell_location_hex_file():
-    return find_hex_file("nrf_cloud_mqtt_cell_location") or pytest.skip("HEX file not found")
+    return artifact_fixture("mqtt_cell_location_hex_file")
 
 @pytest.fixture(scope="session")
 def mqtt_fota_hex_file():
-    return find_hex_file("nrf_cloud_mqtt_fota") or pytest.skip("HEX file not found")
+    return artifact_fixture("mqtt_fota_hex_file")
 
 @pytest.fixture(scope="session")
 def mqtt_fota_fmfu_hex_file():
     # just skip if HEX file not found, thingy91 doesn't have support for fmfu because of missing external flash
-    return find_hex_file("nrf_cloud_mqtt_fota_fmfu") or pytest.skip("HEX file not found")
+    return artifact_fixture("mqtt_fota_fmfu_hex_file")
 
 @pytest.fixture(scope="session")
 def mqtt_fota_test_zip_file():
-    for test_name in ["nrf_cloud_mqtt_fota_test", "nrf_cloud_mqtt_fota_fmfu"]:
-        potential_path = os.path.join(ARTIFACT_PATH, f"{RUNNER_DEVICE_TYPE}-{test_name}/dfu_application.zip")
-        if os.path.isfile(potential_path):
-            return potential_path
-    pytest.skip("ZIP file not found")
+    return artifact_fixture("mqtt_fota_test_zip_file")
@@ -0,0 +1,113 @@
+import os
+import re
+import json
+import time
+import pytest
+import sys
+sys.path.append(os.getcwd())
+from utils.logger import get_logger, log_event
+from utils.flash_tools import flash_device, reset_device
+from utils.energy import OPERATIONS, operation_energy, check_baselines, update_baselines
+
+logger = get_logger()
+
+CLOUD_TIMEOUT = 60 * 3
+# Operations measured per test, the first one starts at the cloud connection
+OPERATION_COUNT = int(os.getenv("ENERGY_OPERATION_COUNT", 3))
+ENERGY_BASELINES = os.getenv("ENERGY_BASELINES")
+UPDATE_ENERGY_BASELINES = os.getenv("UPDATE_ENERGY_BASELINES") == "1"
+RESULTS_FILE = "outcomes/energy_results.json"
+RUNNER_DEVICE_TYPE = os.getenv("RUNNER_DEVICE_TYPE")
+STAGE = os.getenv("STAGE")
+PPK2_VOLTAGE_MV = int(os.getenv("PPK2_VOLTAGE_MV", 3700))
+
+def save_result(key, result):
+    results = {}
+    if os.path.isfile(RESULTS_FILE):
+        with open(RESULTS_FILE) as f:
+            results = json.load(f)
+    results[key] = result
+    with open(RESULTS_FILE, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+def measure_energy(dut_cloud, power_capture, hex_file, operation, transport):
+    with power_capture.phase("flash"):
+        flash_device(os.path.abspath(hex_file))
+        dut_cloud.uart.xfactoryreset()
+    dut_cloud.uart.flush()
+    reset_device()
+
+    pattern = OPERATIONS[operation]
+    start = time.time()
+    while len(re.findall(pattern, dut_cloud.uart.log)) < OPERATION_COUNT:
+        if time.time() - start > CLOUD_TIMEOUT * OPERATION_COUNT:
+            raise RuntimeError(f"Only {len(re.findall(pattern, dut_cloud.uart.log))} of {OPERATION_COUNT} '{pattern}' seen")
+        time.sleep(1)
+
+    result = operation_energy(power_capture.arrays(), pattern, PPK2_VOLTAGE_MV)
+    if not result["count"]:
+        pytest.fail(f"No complete {operation} operations in the power capture")
+    key = f"{operation}/{transport}/{RUNNER_DEVICE_TYPE}/{STAGE}"
+    logger.info(f"{key}: {result}")
+    log_event("energy", key=key, **result)
+    save_result(key, result)
+
+    if UPDATE_ENERGY_BASELINES and ENERGY_BASELINES:
+        update_baselines({key: result}, ENERGY_BASELINES)
+    regressions = check_baselines({key: result}, ENERGY_BASELINES) if ENERGY_BASELINES else []
+    if regressions:
+        pytest.fail("Energy regression: " + "; ".join(regressions))
+
+@pytest.mark.benchmark
+@pytest.mark.device_message
+@pytest.mark.coap
+def test_coap_device_message_energy(dut_cloud, power_capture, coap_device_message_hex_file):
+    '''
+    Benchmark energy per device message over nRF Cloud CoAP.
+    '''
+    measure_energy(dut_cloud, power_capture, coap_device_message_hex_file, "device_message", "coap")
+
+@pytest.mark.benchmark
+@pytest.mark.device_message
+@pytest.mark.rest
+def test_rest_device_message_energy(dut_cloud, power_capture, rest_device_message_hex_file):
+    '''
+    Benchmark energy per device message over nRF Cloud REST.
+    '''
+    measure_energy(dut_cloud, power_capture, rest_device_message_hex_file, "device_message", "rest")
+
+@pytest.mark.benchmark
+@pytest.mark.device_message
+@pytest.mark.mqtt
+def test_mqtt_device_message_energy(dut_cloud, power_capture, mqtt_device_message_hex_file):
+    '''
+    Benchmark energy per device message over nRF Cloud MQTT.
+    '''
+    measure_energy(dut_cloud, power_capture, mqtt_device_message_hex_file, "device_message", "mqtt")
+
+@pytest.mark.benchmark
+@pytest.mark.cell_location
+@pytest.mark.coap
+def test_coap_cell_location_energy(dut_cloud, power_capture, coap_cell_location_hex_file):
+    '''
+    Benchmark energy per cell location request over nRF Cloud CoAP.
+    '''
+    measure_energy(dut_cloud, power_capture, coap_cell_location_hex_file, "cell_location", "coap")
+
+@pytest.mark.benchmark
+@pytest.mark.cell_location
+@pytest.mark.rest
+def test_rest_cell_location_energy(dut_cloud, power_capture, rest_cell_location_hex_file):
+    '''
+    Benchmark energy per cell location request over nRF Cloud REST.
+    '''
+    measure_energy(dut_cloud, power_capture, rest_cell_location_hex_file, "cell_location", "rest")
+
+@pytest.mark.benchmark
+@pytest.mark.cell_location
+@pytest.mark.mqtt
+def test_mqtt_cell_location_energy(dut_cloud, power_capture, mqtt_cell_location_hex_file):
+    '''
+    Benchmark energy per cell location request over nRF Cloud MQTT.
+    '''
+    measure_energy(dut_cloud, power_capture, mqtt_cell_location_hex_file, "cell_location", "mqtt")
@@ -33,23 +33,14 @@ def test_coap_device_message(dut_cloud, coap_device_message_hex_file):
         timeout=CLOUD_TIMEOUT
     )
 
-    # Poll for message to be reported to cloud
-    start = time.time()
-    while time.time() - start < CLOUD_TIMEOUT:
-        time.sleep(5)
-        messages = dut_cloud.cloud.get_messages(dut_cloud.device_id, appname=None, max_records=20, start=test_start_time)
-        logger.debug(f"Found messages: {messages}")
-
-        if messages:
-            message_object = messages[0][1]
-            message_content = message_object.get('sample_message', '')
-
-            if "Hello World, from the CoAP Device Message Sample!" in message_content:
-                break
-        else:
-            logger.debug("No message with recent timestamp, retrying...")
-            continue
-    else:
+    # Pushed over MQTT when a broker is configured, polled over REST otherwise
+    found = dut_cloud.messages.wait_for(
+        dut_cloud.device_id,
+        predicate=lambda m: "Hello World, from the CoAP Device Message Sample!" in m.get('sample_message', ''),
+        since=test_start_time,
+        timeout=CLOUD_TIMEOUT
+    )
+    if not found:
         raise RuntimeError("No new message to cloud observed")
 
 @pytest.mark.device_message
@@ -74,23 +65,13 @@ def test_rest_device_message(dut_cloud, rest_device_message_hex_file):
         timeout=CLOUD_TIMEOUT
     )
 
-    # Poll for message to be reported to cloud
-    start = time.time()
-    while time.time() - start < CLOUD_TIMEOUT:
-        time.sleep(5)
-        messages = dut_cloud.cloud.get_messages(dut_cloud.device_id, appname=None, max_records=20, start=test_start_time)
-        logger.debug(f"Found messages: {messages}")
-
-        if messages:
-            message_object = messages[0][1]
-            message_content = message_object.get('sample_message', '')
-
-            if "Hello World, from the REST Device Message Sample!" in message_content:
-                break
-        else:
-            logger.debug("No message with recent timestamp, retrying...")
-            continue
-    else:
+    found = dut_cloud.messages.wait_for(
+        dut_cloud.device_id,
+        predicate=lambda m: "Hello World, from the REST Device Message Sample!" in m.get('sample_message', ''),
+        since=test_start_time,
+        timeout=CLOUD_TIMEOUT
+    )
+    if not found:
         raise RuntimeError("No new message to cloud observed")
 
 @pytest.mark.device_message
@@ -116,30 +97,13 @@ def test_mqtt_device_message(dut_cloud, mqtt_device_message_hex_file):
         timeout=CLOUD_TIMEOUT
     )
 
-    # Poll for message to be reported to cloud
-    start = time.time()
-    while time.time() - start < CLOUD_TIMEOUT:
-        time.sleep(5)
-        messages = dut_cloud.cloud.get_messages(dut_cloud.device_id, appname=None, max_records=20, start=test_start_time)
-        logger.debug(f"Found messages: {messages}")
-
-        if messages:
-            for timestamp, message_object in messages:
-                if message_object.get('appId') == 'sample_message':
-                    message_content = message_object.get('data', '')
-                    logger.debug(f"Found sample_message with data: {message_content}")
-
-                    if "Hello World, from the MQTT Device Message Sample!" in message_content:
-                        logger.debug("Found matching message!")
-                        break
-            else:
-                # No matching message found in this batch, continue polling
-                logger.debug("No matching message found in batch, retrying...")
-                continue
-            # Break out of while loop if we found the message
-            break
-        else:
-            logger.debug("No message with recent timestamp, retrying...")
-            continue
-    else:
+    found = dut_cloud.messages.wait_for(
+        dut_cloud.device_id,
+        app_id='sample_message',
+        predicate=lambda m: "Hello World, from the MQTT Device Message Sample!" in m.get('data', ''),
+        since=test_start_time,
+        timeout=CLOUD_TIMEOUT
+    )
+    if not found:
         raise RuntimeError("No new message to cloud observed")
+    logger.debug(f"Found sample_message with data: {found[1].get('data')}")
@@ -6,7 +6,10 @@ import re
 import functools
 sys.path.append(os.getcwd())
 from utils.logger import get_logger
-from utils.flash_tools import flash_device, reset_device
+from utils.flash_tools import flash_device, reset_device, invalidate_flash_cache
+from utils.fota_progress import FotaProgress
+from utils.fota_job import FotaJobTracker, UART_EVIDENCE
+from utils.shadow import APP_VERSION, MODEM_FIRMWARE
 
 logger = get_logger()
 
@@ -15,6 +18,7 @@ FMFU_TIMEOUT = 60 * 60
 
 ARTIFACT_VERSION = os.getenv('ARTIFACT_VERSION')
 APP_BUNDLEID = os.getenv("APP_BUNDLEID", None)
+APP_FOTA_VERSION = "1.0.0-fotatest"
 
 supported_mfw_versions = {
     "mfw_nrf9160_1.3.6" : {
@@ -70,12 +74,11 @@ def await_nrfcloud(func, expected, field, timeout, break_value="CANCELLED"):
             break
 
 def get_appversion(dut_fota):
-    shadow = dut_fota.fota.get_device(dut_fota.device_id)
-    return shadow["state"]["reported"]["device"]["deviceInfo"]["appVersion"]
+    # Conditional fetch, an unchanged shadow is not downloaded again
+    return dut_fota.fota.shadow(dut_fota.device_id).get(APP_VERSION)
 
 def get_modemversion(dut_fota):
-    shadow = dut_fota.fota.get_device(dut_fota.device_id)
-    return shadow["state"]["reported"]["device"]["deviceInfo"]["modemFirmware"]
+    return dut_fota.fota.shadow(dut_fota.device_id).get(MODEM_FIRMWARE)
 
 def setup_fota_sample(dut_fota, hex_file):
     flash_device(os.path.abspath(hex_file))
@@ -97,31 +100,52 @@ def parse_mfw_version_from_log(log):
     for match in re.finditer(r"Modem FW:\s+(mfw_nrf9..._\d\.\d\.\d(-FOTA-TEST)?)", log, re.MULTILINE):
         return match.group(1)
 
-def perform_any_fota(dut_fota, bundle_id, timeout=CLOUD_TIMEOUT):
-    try:
-        dut_fota.data['job_id'] = dut_fota.fota.create_fota_job(dut_fota.device_id, bundle_id)
-        dut_fota.data['bundle_id'] = bundle_id
-    except Exception as e:
-        pytest.fail(f"FOTA create_job REST API error: {e}")
-    logger.info(f"Created FOTA Job (ID: {dut_fota.data['job_id']})")
+def mfw_completed_pattern(new_version):
+    # Not followed by e.g. -FOTA-TEST, which is the old version for delta updates
+    return rf"Modem FW:\s+{re.escape(new_version)}(?![\w-])"
 
-    logger.info("Waiting for FOTA to start...")
-    await_nrfcloud(
-        functools.partial(dut_fota.fota.get_fota_status, dut_fota.data['job_id']),
-        "IN_PROGRESS",
-        "FOTA status",
-        timeout
-    )
+def perform_any_fota(dut_fota, bundle_id, kind, transport, timeout=CLOUD_TIMEOUT, completed_pattern=None):
+    """
+    Create a FOTA job and wait until nRF Cloud reports it completed
 
-    reset_device()
+    Early states are also taken from the device log, COMPLETED only from the job status.
 
-    logger.info("Waiting for FOTA to complete...")
-    await_nrfcloud(
-        functools.partial(dut_fota.fota.get_fota_status, dut_fota.data['job_id']),
-        "COMPLETED",
-        "FOTA status",
-        timeout
-    )
+    :param completed_pattern: Device log line showing the new image running, e.g. the new version
+    """
+    # Download progress from the device log, fails early when the download stalls
+    progress = FotaProgress(kind, transport)
+    progress.attach(dut_fota.uart)
+    evidence = UART_EVIDENCE + ([("REBOOTED", completed_pattern, "IN_PROGRESS")] if completed_pattern else [])
+    tracker = None
+    try:
+        try:
+            dut_fota.data['job_id'] = dut_fota.fota.create_fota_job(dut_fota.device_id, bundle_id)
+            dut_fota.data['bundle_id'] = bundle_id
+        except Exception as e:
+            pytest.fail(f"FOTA create_job REST API error: {e}")
+        logger.info(f"Created FOTA Job (ID: {dut_fota.data['job_id']})")
+        tracker = FotaJobTracker(
+            functools.partial(dut_fota.fota.get_fota_status, dut_fota.data['job_id']),
+            uart=dut_fota.uart,
+            evidence=evidence,
+            progress=progress,
+            job_id=dut_fota.data['job_id'],
+        )
+
+        logger.info("Waiting for FOTA to start...")
+        tracker.wait_for("IN_PROGRESS", timeout)
+
+        # Reset to make the device check for the job, unless it already started downloading
+        if tracker.reached["IN_PROGRESS"][1] != "uart":
+            reset_device()
+            tracker.reset_poll_interval()
+
+        logger.info("Waiting for FOTA to complete...")
+        tracker.wait_for("COMPLETED", timeout)
+    finally:
+        if tracker:
+            tracker.finish()
+        progress.finish()
 
 @pytest.mark.fota
 @pytest.mark.coap
@@ -145,7 +169,7 @@ def test_coap_mfw_delta_fota(dut_fota, coap_fota_hex_file):
     else:
         raise RuntimeError(f"Unexpected starting modem FW version: {current_version}")
 
-    perform_any_fota(dut_fota, bundle_id)
+    perform_any_fota(dut_fota, bundle_id, "mfw_delta", "coap", completed_pattern=mfw_completed_pattern(new_version))
 
     logger.info("Verifying new modem FW version...")
     await_nrfcloud(
@@ -175,7 +199,7 @@ def test_rest_mfw_delta_fota(dut_fota, rest_fota_hex_file):
     else:
         raise RuntimeError(f"Unexpected starting modem FW version: {current_version}")
 
-    perform_any_fota(dut_fota, bundle_id)
+    perform_any_fota(dut_fota, bundle_id, "mfw_delta", "rest", completed_pattern=mfw_completed_pattern(new_version))
 
     logger.info("Verifying new modem FW version...")
     await_nrfcloud(
@@ -207,7 +231,7 @@ def test_mqtt_mfw_delta_fota(dut_fota, mqtt_fota_hex_file):
     else:
         raise RuntimeError(f"Unexpected starting modem FW version: {current_version}")
 
-    perform_any_fota(dut_fota, bundle_id)
+    perform_any_fota(dut_fota, bundle_id, "mfw_delta", "mqtt", completed_pattern=mfw_completed_pattern(new_version))
 
     logger.info("Verifying new modem FW version...")
     await_nrfcloud(
@@ -240,7 +264,7 @@ def test_coap_mfw_full_fota(dut_fota, coap_fota_fmfu_hex_file):
     else:
         raise RuntimeError(f"Unexpected starting modem FW version: {current_version}")
 
-    perform_any_fota(dut_fota, bundle_id, timeout=FMFU_TIMEOUT)
+    perform_any_fota(dut_fota, bundle_id, "mfw_full", "coap", timeout=FMFU_TIMEOUT, completed_pattern=mfw_completed_pattern(new_version))
 
     logger.info("Verifying new modem FW version...")
     await_nrfcloud(
@@ -271,7 +295,7 @@ def test_rest_mfw_full_fota(dut_fota, rest_fota_fmfu_hex_file):
     else:
         raise RuntimeError(f"Unexpected starting modem FW version: {current_version}")
 
-    perform_any_fota(dut_fota, bundle_id, timeout=FMFU_TIMEOUT)
+    perform_any_fota(dut_fota, bundle_id, "mfw_full", "rest", timeout=FMFU_TIMEOUT, completed_pattern=mfw_completed_pattern(new_version))
 
     logger.info("Verifying new modem FW version...")
     await_nrfcloud(
@@ -304,7 +328,7 @@ def test_mqtt_mfw_full_fota(dut_fota, mqtt_fota_fmfu_hex_file):
     else:
         raise RuntimeError(f"Unexpected starting modem FW version: {current_version}")
 
-    perform_any_fota(dut_fota, bundle_id, timeout=FMFU_TIMEOUT)
+    perform_any_fota(dut_fota, bundle_id, "mfw_full", "mqtt", timeout=FMFU_TIMEOUT, completed_pattern=mfw_completed_pattern(new_version))
 
     logger.info("Verifying new modem FW version...")
     await_nrfcloud(
@@ -323,7 +347,7 @@ def test_coap_app_fota(dut_fota, coap_fota_hex_file, coap_fota_test_zip_file):
 
     bundle_id = dut_fota.fota.upload_zephyr_zip(
         zip_path=coap_fota_test_zip_file,
-        version="1.0.0-fotatest",
+        version=APP_FOTA_VERSION,
         name=ARTIFACT_VERSION
     )
 
@@ -331,15 +355,20 @@ def test_coap_app_fota(dut_fota, coap_fota_hex_file, coap_fota_test_zip_file):
 
     dut_fota.uart.wait_for_str("nrf_cloud_coap_transport: Authorized")
 
+    # The device no longer runs the image flashed by setup_fota_sample()
+    invalidate_flash_cache()
     try:
-        perform_any_fota(dut_fota, bundle_id)
+        perform_any_fota(dut_fota, bundle_id, "app", "coap", completed_pattern=APP_FOTA_VERSION)
     except Exception as e:
         raise e
     finally:
         dut_fota.fota.delete_bundle(bundle_id)
 
-    if "1.0.0-fotatest" not in dut_fota.uart.whole_log:
-        raise RuntimeError("Couldn't verify that correct APP is running after FOTA")
+    dut_fota.uart.wait_for_str(
+        APP_FOTA_VERSION,
+        error_msg="Couldn't verify that correct APP is running after FOTA",
+        timeout=CLOUD_TIMEOUT
+    )
 
 @pytest.mark.fota
 @pytest.mark.rest
@@ -350,21 +379,26 @@ def test_rest_app_fota(dut_fota, rest_fota_hex_file, rest_fota_test_zip_file):
 
     bundle_id = dut_fota.fota.upload_zephyr_zip(
         zip_path=rest_fota_test_zip_file,
-        version="1.0.0-fotatest",
+        version=APP_FOTA_VERSION,
         name=ARTIFACT_VERSION
     )
 
     setup_fota_sample(dut_fota, rest_fota_hex_file)
 
+    # The device no longer runs the image flashed by setup_fota_sample()
+    invalidate_flash_cache()
     try:
-        perform_any_fota(dut_fota, bundle_id)
+        perform_any_fota(dut_fota, bundle_id, "app", "rest", completed_pattern=APP_FOTA_VERSION)
     except Exception as e:
         raise e
     finally:
         dut_fota.fota.delete_bundle(bundle_id)
 
-    if "1.0.0-fotatest" not in dut_fota.uart.whole_log:
-        raise RuntimeError("Couldn't verify that correct APP is running after FOTA")
+    dut_fota.uart.wait_for_str(
+        APP_FOTA_VERSION,
+        error_msg="Couldn't verify that correct APP is running after FOTA",
+        timeout=CLOUD_TIMEOUT
+    )
 
 @pytest.mark.fota
 @pytest.mark.mqtt
@@ -375,7 +409,7 @@ def test_mqtt_app_fota(dut_fota, mqtt_fota_hex_file, mqtt_fota_test_zip_file):
 
     bundle_id = dut_fota.fota.upload_zephyr_zip(
         zip_path=mqtt_fota_test_zip_file,
-        version="1.0.0-fotatest",
+        version=APP_FOTA_VERSION,
         name=ARTIFACT_VERSION
     )
 
@@ -383,14 +417,19 @@ def test_mqtt_app_fota(dut_fota, mqtt_fota_hex_file, mqtt_fota_test_zip_file):
 
     dut_fota.uart.wait_for_str("nrf_cloud_mqtt_fota: Connection to nRF Cloud ready")
 
+    # The device no longer runs the image flashed by setup_fota_sample()
+    invalidate_flash_cache()
     try:
-        perform_any_fota(dut_fota, bundle_id)
+        perform_any_fota(dut_fota, bundle_id, "app", "mqtt", completed_pattern=APP_FOTA_VERSION)
     except Exception as e:
         raise e
     finally:
         dut_fota.fota.delete_bundle(bundle_id)
 
-    if "1.0.0-fotatest" not in dut_fota.uart.whole_log:
-        raise RuntimeError("Couldn't verify that correct APP is running after FOTA")
+    dut_fota.uart.wait_for_str(
+        APP_FOTA_VERSION,
+        error_msg="Couldn't verify that correct APP is running after FOTA",
+        timeout=CLOUD_TIMEOUT
+    )
 
 #TODO: bootloader FOTA
@@ -0,0 +1,199 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Index of the build artifacts in ARTIFACT_PATH.
+
+scripts/copy_artifacts.sh puts every build into <device>-<build>/, e.g.
+thingy91x-nrf_cloud_coap_fota/ with merged.hex, zephyr.signed.hex,
+dfu_application.zip, build_info.yml, partitions.yml and the .config files.
+The tree is scanned once per session, images are hashed and the metadata is
+parsed, and lookups are dictionary accesses afterwards:
+
+    index = get_index(ARTIFACT_PATH)
+    index.find("thingy91x", "nrf_cloud_coap_fota", "zephyr.signed.hex")
+    index.config("thingy91x", "nrf_cloud_coap_fota")["CONFIG_FOTA_DL_TIMEOUT_MIN"]
+    index.partitions("thingy91x", "nrf_cloud_coap_fota")["mcuboot_primary"]["size"]
+
+The index is saved next to the artifacts (.artifact_index.json) and hashes and
+parsed metadata are reused for files whose size and modification time did not
+change.
+
+    python utils/artifact_index.py $ARTIFACT_PATH --device thingy91x
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+
+import yaml
+
+INDEX_FILE = ".artifact_index.json"
+INDEX_VERSION = 1
+IMAGE_EXTENSIONS = (".hex", ".zip", ".bin")
+# Metadata file to parser key
+METADATA_FILES = {
+    "build_info.yml": "build_info",
+    "partitions.yml": "partitions",
+    "app-dotconfig.txt": "config",
+}
+
+
+def file_sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+def parse_dotconfig(path: str) -> dict:
+    """ CONFIG_* values of a Kconfig .config, "n" for "is not set" """
+    config = {}
+    with open(path, errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("CONFIG_"):
+                key, _, value = line.partition("=")
+                config[key] = value[1:-1] if value.startswith('"') and value.endswith('"') else value
+            elif line.startswith("# CONFIG_") and line.endswith(" is not set"):
+                config[line[2:-len(" is not set")]] = "n"
+    return config
+
+def _parse_yaml(path: str) -> dict:
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
+
+PARSERS = {"build_info": _parse_yaml, "partitions": _parse_yaml, "config": parse_dotconfig}
+
+
+class ArtifactIndex:
+    def __init__(self, root: str, builds: dict = None) -> None:
+        self.root = root
+        # "<device>-<build>" to {"device", "build", "files": {name: {size, mtime, sha256}}, metadata...}
+        self.builds = builds or {}
+        self.stats = {"hashed": 0, "reused": 0}
+
+    @classmethod
+    def load(cls, root: str, path: str = None) -> "ArtifactIndex":
+        """ Index saved by save(), empty if missing or of another version """
+        path = path or os.path.join(root, INDEX_FILE)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(root)
+        if data.get("version") != INDEX_VERSION:
+            return cls(root)
+        return cls(root, data["builds"])
+
+    def save(self, path: str = None) -> bool:
+        path = path or os.path.join(self.root, INDEX_FILE)
+        try:
+            with open(path + ".tmp", "w") as f:
+                json.dump({"version": INDEX_VERSION, "builds": self.builds}, f)
+            os.replace(path + ".tmp", path)
+        except OSError:
+            # Read-only artifact tree, the index is rebuilt next session
+            return False
+        return True
+
+    def scan(self) -> "ArtifactIndex":
+        """ Bring the index up to date with the tree, reusing entries of unchanged files """
+        previous = self.builds
+        self.builds = {}
+        with os.scandir(self.root) as entries:
+            dirs = [e for e in entries if e.is_dir() and "-" in e.name]
+        for entry in dirs:
+            device, build = entry.name.split("-", 1)
+            old = previous.get(entry.name, {})
+            record = {"device": device, "build": build, "files": {}}
+            with os.scandir(entry.path) as files:
+                for f in files:
+                    if not f.is_file():
+                        continue
+                    st = f.stat()
+                    info = {"size": st.st_size, "mtime": st.st_mtime}
+                    old_info = old.get("files", {}).get(f.name)
+                    unchanged = old_info is not None and \
+                        old_info["size"] == info["size"] and old_info["mtime"] == info["mtime"]
+                    if f.name.endswith(IMAGE_EXTENSIONS):
+                        if unchanged:
+                            info["sha256"] = old_info["sha256"]
+                            self.stats["reused"] += 1
+                        else:
+                            info["sha256"] = file_sha256(f.path)
+                            self.stats["hashed"] += 1
+                    key = METADATA_FILES.get(f.name)
+                    if key:
+                        if unchanged and key in old:
+                            record[key] = old[key]
+                        else:
+                            try:
+                                record[key] = PARSERS[key](f.path)
+                            except (OSError, yaml.YAMLError) as e:
+                                record[key] = {"error": str(e)}
+                    record["files"][f.name] = info
+            self.builds[entry.name] = record
+        return self
+
+    def get(self, device: str, build: str) -> dict:
+        return self.builds.get(f"{device}-{build}")
+
+    def path(self, device: str, build: str, name: str) -> str:
+        return os.path.join(self.root, f"{device}-{build}", name)
+
+    def find(self, device: str, builds, name: str) -> str:
+        """ Path of file name in the first of builds (name or list) that has it, None if none """
+        for build in [builds] if isinstance(builds, str) else builds:
+            record = self.get(device, build)
+            if record and name in record["files"]:
+                return self.path(device, build, name)
+        return None
+
+    def sha256(self, device: str, build: str, name: str) -> str:
+        record = self.get(device, build)
+        return record["files"][name].get("sha256") if record and name in record["files"] else None
+
+    def config(self, device: str, build: str) -> dict:
+        return (self.get(device, build) or {}).get("config", {})
+
+    def partitions(self, device: str, build: str) -> dict:
+        return (self.get(device, build) or {}).get("partitions", {})
+
+    def build_info(self, device: str, build: str) -> dict:
+        return (self.get(device, build) or {}).get("build_info", {})
+
+    def builds_for(self, device: str) -> list:
+        return sorted(r["build"] for r in self.builds.values() if r["device"] == device)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_index(root: str) -> ArtifactIndex:
+    """ Index of root, scanned once per process and saved for the next one """
+    with _indexes_lock:
+        if root not in _indexes:
+            index = ArtifactIndex.load(root).scan()
+            index.save()
+            _indexes[root] = index
+        return _indexes[root]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index of build artifacts")
+    parser.add_argument("root", nargs="?", default=os.getenv("ARTIFACT_PATH"), help="artifact directory")
+    parser.add_argument("--device", help="only builds of this device type")
+    args = parser.parse_args()
+
+    index = ArtifactIndex.load(args.root).scan()
+    index.save()
+    for key, record in sorted(index.builds.items()):
+        if args.device and record["device"] != args.device:
+            continue
+        images = {name: info["sha256"][:12] for name, info in record["files"].items() if "sha256" in info}
+        print(json.dumps({"build": key, "images": images, "partitions": sorted(record.get("partitions", {}))}))
+    print(f"{len(index.builds)} builds, {index.stats['hashed']} images hashed, {index.stats['reused']} reused",
+          file=sys.stderr)
@@ -0,0 +1,215 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Run the on-target tests on every board attached to a runner.
+
+Boards are listed in an inventory JSON file:
+
+    [
+        {"name": "t91x-1", "serial": "001050000001", "device_type": "thingy91x", "uuid": "..."},
+        {"name": "dk-1", "serial": "001050000002", "device_type": "nrf9160dk", "uuid": "...",
+         "uart_id": "001050000002", "traceport_index": 2}
+    ]
+
+Tests are collected once per device type and assigned to boards of that type,
+keeping tests sharing a firmware image together (see firmware_scheduler.py) and
+balancing expected durations. Every board then runs its own pytest process with
+SEGGER, UART_ID, UUID, RUNNER_DEVICE_TYPE and TRACEPORT_INDEX set from the
+inventory, and the junit files are merged. pytest-html reports are written per
+board next to the given --html path:
+
+    python utils/board_runner.py -i boards.json --junit-xml results/test-results.xml -- -m fota tests/test_functional
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import tempfile
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+sys.path.append(os.getcwd())
+from utils.logger import get_logger
+from utils.firmware_scheduler import order_items, hex_key, image_key, expected_duration, DURATIONS_CACHE_KEY
+
+logger = get_logger()
+
+# Set for collection runs, file the collected tests are written to
+COLLECT_OUTPUT_ENV = "BOARD_RUNNER_COLLECT"
+# Foreground colors of the board name in console lines, see ColoredFormatter.PREFIX
+PREFIX_COLORS = ["30", "34", "35", "31", "32", "36"]
+
+
+def load_inventory(path: str) -> list:
+    with open(path) as f:
+        boards = json.load(f)
+    for i, board in enumerate(boards):
+        for key in ["serial", "device_type"]:
+            if not board.get(key):
+                raise ValueError(f"Board {i} in {path} has no '{key}'")
+        board.setdefault("name", f"{board['device_type']}-{board['serial']}")
+    return boards
+
+def board_env(board: dict, index: int = 0) -> dict:
+    """ Environment of the pytest process running on board, index picks the prefix color """
+    env = dict(os.environ)
+    env.update({
+        "SEGGER": board["serial"],
+        "UART_ID": board.get("uart_id") or board["serial"],
+        "RUNNER_DEVICE_TYPE": board["device_type"],
+        "LOG_FILENAME": f"{os.getenv('LOG_FILENAME', 'att_test_log')}_{board['name']}",
+        "LOG_PREFIX": board["name"],
+        "LOG_PREFIX_COLOR": PREFIX_COLORS[index % len(PREFIX_COLORS)],
+    })
+    if board.get("uuid"):
+        env["UUID"] = board["uuid"]
+    if board.get("traceport_index") is not None:
+        env["TRACEPORT_INDEX"] = str(board["traceport_index"])
+    env.pop(COLLECT_OUTPUT_ENV, None)
+    return env
+
+
+def pytest_collection_finish(session):
+    # Loaded with -p utils.board_runner, dumps collected tests for assignment
+    path = os.getenv(COLLECT_OUTPUT_ENV)
+    if not path:
+        return
+    # No cache with -p no:cacheprovider
+    cache = getattr(session.config, "cache", None)
+    durations = cache.get(DURATIONS_CACHE_KEY, {}) if cache else {}
+    rootdir = os.path.relpath(str(session.config.rootpath))
+    tests = []
+    for item in order_items(session.items, durations):
+        # Node IDs are prefixed with "<device type>::<stage>::" in conftest
+        base = item.nodeid.split("::", 2)[2] if item.nodeid.count("::") >= 3 else item.nodeid
+        tests.append({
+            "nodeid": item.nodeid,
+            "arg": os.path.join(rootdir, base),
+            "image": list(hex_key(image_key(item))),
+            "duration": expected_duration(item, durations),
+        })
+    with open(path, "w") as f:
+        json.dump(tests, f)
+
+def board_options(options: list, name: str) -> list:
+    """ Worker options, with the pytest-html report renamed per board """
+    result = []
+    args = iter(options)
+    for arg in args:
+        if arg == "--html":
+            arg = f"--html={next(args, '')}"
+        if arg.startswith("--html="):
+            base, ext = os.path.splitext(arg[len("--html="):])
+            arg = f"--html={base}_{name}{ext or '.html'}"
+        result.append(arg)
+    return result
+
+def collect(device_type: str, pytest_args: list) -> list:
+    """ Tests collected for device_type, in firmware order """
+    with tempfile.TemporaryDirectory(prefix="board_runner") as tmpdir:
+        output = os.path.join(tmpdir, "tests.json")
+        env = board_env({"serial": "", "device_type": device_type, "name": "collect"})
+        env[COLLECT_OUTPUT_ENV] = output
+        env["LOG_FILENAME"] = ""
+        result = subprocess.run(
+            [sys.executable, "-m", "pytest", "--collect-only", "-q", "-p", "utils.board_runner", *pytest_args],
+            env=env, text=True, capture_output=True
+        )
+        if not os.path.isfile(output):
+            raise RuntimeError(f"Collection for {device_type} failed:\n{result.stdout}\n{result.stderr}")
+        with open(output) as f:
+            return json.load(f)
+
+def assign(tests: list, boards: list) -> dict:
+    """
+    Assign tests to boards of one device type, longest firmware group first to
+    the least loaded board
+
+    :return: Board name to list of tests, in collection order
+    """
+    groups = defaultdict(list)
+    for test in tests:
+        groups[tuple(test["image"])].append(test)
+    load = {board["name"]: 0.0 for board in boards}
+    assigned = {board["name"]: [] for board in boards}
+    for group in sorted(groups.values(), key=lambda x: -sum(t["duration"] for t in x)):
+        name = min(load, key=lambda x: (load[x], x))
+        load[name] += sum(t["duration"] for t in group)
+        assigned[name] += group
+    order = {test["nodeid"]: i for i, test in enumerate(tests)}
+    return {name: sorted(x, key=lambda t: order[t["nodeid"]]) for name, x in assigned.items()}
+
+def merge_junit(paths: list, output: str) -> None:
+    """ Merge junit files of all boards into one <testsuites> document """
+    merged = ET.Element("testsuites")
+    totals = defaultdict(float)
+    for path in paths:
+        if not os.path.isfile(path):
+            continue
+        root = ET.parse(path).getroot()
+        for suite in ([root] if root.tag == "testsuite" else root.findall("testsuite")):
+            for key in ["tests", "failures", "errors", "skipped", "time"]:
+                totals[key] += float(suite.get(key, 0))
+            merged.append(suite)
+    for key, value in totals.items():
+        merged.set(key, f"{value:.3f}" if key == "time" else str(int(value)))
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    ET.ElementTree(merged).write(output, encoding="utf-8", xml_declaration=True)
+
+def run(boards: list, pytest_args: list, junit_xml: str = None) -> int:
+    """ Run assigned tests on all boards in parallel, returns the worst pytest exit code """
+    by_type = defaultdict(list)
+    for board in boards:
+        by_type[board["device_type"]].append(board)
+
+    # Only options are passed to the workers, test paths are replaced by assigned node IDs
+    options = [x for x in pytest_args if x.startswith("-") or not os.path.exists(x.split("::")[0])]
+    procs = []
+    junit_files = []
+    for device_type, type_boards in by_type.items():
+        tests = collect(device_type, pytest_args)
+        logger.info(f"{len(tests)} tests for {len(type_boards)} {device_type} board(s)")
+        for name, assigned in assign(tests, type_boards).items():
+            if not assigned:
+                logger.info(f"No tests for {name}")
+                continue
+            board = next(x for x in type_boards if x["name"] == name)
+            cmd = [sys.executable, "-m", "pytest", *board_options(options, name), *[t["arg"] for t in assigned]]
+            if junit_xml:
+                junit_files.append(f"{os.path.splitext(junit_xml)[0]}_{name}.xml")
+                cmd.append(f"--junit-xml={junit_files[-1]}")
+            logger.info(f"Starting {len(assigned)} tests on {name}")
+            procs.append((name, subprocess.Popen(cmd, env=board_env(board, boards.index(board)))))
+
+    start = time.time()
+    exit_code = 0
+    for name, proc in procs:
+        code = proc.wait()
+        logger.info(f"{name} finished with exit code {code} after {time.time() - start:.0f} s")
+        # 5 is "no tests collected", which is fine for a board with only deselected tests
+        if code not in [0, 5]:
+            exit_code = max(exit_code, code)
+    if junit_xml:
+        merge_junit(junit_files, junit_xml)
+    return exit_code
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run on-target tests on all boards of an inventory")
+    parser.add_argument("-i", "--inventory", default=os.getenv("BOARD_INVENTORY"), required=not os.getenv("BOARD_INVENTORY"),
+                        help="inventory JSON file, defaults to $BOARD_INVENTORY")
+    parser.add_argument("--device-type", action="append", help="only boards of this type, can be repeated")
+    parser.add_argument("--junit-xml", help="merged junit file")
+    parser.add_argument("pytest_args", nargs=argparse.REMAINDER, help="arguments passed to pytest, after --")
+    args = parser.parse_args()
+
+    boards = load_inventory(args.inventory)
+    if args.device_type:
+        boards = [x for x in boards if x["device_type"] in args.device_type]
+    pytest_args = args.pytest_args[1:] if args.pytest_args[:1] == ["--"] else args.pytest_args
+    sys.exit(run(boards, pytest_args, args.junit_xml))
@@ -0,0 +1,320 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Performance dashboard from JSON-lines outcome logs (LOG_JSONL, see logger.py).
+
+Timings of every run (test duration, flash, phases such as attach and cloud
+connect, nRF Cloud API latencies, energy per operation) are extracted into a
+per-run summary and rendered into one self-contained HTML file, with a timeline
+per run and trend charts per build (ARTIFACT_VERSION):
+
+    python utils/dashboard.py "outcomes/*.jsonl.*" -o results/dashboard.html
+
+Summaries and timeline fragments are cached per run in the cache directory and
+only rebuilt when the log files of that run change, so adding a run only
+extracts and renders that run and the trend charts. The cache lives on the
+runner next to the results database and also keeps the run history: the latest
+cached runs are included even after their logs were deleted, so CI only passes
+the logs of the current run.
+"""
+
+import os
+import re
+import sys
+import json
+import html
+import glob
+import hashlib
+import argparse
+import statistics
+from collections import defaultdict
+
+sys.path.append(os.getcwd())
+from utils.structured_log import iter_records, _file_index
+
+DEFAULT_CACHE_DIR = os.path.expanduser("~/.cache/nrfcloud_fw_ci/dashboard")
+# Earlier runs from the cache shown next to the given ones
+HISTORY_RUNS = 50
+MAX_CACHED_RUNS = 500
+# Bump when the summary format changes to invalidate cached runs
+SUMMARY_VERSION = 1
+EVENT_TYPES = ["session_start", "test_start", "test_finish", "test_result", "phase", "cloud", "flash", "energy", "fota", "fota_job"]
+KIND_COLORS = {"test": "#b0c4de", "flash": "#ff7f0e", "phase": "#2ca02c", "fota": "#9467bd", "cloud": "#1f77b4"}
+
+
+def _run_prefix(path: str) -> str:
+    return re.sub(r"\.\d+\.jsonl.*$", "", path)
+
+def find_runs(patterns: list) -> dict:
+    """ Files of every run (log prefix), oldest file first """
+    runs = defaultdict(list)
+    for pattern in patterns:
+        for path in glob.glob(pattern):
+            runs[_run_prefix(path)].append(path)
+    return {prefix: sorted(set(files), key=_file_index) for prefix, files in runs.items()}
+
+def run_id(prefix: str, files: list) -> str:
+    """ Identity of a run: log prefix, artifact version and session start time """
+    start = next(iter_records(files, "session_start"), None) or next(iter_records(files), {})
+    return f"{os.path.abspath(prefix)}@{start.get('artifact_version')}@{start.get('ts')}"
+
+def _signature(files: list) -> list:
+    return [SUMMARY_VERSION] + [[os.path.basename(f), os.path.getsize(f), int(os.path.getmtime(f))] for f in files]
+
+def _normalize_path(path: str) -> str:
+    # Device IDs, job IDs and numbers vary per call, group latencies by endpoint
+    path = path.split("?")[0]
+    return re.sub(r"/(?=[^/]*\d)[\w.-]{6,}|/\d+", "/{id}", path)
+
+def extract_run(prefix: str, files: list) -> dict:
+    """
+    Per-run summary of the outcome log files of one run
+
+    metrics are [test, metric, value], spans are [test, name, kind, start, end]
+    """
+    run = {"run": prefix, "artifact_version": None, "device_type": None, "stage": None,
+           "start": None, "tests": {}, "metrics": [], "spans": []}
+    test_start = {}
+    phase_start = {}
+    for r in iter_records(files, EVENT_TYPES):
+        kind, ts, test = r["type"], r["ts"], r.get("test")
+        if run["start"] is None:
+            run["start"] = ts
+        if kind == "session_start":
+            for key in ("artifact_version", "device_type", "stage"):
+                run[key] = run[key] or r.get(key)
+        elif kind == "test_start":
+            test_start[test] = ts
+            phase_start.clear()
+        elif kind == "test_finish" and test in test_start:
+            run["spans"].append([test, "test", "test", test_start[test], ts])
+        elif kind == "test_result" and r.get("when") == "call":
+            run["tests"][test] = {"outcome": r.get("outcome"), "duration": r.get("duration")}
+            run["metrics"].append([test, "test_duration", r.get("duration")])
+        elif kind == "flash":
+            # Reflash skipped, see SKIP_REFLASH in flash_tools.py
+            name = "reset" if r.get("skipped") else "flash"
+            run["metrics"].append([test, name, r["duration"]])
+            run["spans"].append([test, name, "flash", ts - r["duration"], ts])
+        elif kind == "phase":
+            name, t = r["name"], r.get("t", ts)
+            if r.get("kind") == "start":
+                phase_start[name] = t
+            elif name in phase_start:
+                start = phase_start.pop(name)
+                run["metrics"].append([test, name, t - start])
+                run["spans"].append([test, name, "phase", start, t])
+            elif test in test_start:
+                # Phase ended by a UART line, measured from the start of the test
+                run["metrics"].append([test, name, t - test_start[test]])
+                run["spans"].append([test, name, "phase", test_start[test], t])
+        elif kind == "cloud":
+            name = f"cloud {r.get('method')} {_normalize_path(r.get('path', ''))}"
+            run["metrics"].append([test, name, r["duration"]])
+            run["spans"].append([test, name, "cloud", ts - r["duration"], ts])
+        elif kind == "fota" and r.get("download_s"):
+            # Seconds per MB rather than throughput, so that higher is worse for every metric
+            name = f"fota {r.get('kind')}"
+            run["metrics"].append([test, f"{name} download", r["download_s"]])
+            if r.get("bytes"):
+                run["metrics"].append([test, f"{name} s/MB", r["download_s"] / (r["bytes"] / 1e6)])
+            run["spans"].append([test, f"{name} download", "fota", ts - r["download_s"], ts])
+        elif kind == "fota_job":
+            for state, latency in (r.get("latencies") or {}).items():
+                run["metrics"].append([test, f"fota_job {state}", latency])
+        elif kind == "energy":
+            run["metrics"].append([test, f"energy_uj {r.get('key')}", r.get("energy_uj")])
+    run["metrics"] = [m for m in run["metrics"] if m[2] is not None]
+    return run
+
+
+def _figure_html(fig, div_id: str) -> str:
+    return fig.to_html(full_html=False, include_plotlyjs=False, div_id=div_id)
+
+def render_timeline(run: dict) -> str:
+    """ HTML fragment with the timeline of one run, seconds since run start """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    t0 = run["start"] or 0
+    for kind, color in KIND_COLORS.items():
+        spans = [s for s in run["spans"] if s[2] == kind]
+        if not spans:
+            continue
+        fig.add_trace(go.Bar(
+            y=[s[0] or "session" for s in spans],
+            x=[s[4] - s[3] for s in spans],
+            base=[s[3] - t0 for s in spans],
+            orientation="h",
+            name=kind,
+            marker_color=color,
+            text=[s[1] for s in spans],
+            hovertemplate="%{text}<br>%{base:.1f} s + %{x:.2f} s<extra></extra>",
+            # Tests behind everything else in the same lane
+            width=0.8 if kind == "test" else 0.4,
+        ))
+    fig.update_layout(
+        barmode="overlay",
+        height=max(300, 40 * len({s[0] for s in run["spans"]}) + 120),
+        xaxis_title="seconds since start of run",
+        margin={"l": 10, "r": 10, "t": 30, "b": 40},
+    )
+    fig.update_yaxes(autorange="reversed")
+    div_id = "timeline-" + hashlib.sha1(run["run"].encode()).hexdigest()[:12]
+    return _figure_html(fig, div_id)
+
+def _build_label(run: dict) -> str:
+    return run["artifact_version"] or os.path.basename(run["run"].split("@")[0])
+
+def render_trends(runs: list) -> str:
+    """ HTML fragment with the median of every metric per build, one chart per metric """
+    import plotly.graph_objects as go
+
+    builds = []
+    values = defaultdict(lambda: defaultdict(list))
+    for run in sorted(runs, key=lambda r: r["start"] or 0):
+        build = _build_label(run)
+        if build not in builds:
+            builds.append(build)
+        for test, metric, value in run["metrics"]:
+            values[metric][(test, build)].append(value)
+
+    parts = []
+    for i, metric in enumerate(sorted(values)):
+        fig = go.Figure()
+        tests = sorted({test for test, _ in values[metric]}, key=str)
+        for test in tests:
+            x = [b for b in builds if (test, b) in values[metric]]
+            y = [statistics.median(values[metric][(test, b)]) for b in x]
+            fig.add_trace(go.Scatter(x=x, y=y, mode="lines+markers", name=str(test).split("::")[-1]))
+        fig.update_layout(title=metric, height=350, xaxis={"type": "category"},
+                          margin={"l": 10, "r": 10, "t": 40, "b": 40})
+        parts.append(_figure_html(fig, f"trend-{i}"))
+    return "\n".join(parts)
+
+def _run_table(run: dict) -> str:
+    rows = "".join(
+        f"<tr><td>{html.escape(str(test))}</td><td class='{html.escape(str(r['outcome']))}'>"
+        f"{html.escape(str(r['outcome']))}</td><td>{r['duration'] or 0:.1f}</td></tr>"
+        for test, r in run["tests"].items()
+    )
+    return f"<table><tr><th>test</th><th>outcome</th><th>duration (s)</th></tr>{rows}</table>"
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 1em 2em; }}
+table {{ border-collapse: collapse; margin-bottom: 1em; }}
+td, th {{ border: 1px solid #ccc; padding: 2px 8px; text-align: left; }}
+.passed {{ color: green; }} .failed {{ color: red; }} .skipped {{ color: gray; }}
+</style>
+<script type="text/javascript">{plotlyjs}</script>
+</head><body>
+<h1>{title}</h1>
+<h2>Trends per build</h2>
+{trends}
+<h2>Runs</h2>
+{runs}
+</body></html>
+"""
+
+class Dashboard:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR) -> None:
+        self.cache_dir = cache_dir
+        self.stats = {"extracted": 0, "cached": 0, "history": 0}
+
+    def _cache_path(self, run: str, ext: str) -> str:
+        key = hashlib.sha1(run.encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+
+    def run(self, prefix: str, files: list) -> tuple:
+        """ Summary and timeline fragment of a run, from the cache if its files are unchanged """
+        signature = _signature(files)
+        run = run_id(prefix, files)
+        summary_path = self._cache_path(run, "json")
+        fragment_path = self._cache_path(run, "html")
+        if os.path.isfile(summary_path) and os.path.isfile(fragment_path):
+            with open(summary_path) as f:
+                summary = json.load(f)
+            if summary.get("signature") == signature:
+                self.stats["cached"] += 1
+                with open(fragment_path) as f:
+                    return summary, f.read()
+        summary = extract_run(run, files)
+        summary["signature"] = signature
+        fragment = render_timeline(summary)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(fragment_path, "w") as f:
+            f.write(fragment)
+        with open(summary_path, "w") as f:
+            json.dump(summary, f)
+        self.stats["extracted"] += 1
+        return summary, fragment
+
+    def history(self, exclude: set, count: int = HISTORY_RUNS) -> list:
+        """ Latest cached runs not in exclude, oldest cached runs beyond MAX_CACHED_RUNS are removed """
+        cached = []
+        for path in glob.glob(os.path.join(self.cache_dir, "*.json")):
+            fragment_path = path[:-len(".json")] + ".html"
+            try:
+                with open(path) as f:
+                    summary = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if os.path.isfile(fragment_path) and summary.get("signature", [None])[0] == SUMMARY_VERSION:
+                cached.append((summary.get("start") or 0, path, fragment_path, summary))
+        cached.sort(key=lambda x: x[0], reverse=True)
+        for _, path, fragment_path, _ in cached[MAX_CACHED_RUNS:]:
+            os.remove(path)
+            os.remove(fragment_path)
+        runs = []
+        for _, _, fragment_path, summary in cached:
+            if len(runs) >= count:
+                break
+            if summary["run"] in exclude:
+                continue
+            with open(fragment_path) as f:
+                runs.append((summary, f.read()))
+        self.stats["history"] += len(runs)
+        return runs
+
+    def build(self, patterns: list, output: str, title: str = "nRF Cloud FW test performance",
+              history: int = HISTORY_RUNS) -> str:
+        """ :param history: Number of earlier runs from the cache to include """
+        from plotly.offline import get_plotlyjs
+
+        runs = []
+        for prefix, files in find_runs(patterns).items():
+            runs.append(self.run(prefix, files))
+        if history:
+            runs += self.history({s["run"] for s, _ in runs}, history)
+        runs.sort(key=lambda x: x[0]["start"] or 0, reverse=True)
+        sections = "\n".join(
+            f"<h3>{html.escape(_build_label(s))} ({html.escape(str(s['device_type']))}, "
+            f"{html.escape(str(s['stage']))})</h3>\n{_run_table(s)}\n{fragment}"
+            for s, fragment in runs
+        )
+        page = PAGE.format(title=html.escape(title), plotlyjs=get_plotlyjs(),
+                           trends=render_trends([s for s, _ in runs]), runs=sections)
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "w") as f:
+            f.write(page)
+        return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTML performance dashboard from JSON-lines outcome logs")
+    parser.add_argument("paths", nargs="+", help="outcome log files or glob patterns, one run per log prefix")
+    parser.add_argument("-o", "--output", default="results/dashboard.html")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="run cache and history")
+    parser.add_argument("--history", type=int, default=HISTORY_RUNS, help="earlier runs from the cache to include, 0 for none")
+    parser.add_argument("--title", default="nRF Cloud FW test performance")
+    args = parser.parse_args()
+
+    dashboard = Dashboard(args.cache_dir)
+    dashboard.build(args.paths, args.output, args.title, args.history)
+    print(f"{args.output}: {dashboard.stats['extracted']} runs extracted, {dashboard.stats['cached']} cached, "
+          f"{dashboard.stats['history']} earlier runs")
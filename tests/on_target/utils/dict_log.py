@@ -0,0 +1,292 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Streaming decoder for Zephyr dictionary based logs (log parser v3 format).
+
+Builds with dictionary logging (see config_fragments/mss/binary_logs.conf) emit
+binary frames instead of text. Format strings and source names stay on the host
+in log_dictionary.json, which copy_artifacts.sh stores next to the hex file:
+
+    decoder = DictLogDecoder("artifacts/thingy91x-sample/log_dictionary.json")
+    for line in decoder.feed(data):
+        print(line)        # "[00:00:01.234,000] <inf> nrf_cloud_info: Modem FW: ..."
+
+Every format string is compiled once into a struct format for its arguments and
+a Python %-format, so decoding a message is a single struct.unpack_from() call.
+
+    python utils/dict_log.py log_dictionary.json capture.bin
+"""
+
+import re
+import sys
+import json
+import base64
+import struct
+import binascii
+import argparse
+from typing import Iterator, Optional
+
+MSG_TYPE_NORMAL = 0
+MSG_TYPE_DROPPED = 1
+
+# Printed by the hex variant of the UART backend before the frames
+HEX_MARKER = b"##ZLOGV1##"
+
+LEVELS = {1: "err", 2: "wrn", 3: "inf", 4: "dbg"}
+
+# Larger headers are treated as garbage instead of waiting for more data
+MAX_MSG_SIZE = 4096
+
+# printf conversion: flags, width, precision, length, conversion
+FMT_SPEC_RE = re.compile(rb"%([-+ #0]*)(\*|\d+)?(?:\.(\*|\d+))?(hh|h|ll|l|j|z|t|L)?([diouxXcspfFeEgGaA%])")
+
+
+class DictLogError(Exception):
+    pass
+
+
+class Dictionary:
+    """ Format strings and log sources from log_dictionary.json """
+
+    def __init__(self, path: str) -> None:
+        with open(path) as f:
+            db = json.load(f)
+        target = db.get("target", {})
+        self.bits = target.get("bits", 32)
+        self.endian = "<" if target.get("little_endianness", True) else ">"
+        kconfigs = db.get("kconfigs", {})
+        self.timestamp_64 = bool(kconfigs.get("CONFIG_LOG_TIMESTAMP_64BIT"))
+        self.timestamp_freq = kconfigs.get("CONFIG_SYS_CLOCK_HW_CYCLES_PER_SEC")
+        self.sections = []
+        sections = db.get("sections", {})
+        for section in (sections.values() if isinstance(sections, dict) else sections):
+            if "data_b64" in section:
+                self.sections.append((section["start"], section["end"], base64.b64decode(section["data_b64"])))
+        self.sources = {}
+        for address, source in db.get("log_subsys", {}).get("log_instances", {}).items():
+            self.sources[source.get("source_id", address)] = source["name"]
+
+    def find_string(self, address: int) -> Optional[bytes]:
+        """ NUL terminated string at address in one of the stored sections """
+        for start, end, data in self.sections:
+            if start <= address < end:
+                offset = address - start
+                return data[offset:data.index(b"\0", offset)]
+        return None
+
+    def source_name(self, source_id: int) -> str:
+        return self.sources.get(source_id, f"source_{source_id}")
+
+
+class _FormatEntry:
+    # Precompiled format string: one struct format for all arguments
+    __slots__ = ["fmt", "pyfmt", "args", "offsets", "strings", "arg_struct"]
+
+    def __init__(self, fmt: bytes, ptr: str, endian: str, args_start: int) -> None:
+        """
+        :param args_start: Offset of the first argument in the package
+        """
+        self.fmt = fmt
+        self.args = []
+        # Offset of every argument in the package
+        self.offsets = []
+        pyfmt = b""
+        struct_fmt = endian + "x" * args_start
+        offset = args_start
+        last = 0
+        for m in FMT_SPEC_RE.finditer(fmt):
+            flags, width, precision, length, conv = m.groups()
+            pyfmt += fmt[last:m.start()].replace(b"%", b"%%")
+            last = m.end()
+            if conv == b"%":
+                pyfmt += b"%%"
+                continue
+            for star in [width, precision]:
+                if star == b"*":
+                    offset, struct_fmt = self._add(offset, struct_fmt, "i", 4)
+                    self.args.append("int")
+                    self.offsets.append(offset - 4)
+            if conv in b"fFeEgGaA":
+                code, size, kind = "d", 8, "float"
+            elif conv == b"s":
+                code, size, kind = ptr, struct.calcsize(ptr), "str"
+            elif conv == b"p":
+                code, size, kind = ptr, struct.calcsize(ptr), "ptr"
+            elif length in [b"ll", b"j"]:
+                code, size, kind = "q" if conv in b"di" else "Q", 8, "int"
+            else:
+                code, size, kind = "i" if conv in b"dic" else "I", 4, "int"
+            offset, struct_fmt = self._add(offset, struct_fmt, code, size)
+            self.args.append(kind)
+            self.offsets.append(offset - size)
+            spec = b"%" + flags + (width or b"") + (b"." + precision if precision else b"")
+            if conv == b"p":
+                spec, conv = b"0x%", b"x"
+            elif conv in b"aA":
+                conv = b"e"
+            pyfmt += spec + (b"s" if conv == b"s" else conv)
+        pyfmt += fmt[last:].replace(b"%", b"%%")
+        self.pyfmt = pyfmt.decode("utf-8", errors="replace")
+        self.arg_struct = struct.Struct(struct_fmt)
+        self.strings = [i for i, kind in enumerate(self.args) if kind == "str"]
+
+    @staticmethod
+    def _add(offset: int, struct_fmt: str, code: str, size: int):
+        # 64 bit arguments are 8 byte aligned in the package, like in va_list
+        pad = (-offset) % 8 if size == 8 else 0
+        return offset + pad + size, struct_fmt + "x" * pad + code
+
+
+class DictLogDecoder:
+    def __init__(self, dictionary: str, hex_encoded: bool = False) -> None:
+        """
+        :param dictionary: Path to log_dictionary.json of the running image
+        :param hex_encoded: Input is hex text (CONFIG_LOG_BACKEND_UART_OUTPUT_DICTIONARY_HEX)
+        """
+        self.db = Dictionary(dictionary)
+        self.hex_encoded = hex_encoded
+        e = self.db.endian
+        self._ptr = "I" if self.db.bits == 32 else "Q"
+        self._hdr = struct.Struct(f"{e}BBHH{self._ptr}{'Q' if self.db.timestamp_64 else 'I'}")
+        self._dropped = struct.Struct(f"{e}BH")
+        self._pkg_hdr = struct.Struct(f"{e}BBBB{self._ptr}")
+        self._formats = {}
+        self._buf = bytearray()
+        self._hex_buf = b""
+        self.stats = {"messages": 0, "dropped": 0, "resyncs": 0}
+
+    def _format(self, fmt_ptr: int) -> _FormatEntry:
+        entry = self._formats.get(fmt_ptr)
+        if entry is None:
+            fmt = self.db.find_string(fmt_ptr)
+            if fmt is None:
+                raise DictLogError(f"No format string at 0x{fmt_ptr:x}")
+            entry = self._formats[fmt_ptr] = _FormatEntry(fmt, self._ptr, self.db.endian, self._pkg_hdr.size)
+        return entry
+
+    def _timestamp(self, ts: int) -> str:
+        if not self.db.timestamp_freq:
+            return f"{ts:010d}"
+        us = ts * 1000000 // self.db.timestamp_freq
+        s, us = divmod(us, 1000000)
+        m, s = divmod(s, 60)
+        h, m = divmod(m, 60)
+        return f"{h:02d}:{m:02d}:{s:02d}.{us // 1000:03d},{us % 1000:03d}"
+
+    def decode_package(self, pkg: bytes) -> str:
+        """ Message text of a cbprintf package """
+        words, str_cnt, ro_str_cnt, rw_str_cnt, fmt_ptr = self._pkg_hdr.unpack_from(pkg)
+        entry = self._format(fmt_ptr)
+        # Argument struct starts at offset 0 with padding up to the first argument
+        values = entry.arg_struct.unpack_from(pkg) if entry.args else ()
+        if not entry.strings:
+            return self._render(entry, values)
+
+        # Strings copied into the package: word index of the argument, then the string
+        strings = {}
+        offset = words * 4 + ro_str_cnt + rw_str_cnt
+        for _ in range(str_cnt):
+            idx = pkg[offset]
+            end = pkg.index(b"\0", offset + 1)
+            strings[idx] = pkg[offset + 1:end]
+            offset = end + 1
+
+        values = list(values)
+        for i in entry.strings:
+            s = strings.get(entry.offsets[i] // 4)
+            if s is None:
+                s = self.db.find_string(values[i])
+            values[i] = s.decode("utf-8", errors="replace") if s is not None else f"<string@0x{values[i]:x}>"
+        return self._render(entry, tuple(values))
+
+    @staticmethod
+    def _render(entry: _FormatEntry, values: tuple) -> str:
+        try:
+            return entry.pyfmt % values
+        except (TypeError, ValueError):
+            return f"{entry.pyfmt} {values}"
+
+    def _decode_one(self) -> Optional[tuple]:
+        # (consumed bytes, line or None), None if the buffer holds no complete message
+        buf = self._buf
+        msg_type = buf[0]
+        if msg_type == MSG_TYPE_DROPPED:
+            if len(buf) < self._dropped.size:
+                return None
+            _, count = self._dropped.unpack_from(buf)
+            self.stats["dropped"] += count
+            return self._dropped.size, f"--- {count} messages dropped ---"
+        if msg_type != MSG_TYPE_NORMAL:
+            raise DictLogError(f"Unknown message type {msg_type}")
+        if len(buf) < self._hdr.size:
+            return None
+        _, domain_lvl, pkg_len, data_len, source, ts = self._hdr.unpack_from(buf)
+        total = self._hdr.size + pkg_len + data_len
+        if total > MAX_MSG_SIZE or (pkg_len and pkg_len < self._pkg_hdr.size):
+            raise DictLogError(f"Invalid message lengths {pkg_len}, {data_len}")
+        if len(buf) < total:
+            return None
+        pkg = bytes(buf[self._hdr.size:self._hdr.size + pkg_len])
+        text = self.decode_package(pkg) if pkg_len else ""
+        if data_len:
+            data = buf[self._hdr.size + pkg_len:total]
+            text += " " + binascii.hexlify(bytes(data), " ").decode()
+        level = LEVELS.get((domain_lvl >> 3) & 0x07, "???")
+        self.stats["messages"] += 1
+        return total, f"[{self._timestamp(ts)}] <{level}> {self.db.source_name(source)}: {text}"
+
+    def feed(self, data: bytes) -> Iterator[str]:
+        """ Decoded lines of all messages completed by data, partial messages are kept """
+        if self.hex_encoded:
+            data = self._unhex(data)
+        self._buf += data
+        while self._buf:
+            try:
+                result = self._decode_one()
+            except (DictLogError, struct.error, ValueError, IndexError):
+                # Lost sync, e.g. after a reset in the middle of a frame
+                self.stats["resyncs"] += 1
+                del self._buf[0]
+                continue
+            if result is None:
+                return
+            consumed, line = result
+            del self._buf[:consumed]
+            yield line
+
+    def reset(self) -> None:
+        """ Drop a partial message, e.g. after the port was reopened """
+        self._buf.clear()
+        self._hex_buf = b""
+
+    def _unhex(self, data: bytes) -> bytes:
+        data = self._hex_buf + data
+        marker = data.rfind(HEX_MARKER)
+        if marker >= 0:
+            self._buf.clear()
+            data = data[marker + len(HEX_MARKER):]
+        data = re.sub(rb"[^0-9a-fA-F]", b"", data)
+        self._hex_buf = data[len(data) // 2 * 2:]
+        return binascii.unhexlify(data[:len(data) // 2 * 2])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decode Zephyr dictionary logs")
+    parser.add_argument("dictionary", help="log_dictionary.json of the image")
+    parser.add_argument("capture", help="binary capture, - for stdin")
+    parser.add_argument("--hex", action="store_true", help="capture is hex encoded")
+    args = parser.parse_args()
+
+    decoder = DictLogDecoder(args.dictionary, hex_encoded=args.hex)
+    f = sys.stdin.buffer if args.capture == "-" else open(args.capture, "rb")
+    with f:
+        while True:
+            chunk = f.read(65536)
+            if not chunk:
+                break
+            for line in decoder.feed(chunk):
+                print(line)
+    print(f"{decoder.stats}", file=sys.stderr)
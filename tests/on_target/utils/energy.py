@@ -0,0 +1,129 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Charge and energy per operation from power captures.
+
+An operation is marked by a UART line, e.g. "Sent Hello World message with ID"
+for device messages or "Lat:" for cell location. Operation i spans from the
+previous marker (or from start for the first one) to marker i, so the result is
+the cost of one cycle including idle time, which is what drives battery life.
+
+    capture = load("outcomes/power_test_coap_device_message.npz")
+    result = operation_energy(capture, OPERATIONS["device_message"], voltage_mv=3700)
+    regressions = check_baselines({"device_message/coap/thingy91x": result}, "baselines.json")
+
+Integration uses the cumulative charge of all windows, so any number of
+operations are evaluated with two np.interp() calls.
+"""
+
+import os
+import re
+import json
+from typing import Union
+
+import numpy as np
+
+OPERATIONS = {
+    "device_message": r"Sent Hello World message with ID",
+    "cell_location": r"Lat:",
+}
+DEFAULT_TOLERANCE = 0.1
+
+
+def cumulative_charge(t: np.ndarray, current_ua: np.ndarray) -> np.ndarray:
+    """ Charge in uC from t[0] to every t[i], trapezoidal """
+    if len(t) < 2:
+        return np.zeros(len(t))
+    return np.concatenate([[0.0], np.cumsum(np.diff(t) * (current_ua[1:] + current_ua[:-1]) / 2)])
+
+def charge_between(t: np.ndarray, current_ua: np.ndarray, starts, ends) -> np.ndarray:
+    """ Charge in uC of every [start, end) interval, clipped to the capture """
+    cum = cumulative_charge(t, current_ua)
+    return np.interp(np.asarray(ends, dtype=np.float64), t, cum) - np.interp(np.asarray(starts, dtype=np.float64), t, cum)
+
+def marker_times(capture: dict, pattern: str) -> np.ndarray:
+    regex = re.compile(pattern)
+    return np.array([t for t, line in zip(capture["uart_time"], capture["uart_line"]) if regex.search(str(line))],
+                    dtype=np.float64)
+
+def phase_time(capture: dict, name: str, kind: str = "end") -> float:
+    """ Time of the first mark of a phase, None if not marked """
+    for t, n, k in zip(capture["mark_time"], capture["mark_name"], capture["mark_kind"]):
+        if n == name and k == kind:
+            return float(t)
+    return None
+
+def operation_energy(capture: dict, pattern: str, voltage_mv: float, start: Union[float, str] = "cloud_connect") -> dict:
+    """
+    Charge and energy of every operation marked by pattern
+
+    :param capture: Arrays as saved by PowerCapture.save() (utils/power_capture.py)
+    :param start: Start of the first operation, time or name of a phase end mark;
+                  without it the first marker only starts the first operation
+    """
+    markers = marker_times(capture, pattern)
+    if isinstance(start, str):
+        start = phase_time(capture, start)
+    if start is not None:
+        markers = np.concatenate([[start], markers[markers > start]])
+    if len(markers) < 2:
+        return {"count": 0}
+    t, current = capture["time"], capture["mean"]
+    charge = charge_between(t, current, markers[:-1], markers[1:])
+    energy = charge * voltage_mv / 1000
+    durations = np.diff(markers)
+    return {
+        "count": int(len(charge)),
+        "charge_uc": float(np.mean(charge)),
+        "energy_uj": float(np.mean(energy)),
+        "energy_uj_median": float(np.median(energy)),
+        "energy_uj_std": float(np.std(energy)),
+        "duration_s": float(np.mean(durations)),
+        "avg_current_ua": float(np.sum(charge) / np.sum(durations)),
+    }
+
+def compare(results: dict, reference: str) -> dict:
+    """ Energy of every result relative to results[reference], e.g. per transport """
+    base = results[reference]["energy_uj"]
+    return {key: r["energy_uj"] / base for key, r in results.items() if r.get("count")}
+
+def load_baselines(path: str) -> dict:
+    if not path or not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def check_baselines(results: dict, baselines: Union[str, dict], tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """
+    Results using more energy than their baseline plus tolerance
+
+    :param results: Key (e.g. "device_message/coap/thingy91x/prod") to operation_energy() result
+    :param baselines: Path or dict of key to {"energy_uj", optional "tolerance"}
+    :return: List of regression messages, empty if none
+    """
+    if isinstance(baselines, str):
+        baselines = load_baselines(baselines)
+    regressions = []
+    for key, result in results.items():
+        baseline = baselines.get(key)
+        if not baseline or not result.get("count"):
+            continue
+        limit = baseline["energy_uj"] * (1 + baseline.get("tolerance", tolerance))
+        if result["energy_uj"] > limit:
+            regressions.append(
+                f"{key}: {result['energy_uj']:.0f} uJ per operation, baseline {baseline['energy_uj']:.0f} uJ "
+                f"(+{(result['energy_uj'] / baseline['energy_uj'] - 1) * 100:.1f} %)"
+            )
+    return regressions
+
+def update_baselines(results: dict, path: str) -> None:
+    """ Store results as new baselines, keeping tolerances and other keys """
+    baselines = load_baselines(path)
+    for key, result in results.items():
+        if result.get("count"):
+            baselines.setdefault(key, {})["energy_uj"] = result["energy_uj"]
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
@@ -0,0 +1,91 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Firmware-aware ordering of collected tests.
+
+Tests select their image through fixtures like coap_fota_hex_file, so the image
+of a test is known at collection time. order_items() groups tests by the
+*_hex_file and *_zip_file fixtures they request, runs tests without an image
+first and orders groups and tests within a group by expected duration. Tests
+with a *_zip_file fixture (application FOTA) leave a different image on the
+device and run last in their group.
+
+Together with SKIP_REFLASH=1 in flash_tools, consecutive tests of a group then
+only flash the image once.
+"""
+
+from collections import defaultdict
+
+IMAGE_FIXTURE_SUFFIXES = ("_hex_file", "_zip_file")
+
+DURATIONS_CACHE_KEY = "firmware_scheduler/durations"
+DEFAULT_DURATION = 60.0
+DEFAULT_SLOW_DURATION = 60.0 * 30
+
+
+def image_key(item) -> tuple:
+    """ Image fixtures requested by a test, empty for tests not flashing anything """
+    return tuple(sorted(x for x in item.fixturenames if x.endswith(IMAGE_FIXTURE_SUFFIXES)))
+
+def hex_key(key: tuple) -> tuple:
+    # Tests sharing the hex file share the flashed image, zip files are FOTA payloads
+    return tuple(x for x in key if x.endswith("_hex_file"))
+
+def changes_image(item) -> bool:
+    # Application FOTA replaces the flashed image, modem FOTA doesn't
+    return any(x.endswith("_zip_file") for x in item.fixturenames)
+
+def is_skipped(item) -> bool:
+    # Marked skip at collection, e.g. missing artifacts, so never flashes
+    return item.get_closest_marker("skip") is not None
+
+def expected_duration(item, durations: dict) -> float:
+    duration = durations.get(item.nodeid)
+    if duration is not None:
+        return duration
+    if item.get_closest_marker("slow"):
+        return DEFAULT_SLOW_DURATION
+    return DEFAULT_DURATION
+
+def count_flashes(items: list) -> int:
+    """ Number of image changes when running items in the given order on a fresh device """
+    flashes = 0
+    current = None
+    for item in items:
+        if is_skipped(item):
+            continue
+        key = hex_key(image_key(item))
+        if key and key != current:
+            flashes += 1
+        current = None if changes_image(item) else key
+    return flashes
+
+def order_items(items: list, durations: dict = None) -> list:
+    """
+    Order tests so that tests using the same image run back to back
+
+    :param durations: Measured durations by node ID
+    :return: New list, the input is not modified
+    """
+    durations = durations or {}
+    groups = defaultdict(list)
+    for index, item in enumerate(items):
+        groups[hex_key(image_key(item))].append((index, item))
+
+    def item_order(entry):
+        index, item = entry
+        return (changes_image(item), expected_duration(item, durations), index)
+
+    def group_order(key):
+        if not key:
+            return (0, 0, 0)
+        total = sum(expected_duration(item, durations) for _, item in groups[key])
+        return (1, total, min(index for index, _ in groups[key]))
+
+    ordered = []
+    for key in sorted(groups, key=group_order):
+        ordered += [item for _, item in sorted(groups[key], key=item_order)]
+    return ordered
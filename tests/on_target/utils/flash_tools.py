@@ -7,15 +7,23 @@ import subprocess
 import os
 import sys
 import glob
+import time
 sys.path.append(os.getcwd())
-from utils.logger import get_logger
-from utils.nrf91_flasher import nrf91_flasher
+from utils.logger import get_logger, log_event
+# Same hex_cache module instance (and in-process image cache) as nrf91_flasher
+from utils.nrf91_flasher import nrf91_flasher, file_sha256, load_hex, HexFormatError
 
 logger = get_logger()
 
 SEGGER = os.getenv('SEGGER')
 RUNNER_DEVICE_TYPE = os.getenv('RUNNER_DEVICE_TYPE')
 PROBE_TYPE = "JLINK"  # Default probe type
+# Skip flashing an image which is already on the device, see firmware_scheduler.py
+SKIP_REFLASH = os.getenv('SKIP_REFLASH') == "1"
+
+# Image hash last flashed per probe serial, dropped when the device content changes
+_flashed_images = {}
+FLASH_STATS = {"flashes": 0, "skipped": 0}
 
 if RUNNER_DEVICE_TYPE in ["thingy91", "thingy91x"]:
     PROBE_TYPE = "PYOCD"
@@ -26,13 +34,41 @@ def reset_device(serial=SEGGER):
     else:
         reset_device_pyocd(serial)
 
+def image_digest(hexfile):
+    """ Hash of the image content for HEX files (cached, see hex_cache.py), of the file otherwise """
+    if hexfile.endswith(".hex"):
+        try:
+            return load_hex(hexfile).digest
+        except HexFormatError as e:
+            logger.warning(f"Failed to parse {hexfile}: {e}")
+    return file_sha256(hexfile)
+
 def flash_device(hexfile, serial=SEGGER):
+    image_hash = image_digest(hexfile) if SKIP_REFLASH else None
+    if image_hash and _flashed_images.get(serial) == image_hash:
+        logger.info(f"{hexfile} already flashed on {serial}, resetting instead")
+        FLASH_STATS["skipped"] += 1
+        start = time.time()
+        reset_device(serial)
+        log_event("flash", hexfile=hexfile, duration=time.time() - start, skipped=True)
+        return
+    invalidate_flash_cache(serial)
+    start = time.time()
     if PROBE_TYPE == "JLINK":
         flash_device_jlink(hexfile, serial)
     else:
         flash_device_pyocd(hexfile, serial)
+    FLASH_STATS["flashes"] += 1
+    log_event("flash", hexfile=hexfile, duration=time.time() - start, skipped=False)
+    if image_hash:
+        _flashed_images[serial] = image_hash
+
+def invalidate_flash_cache(serial=SEGGER):
+    # Call when the image on the device changes outside flash_device(), e.g. FOTA
+    _flashed_images.pop(serial, None)
 
 def recover_device(serial=SEGGER):
+    invalidate_flash_cache(serial)
     if PROBE_TYPE == "JLINK":
         recover_device_jlink(serial)
     else:
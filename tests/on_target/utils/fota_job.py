@@ -0,0 +1,193 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+FOTA job state from two sources: the job status in nRF Cloud and the device log.
+
+The tracker advances as soon as either source confirms a state, e.g. the job is
+IN_PROGRESS when the device logs that the download started, without waiting for
+the next cloud poll. COMPLETED is only taken from the cloud, the device
+reporting the job as succeeded is what the FOTA tests verify. Waiting on a
+state blocks on a condition that is notified by UART lines, and polls the
+cloud in between with a growing interval:
+
+    tracker = FotaJobTracker(functools.partial(fota.get_fota_status, job_id), uart=dut_fota.uart)
+    tracker.wait_for("IN_PROGRESS", timeout=600)
+    tracker.wait_for("COMPLETED", timeout=600)
+    tracker.finish()    # logs a "fota_job" event with the latency of every state
+"""
+
+import os
+import re
+import sys
+import time
+import threading
+from typing import Callable
+
+sys.path.append(os.getcwd())
+from utils.logger import get_logger, log_event
+
+logger = get_logger()
+
+STATES = ["CREATED", "IN_PROGRESS", "DOWNLOADED", "REBOOTED", "COMPLETED"]
+CLOUD_STATES = {"QUEUED": "CREATED", "IN_PROGRESS": "IN_PROGRESS", "COMPLETED": "COMPLETED", "SUCCEEDED": "COMPLETED"}
+CLOUD_FAILED = ["FAILED", "CANCELLED", "TIMED_OUT", "REJECTED"]
+
+# (state, pattern, state that must be reached first), the latter rules out
+# e.g. the boot banner of the reset before the download as the reboot into the update
+UART_EVIDENCE = [
+    ("IN_PROGRESS", r"Downloading update|Starting FOTA download|Download started|FOTA download started|Downloaded \d+/\d+ bytes", "CREATED"),
+    ("DOWNLOADED", r"Download complete|FOTA download finished|Firmware download complete", "CREATED"),
+    ("REBOOTED", r"\*\*\* Booting|Booting Zephyr OS", "DOWNLOADED"),
+]
+
+# States the device log can not confirm
+CLOUD_ONLY_STATES = ["COMPLETED"]
+
+MIN_POLL_INTERVAL = 1.0
+MAX_POLL_INTERVAL = 5.0
+
+
+class FotaJobError(RuntimeError):
+    pass
+
+
+class FotaJobTracker:
+    def __init__(
+        self,
+        get_status: Callable[[], str],
+        uart=None,
+        evidence: list = UART_EVIDENCE,
+        progress=None,
+        job_id: str = None,
+    ) -> None:
+        """
+        :param get_status: Returns the cloud status of the job (or execution)
+        :param uart: Uart (or view) to take evidence from, optional
+        :param evidence: (state, pattern, required state) rules for UART lines
+        :param progress: FotaProgress, given cloud states and checked for stalls while waiting
+        """
+        self.get_status = get_status
+        self.job_id = job_id
+        self.progress = progress
+        for state, _, _ in evidence:
+            if state in CLOUD_ONLY_STATES:
+                raise ValueError(f"{state} can only be reached from the cloud job status")
+        self.evidence = [(state, re.compile(p), required) for state, p, required in evidence]
+        self.created = time.time()
+        # state to (time, source), source is "cloud", "uart" or "implied" for skipped states
+        self.reached = {"CREATED": (self.created, "cloud")}
+        self.cloud_status = None
+        self.polls = 0
+        self.failed = None
+        self._cond = threading.Condition()
+        self._uart = None
+        self._interval = MIN_POLL_INTERVAL
+        self._next_poll = 0.0
+        if uart is not None:
+            self._uart = getattr(uart, "owner", uart)
+            self._uart.line_listeners.append(self.on_line)
+
+    @property
+    def state(self) -> str:
+        return max(self.reached, key=STATES.index)
+
+    def _advance(self, state: str, t: float, source: str) -> bool:
+        # Caller holds the condition
+        if STATES.index(state) <= STATES.index(self.state):
+            return False
+        for skipped in STATES[STATES.index(self.state) + 1:STATES.index(state)]:
+            self.reached[skipped] = (t, "implied")
+        self.reached[state] = (t, source)
+        logger.info(f"FOTA job {self.job_id or ''} {state} ({source}, {t - self.created:.1f} s)")
+        self._cond.notify_all()
+        return True
+
+    def on_line(self, t: float, line: str) -> None:
+        for state, pattern, required in self.evidence:
+            if pattern.search(line) and required in self.reached:
+                with self._cond:
+                    self._advance(state, t, "uart")
+                return
+
+    def poll(self) -> None:
+        """ Fetch the cloud status once """
+        self.polls += 1
+        try:
+            status = self.get_status()
+        except Exception as e:
+            logger.warning(f"Exception {e} while polling FOTA job status")
+            return
+        if self.progress:
+            self.progress.add_cloud_status(status)
+        with self._cond:
+            if status != self.cloud_status:
+                logger.debug(f"FOTA job status: {status}")
+            self.cloud_status = status
+            if status in CLOUD_FAILED:
+                self.failed = status
+                self._cond.notify_all()
+            elif status in CLOUD_STATES:
+                self._advance(CLOUD_STATES[status], time.time(), "cloud")
+
+    def wait_for(self, state: str, timeout: float) -> float:
+        """
+        Block until state (or a later one) is reached
+
+        :return: Seconds since the tracker was created
+        :raises FotaJobError: If the job failed or timed out
+        """
+        deadline = time.time() + timeout
+        while True:
+            # Check and wait under one lock, a UART line in between would only be seen at the next poll
+            with self._cond:
+                if STATES.index(self.state) >= STATES.index(state):
+                    return self.reached[self.state][0] - self.created
+                if self.failed:
+                    raise FotaJobError(f"FOTA job changed to {self.failed} while waiting for {state}")
+                if self.progress:
+                    self.progress.check()
+                now = time.time()
+                if now >= deadline:
+                    raise FotaJobError(f"Timeout awaiting FOTA job {state}, last cloud status {self.cloud_status}")
+                if now < self._next_poll:
+                    self._cond.wait(min(self._next_poll, deadline) - now)
+                    continue
+            # Outside the lock, UART lines are handled during the request
+            self.poll()
+            # Poll quickly at first, a job is often picked up within seconds
+            self._next_poll = time.time() + self._interval
+            self._interval = min(self._interval * 1.5, MAX_POLL_INTERVAL)
+
+    def reset_poll_interval(self) -> None:
+        """ Poll quickly again, e.g. after resetting the device """
+        self._interval = MIN_POLL_INTERVAL
+        self._next_poll = 0.0
+
+    def latencies(self) -> dict:
+        """ Seconds from the previous reached state to every reached state """
+        latencies = {}
+        previous = self.created
+        for state in STATES[1:]:
+            if state in self.reached:
+                latencies[state] = self.reached[state][0] - previous
+                previous = self.reached[state][0]
+        return latencies
+
+    def finish(self) -> dict:
+        """ Stop listening and log a "fota_job" event """
+        if self._uart is not None:
+            self._uart.line_listeners.remove(self.on_line)
+            self._uart = None
+        result = {
+            "job_id": self.job_id,
+            "state": self.state,
+            "latencies": self.latencies(),
+            "sources": {state: source for state, (_, source) in self.reached.items()},
+            "polls": self.polls,
+            "failed": self.failed,
+        }
+        log_event("fota_job", **result)
+        return result
@@ -0,0 +1,206 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+FOTA download progress from the device log and the cloud job status.
+
+fota_download logs "Downloaded 12288/412345 bytes (2%)" with
+CONFIG_NRF_CLOUD_FOTA_LOG_LEVEL_DBG (config_fragments/mss/fota_*.conf). Progress
+lines are parsed as they arrive, throughput is computed over a sliding window
+and a download without progress for stall_timeout seconds fails the test long
+before the device gives up (CONFIG_FOTA_DL_TIMEOUT_MIN=30):
+
+    progress = FotaProgress("mfw_delta", "coap")
+    progress.attach(dut_fota.uart)
+    while status != "COMPLETED":
+        progress.add_cloud_status(status)
+        progress.check()
+    progress.finish()   # logs a "fota" event and writes outcomes/fota_*.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+
+import numpy as np
+sys.path.append(os.getcwd())
+from utils.logger import get_logger, log_event
+
+logger = get_logger()
+
+STALL_TIMEOUT = int(os.getenv("FOTA_STALL_TIMEOUT", 300))
+THROUGHPUT_WINDOW = 10.0
+# Samples in the logged timeline, the outcome file has all of them
+TIMELINE_POINTS = 200
+
+# (event, pattern), a "progress" pattern has groups for offset and size or percent
+PROGRESS_PATTERNS = [
+    ("progress", re.compile(r"Downloaded (?P<offset>\d+)/(?P<size>\d+) bytes")),
+    ("progress", re.compile(r"[Dd]ownload progress:? (?P<percent>\d+) ?%")),
+    ("download_start", re.compile(r"Downloading update|Starting FOTA download|Download started|FOTA download started")),
+    ("download_done", re.compile(r"Download complete|FOTA download finished|Firmware download complete")),
+    ("download_error", re.compile(r"Download failed|FOTA_DOWNLOAD_EVT_ERROR|FOTA download failed")),
+    ("download_resume", re.compile(r"[Rr]esuming download|Download resumed")),
+]
+
+
+class FotaStallError(RuntimeError):
+    pass
+
+
+class FotaProgress:
+    def __init__(self, kind: str, transport: str = None, stall_timeout: float = STALL_TIMEOUT,
+                 patterns: list = PROGRESS_PATTERNS) -> None:
+        """
+        :param kind: "app", "mfw_delta" or "mfw_full"
+        :param transport: "coap", "rest" or "mqtt"
+        :param stall_timeout: Seconds without progress after the download started
+        """
+        self.kind = kind
+        self.transport = transport
+        self.stall_timeout = stall_timeout
+        self.patterns = patterns
+        self.size = None
+        # (time, offset in bytes)
+        self.samples = []
+        # (time, source, event), source is "uart" or "cloud"
+        self.events = []
+        self.cloud_status = None
+        self.restarts = 0
+        self.created = time.time()
+        self._last_progress = None
+        self._uarts = []
+
+    def attach(self, uart) -> None:
+        """ Parse lines received by uart (or the owner of a view) """
+        uart = getattr(uart, "owner", uart)
+        uart.line_listeners.append(self.on_line)
+        self._uarts.append(uart)
+
+    def detach(self) -> None:
+        for uart in self._uarts:
+            uart.line_listeners.remove(self.on_line)
+        self._uarts = []
+
+    def on_line(self, t: float, line: str) -> None:
+        for event, pattern in self.patterns:
+            m = pattern.search(line)
+            if not m:
+                continue
+            if event == "progress":
+                self._add_progress(t, m.groupdict())
+            else:
+                self.events.append((t, "uart", event))
+                if event in ("download_start", "download_resume"):
+                    self._last_progress = t
+            return
+
+    def _add_progress(self, t: float, groups: dict) -> None:
+        if groups.get("size"):
+            self.size = int(groups["size"])
+        if groups.get("offset") is not None:
+            offset = int(groups["offset"])
+        elif self.size:
+            offset = int(self.size * int(groups["percent"]) / 100)
+        else:
+            # Percent only and size unknown, track percent as offset of 100 "bytes"
+            offset = int(groups["percent"])
+        if not self.samples:
+            self.events.append((t, "uart", "first_progress"))
+        elif offset < self.samples[-1][1]:
+            self.restarts += 1
+            self.events.append((t, "uart", "download_restart"))
+        if not self.samples or offset != self.samples[-1][1]:
+            self._last_progress = t
+        self.samples.append((t, offset))
+
+    def add_cloud_status(self, status: str, t: float = None) -> None:
+        """ Record the job or execution status, only changes are kept """
+        if status != self.cloud_status:
+            self.cloud_status = status
+            self.events.append((time.time() if t is None else t, "cloud", status))
+
+    def stalled(self, now: float = None) -> bool:
+        """ Download started but no progress for stall_timeout seconds """
+        if self._last_progress is None or self.done:
+            return False
+        return (time.time() if now is None else now) - self._last_progress > self.stall_timeout
+
+    @property
+    def done(self) -> bool:
+        return any(e[2] == "download_done" for e in self.events) or \
+            bool(self.size and self.samples and self.samples[-1][1] >= self.size)
+
+    def check(self) -> None:
+        """ Raise FotaStallError if the download stalled or the device reported an error """
+        if any(e[2] == "download_error" for e in self.events):
+            raise FotaStallError(f"FOTA download failed on the device at {self.offset} bytes")
+        if self.stalled():
+            raise FotaStallError(
+                f"FOTA download stalled at {self.offset}/{self.size} bytes, "
+                f"no progress for {time.time() - self._last_progress:.0f} s"
+            )
+
+    @property
+    def offset(self) -> int:
+        return self.samples[-1][1] if self.samples else 0
+
+    def arrays(self) -> tuple:
+        samples = np.array(self.samples, dtype=np.float64).reshape(-1, 2)
+        return samples[:, 0], samples[:, 1]
+
+    def throughput(self, window: float = THROUGHPUT_WINDOW) -> tuple:
+        """ (time, bytes/s over the preceding window) for every progress sample """
+        t, offset = self.arrays()
+        if len(t) < 2:
+            return np.empty(0), np.empty(0)
+        # Restarts reset the offset, count transferred bytes
+        transferred = np.concatenate([[0.0], np.cumsum(np.maximum(np.diff(offset), 0))])
+        j = np.searchsorted(t, t - window)
+        j = np.minimum(j, np.arange(len(t)) - 1).clip(0)
+        dt = t - t[j]
+        rate = np.divide(transferred - transferred[j], dt, out=np.zeros(len(t)), where=dt > 0)
+        return t[1:], rate[1:]
+
+    def summary(self) -> dict:
+        t, offset = self.arrays()
+        _, rate = self.throughput()
+        first = {}
+        for when, source, event in self.events:
+            first.setdefault(f"{source}:{event}", when)
+        duration = float(t[-1] - t[0]) if len(t) > 1 else None
+        transferred = float(np.maximum(np.diff(offset), 0).sum()) if len(t) > 1 else 0.0
+        return {
+            "kind": self.kind,
+            "transport": self.transport,
+            "size": self.size,
+            "bytes": transferred,
+            "download_s": duration,
+            "bytes_per_s": transferred / duration if duration else None,
+            "min_bytes_per_s": float(rate.min()) if len(rate) else None,
+            "max_bytes_per_s": float(rate.max()) if len(rate) else None,
+            "restarts": self.restarts,
+            "completed": self.done,
+            # Seconds from creation of the tracker, i.e. from the job being posted
+            "milestones": {name: when - self.created for name, when in first.items()},
+        }
+
+    def finish(self, path: str = None) -> dict:
+        """ Detach, log a "fota" event and write the full timeline to path (default in outcomes/) """
+        self.detach()
+        summary = self.summary()
+        step = max(1, len(self.samples) // TIMELINE_POINTS)
+        log_event("fota", **summary, duration=summary["download_s"],
+                  timeline=[[t - self.created, o] for t, o in self.samples[::step]])
+        path = path or os.path.join("outcomes", f"fota_{self.kind}_{self.transport}_{int(self.created)}.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({**summary, "created": self.created, "samples": self.samples, "events": self.events}, f)
+        if summary["bytes_per_s"]:
+            logger.info(f"FOTA {self.kind} download: {summary['bytes']:.0f} bytes in {summary['download_s']:.0f} s, "
+                        f"{summary['bytes_per_s'] / 1024:.1f} kB/s")
+        return summary
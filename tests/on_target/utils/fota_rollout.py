@@ -0,0 +1,202 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+FOTA rollout to a fleet in waves.
+
+Every wave is one multi-device FOTA job. The execution of every device in the
+wave is polled through fota-job-executions with a bounded number of concurrent
+requests, until all executions are terminal or the wave times out. The rollout
+stops, and cancels the running job, when the share of failed devices in a wave
+exceeds the failure threshold:
+
+    rollout = FotaRollout(fota, bundle_id, device_ids, waves=[1, 5, 0.5, 1.0])
+    report = rollout.run()
+
+    python utils/fota_rollout.py BUNDLE_ID nrf-1 nrf-2 nrf-3 --waves 1 0.5 1.0
+
+Wave sizes are device counts, or fractions of the fleet that the rollout has
+reached at the end of the wave (1.0 is everything left).
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.exceptions import HTTPError
+sys.path.append(os.getcwd())
+from utils.logger import get_logger, log_event
+
+logger = get_logger()
+
+TERMINAL_STATES = ["SUCCEEDED", "FAILED", "TIMED_OUT", "CANCELLED", "REJECTED"]
+DEFAULT_WAVES = [1, 0.1, 0.5, 1.0]
+MAX_CONCURRENCY = 8
+POLL_INTERVAL = 5.0
+WAVE_TIMEOUT = 60 * 60
+FAILURE_THRESHOLD = 0.2
+
+
+def wave_slices(n: int, waves: list) -> list:
+    """ (start, end) indices of every wave, sizes are counts or cumulative fractions of n """
+    slices = []
+    start = 0
+    for size in waves:
+        end = min(n, int(round(size * n)) if isinstance(size, float) else start + size)
+        if end > start:
+            slices.append((start, end))
+            start = end
+    if start < n:
+        slices.append((start, n))
+    return slices
+
+
+class FotaRolloutAborted(RuntimeError):
+    pass
+
+
+class FotaRollout:
+    def __init__(
+        self,
+        fota,
+        bundle_id: str,
+        device_ids: list,
+        waves: list = DEFAULT_WAVES,
+        max_concurrency: int = MAX_CONCURRENCY,
+        failure_threshold: float = FAILURE_THRESHOLD,
+        poll_interval: float = POLL_INTERVAL,
+        wave_timeout: float = WAVE_TIMEOUT,
+    ) -> None:
+        """
+        :param fota: NRFCloudFOTA
+        :param max_concurrency: Concurrent execution status requests
+        :param failure_threshold: Share of failed devices in a wave that stops the rollout
+        """
+        self.fota = fota
+        self.bundle_id = bundle_id
+        self.device_ids = list(device_ids)
+        self.waves = wave_slices(len(self.device_ids), waves)
+        self.max_concurrency = max_concurrency
+        self.failure_threshold = failure_threshold
+        self.poll_interval = poll_interval
+        self.wave_timeout = wave_timeout
+        # device_id to final execution status, "NOT_STARTED" for devices of waves not run
+        self.results = {}
+        self.reports = []
+
+    def _poll(self, pool: ThreadPoolExecutor, job_id: str, devices: list) -> dict:
+        def status(device_id):
+            try:
+                return self.fota.get_fota_execution(device_id, job_id)["status"]
+            except HTTPError as e:
+                logger.warning(f"Failed to get FOTA execution of {device_id}: {e}")
+                return None
+        return dict(zip(devices, pool.map(status, devices)))
+
+    def run_wave(self, index: int, devices: list) -> dict:
+        start = time.time()
+        job_id = self.fota.create_fota_job(devices, self.bundle_id)
+        try:
+            # Apply job if not automatic (with FOTA v3)
+            self.fota._post(f"/fota-jobs/{job_id}/apply")
+        except HTTPError:
+            pass
+        logger.info(f"FOTA rollout wave {index}: job {job_id} for {len(devices)} devices")
+
+        statuses = {d: "QUEUED" for d in devices}
+        finished_at = {}
+        aborted = False
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            while True:
+                pending = [d for d, s in statuses.items() if s not in TERMINAL_STATES]
+                if not pending:
+                    break
+                for device_id, status in self._poll(pool, job_id, pending).items():
+                    if status is None:
+                        continue
+                    statuses[device_id] = status
+                    if status in TERMINAL_STATES:
+                        finished_at[device_id] = time.time() - start
+                failed = sum(1 for s in statuses.values() if s in TERMINAL_STATES and s != "SUCCEEDED")
+                if failed / len(devices) > self.failure_threshold:
+                    aborted = True
+                    break
+                if time.time() - start > self.wave_timeout:
+                    logger.warning(f"FOTA rollout wave {index} timed out")
+                    aborted = True
+                    break
+                if any(s not in TERMINAL_STATES for s in statuses.values()):
+                    time.sleep(self.poll_interval)
+        if aborted:
+            self.fota.cancel_fota_job(job_id)
+
+        duration = time.time() - start
+        succeeded = sum(1 for s in statuses.values() if s == "SUCCEEDED")
+        report = {
+            "wave": index,
+            "job_id": job_id,
+            "devices": len(devices),
+            "succeeded": succeeded,
+            "failed": sum(1 for s in statuses.values() if s in TERMINAL_STATES and s != "SUCCEEDED"),
+            "unfinished": sum(1 for s in statuses.values() if s not in TERMINAL_STATES),
+            "duration": duration,
+            "devices_per_minute": succeeded / duration * 60 if duration else None,
+            "max_device_s": max(finished_at.values()) if finished_at else None,
+            "aborted": aborted,
+        }
+        log_event("fota_rollout_wave", **report)
+        self.results.update(statuses)
+        return report
+
+    def run(self) -> list:
+        """
+        Run all waves in order
+
+        :return: Report of every wave run
+        :raises FotaRolloutAborted: When a wave exceeded the failure threshold or timed out
+        """
+        for index, (start, end) in enumerate(self.waves):
+            report = self.run_wave(index, self.device_ids[start:end])
+            self.reports.append(report)
+            logger.info(
+                f"FOTA rollout wave {index}: {report['succeeded']}/{report['devices']} succeeded "
+                f"in {report['duration']:.0f} s"
+            )
+            if report["aborted"]:
+                for device_id in self.device_ids[end:]:
+                    self.results[device_id] = "NOT_STARTED"
+                raise FotaRolloutAborted(
+                    f"FOTA rollout stopped in wave {index}: {report['failed']} of {report['devices']} devices failed, "
+                    f"{report['unfinished']} unfinished"
+                )
+        return self.reports
+
+
+if __name__ == "__main__":
+    import json
+    from utils.nrfcloud import NRFCloudFOTA
+
+    parser = argparse.ArgumentParser(description="FOTA rollout to many devices in waves")
+    parser.add_argument("bundle_id")
+    parser.add_argument("device_ids", nargs="+")
+    parser.add_argument("--waves", nargs="+", default=[str(x) for x in DEFAULT_WAVES],
+                        help="device counts or cumulative fractions of the fleet, e.g. 1 0.5 1.0")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--failure-threshold", type=float, default=FAILURE_THRESHOLD)
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL)
+    args = parser.parse_args()
+
+    fota = NRFCloudFOTA(api_key=os.environ["NRFCLOUD_API_KEY"])
+    waves = [float(w) if "." in w else int(w) for w in args.waves]
+    rollout = FotaRollout(fota, args.bundle_id, args.device_ids, waves, args.concurrency,
+                          args.failure_threshold, args.poll_interval)
+    try:
+        rollout.run()
+    except FotaRolloutAborted as e:
+        logger.error(str(e))
+    print(json.dumps({"waves": rollout.reports, "devices": rollout.results}, indent=2))
+    sys.exit(0 if all(s == "SUCCEEDED" for s in rollout.results.values()) else 1)
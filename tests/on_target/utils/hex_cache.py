@@ -0,0 +1,261 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Intel HEX images parsed once and cached as memory-mapped segment maps.
+
+The HEX text is decoded in one pass (all records hex-decoded at once, checksums,
+record types and extended addresses computed with numpy), and the segments are
+stored in HEX_CACHE_DIR keyed by the sha256 of the file. Later loads, also by
+other processes, map the cached file and hand out zero-copy views:
+
+    image = load_hex("merged.hex")
+    for start, data in image.range(0x00000000, 0x00100000):
+        loader.add_data(start, data.tolist())
+    image.digest        # sha256 of the content, independent of the HEX formatting
+    image.checksums()   # start, size and crc32 of every segment
+
+    python utils/hex_cache.py merged.hex
+"""
+
+import os
+import sys
+import json
+import mmap
+import zlib
+import struct
+import hashlib
+import binascii
+import argparse
+import threading
+
+import numpy as np
+
+HEX_CACHE_DIR = os.getenv("HEX_CACHE_DIR", os.path.expanduser("~/.cache/nrf91_flasher/hex"))
+MAX_CACHE_ENTRIES = 32
+
+# Cache file: header, one table entry per segment, then the segment data
+CACHE_MAGIC = b"NHEX"
+CACHE_VERSION = 1
+HEADER = struct.Struct("<4sII32s")          # magic, version, segment count, content digest
+ENTRY = struct.Struct("<IIQI4x")            # start, size, data offset, crc32
+
+DATA, EOF, EXT_SEGMENT, START_SEGMENT, EXT_LINEAR, START_LINEAR = range(6)
+
+STATS = {"parsed": 0, "mapped": 0, "memo": 0}
+
+
+class HexFormatError(ValueError):
+    pass
+
+
+def parse_hex(text: bytes) -> list:
+    """
+    Segments of an Intel HEX file
+
+    :return: [(start address, uint8 array)] sorted by address, contiguous data merged
+    :raises HexFormatError: Malformed record, bad checksum or overlapping data
+    """
+    lines = text.split()
+    if not lines:
+        raise HexFormatError("empty HEX file")
+    line_len = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+    joined = b"".join(lines)
+    line_start = np.concatenate([[0], np.cumsum(line_len)[:-1]])
+    if joined.count(b":") != len(lines) or not (np.frombuffer(joined, np.uint8)[line_start] == ord(":")).all():
+        raise HexFormatError("record does not start with ':'")
+    if ((line_len - 1) % 2).any():
+        raise HexFormatError(f"odd number of hex digits in record {int(np.argmax((line_len - 1) % 2)) + 1}")
+    try:
+        raw = np.frombuffer(binascii.unhexlify(joined.replace(b":", b"")), np.uint8)
+    except binascii.Error as e:
+        raise HexFormatError(f"invalid hex digits: {e}") from None
+
+    # Offset of every record in raw: length, address (2), type, data, checksum
+    rec_len = (line_len - 1) // 2
+    offs = np.concatenate([[0], np.cumsum(rec_len)[:-1]])
+    if (rec_len < 5).any() or (raw[offs].astype(np.int64) != rec_len - 5).any():
+        bad = int(np.argmax((rec_len < 5) | (raw[np.minimum(offs, len(raw) - 1)].astype(np.int64) != rec_len - 5)))
+        raise HexFormatError(f"record {bad + 1} length does not match its byte count")
+    checksum = np.add.reduceat(raw, offs, dtype=np.uint32) & 0xFF
+    if checksum.any():
+        raise HexFormatError(f"bad checksum in record {int(np.argmax(checksum != 0)) + 1}")
+
+    rtype = raw[offs + 3]
+    eof = np.flatnonzero(rtype == EOF)
+    if len(eof):
+        offs, rtype = offs[:eof[0]], rtype[:eof[0]]
+    if (rtype > START_LINEAR).any():
+        raise HexFormatError(f"unknown record type {int(rtype.max()):02X}")
+    addr16 = raw[offs + 1].astype(np.int64) << 8 | raw[offs + 2]
+
+    # Base address of every record, from the closest preceding extended address record
+    ext = (rtype == EXT_SEGMENT) | (rtype == EXT_LINEAR)
+    if ext.any():
+        if (raw[offs[ext]] != 2).any():
+            raise HexFormatError("extended address record without 2 data bytes")
+        value = raw[offs + 4].astype(np.int64) << 8 | raw[np.minimum(offs + 5, len(raw) - 1)]
+        ext_base = np.where(rtype == EXT_LINEAR, value << 16, value << 4)
+        last_ext = np.maximum.accumulate(np.where(ext, np.arange(1, len(offs) + 1), 0))
+        base = np.concatenate([[0], ext_base])[last_ext]
+    else:
+        base = np.zeros(len(offs), np.int64)
+
+    data = rtype == DATA
+    d_offs, d_addr = offs[data] + 4, base[data] + addr16[data]
+    d_len = raw[offs[data]].astype(np.int64)
+    keep = d_len > 0
+    d_offs, d_addr, d_len = d_offs[keep], d_addr[keep], d_len[keep]
+    if not len(d_len):
+        return []
+    if (np.diff(d_addr) < 0).any():
+        order = np.argsort(d_addr, kind="stable")
+        d_offs, d_addr, d_len = d_offs[order], d_addr[order], d_len[order]
+    end = d_addr + d_len
+    if (d_addr[1:] < end[:-1]).any():
+        i = int(np.argmax(d_addr[1:] < end[:-1])) + 1
+        raise HexFormatError(f"overlapping data at 0x{int(d_addr[i]):08X}")
+
+    # Gather the data bytes of all records, in address order, with one index array
+    d_start = np.concatenate([[0], np.cumsum(d_len)[:-1]])
+    index = np.repeat(d_offs - d_start, d_len) + np.arange(int(d_len.sum()))
+    image = raw[index]
+
+    breaks = np.flatnonzero(d_addr[1:] != end[:-1]) + 1
+    first = np.concatenate([[0], breaks])
+    last = np.concatenate([breaks, [len(d_addr)]])
+    return [(int(d_addr[f]), image[d_start[f]:d_start[l - 1] + d_len[l - 1]]) for f, l in zip(first, last)]
+
+
+def content_digest(segments: list) -> str:
+    h = hashlib.sha256()
+    for start, data in segments:
+        h.update(struct.pack("<II", start, len(data)))
+        h.update(memoryview(data))
+    return h.hexdigest()
+
+
+class HexImage:
+    def __init__(self, segments: list, sha256: str = None, digest: str = None, crc32: list = None) -> None:
+        """
+        :param segments: [(start, uint8 array)] sorted by address
+        :param sha256: Hash of the HEX file
+        """
+        self.segments = segments
+        self.sha256 = sha256
+        self.digest = digest or content_digest(segments)
+        self.crc32 = crc32 if crc32 is not None else [zlib.crc32(memoryview(d)) for _, d in segments]
+
+    @property
+    def size(self) -> int:
+        return sum(len(d) for _, d in self.segments)
+
+    def range(self, start: int, end: int) -> list:
+        """ Segments clipped to [start, end) """
+        result = []
+        for seg_start, data in self.segments:
+            lo, hi = max(start, seg_start), min(end, seg_start + len(data))
+            if lo < hi:
+                result.append((lo, data[lo - seg_start:hi - seg_start]))
+        return result
+
+    def checksums(self) -> list:
+        return [{"start": s, "size": len(d), "crc32": c} for (s, d), c in zip(self.segments, self.crc32)]
+
+    def save(self, path: str) -> None:
+        offset = HEADER.size + ENTRY.size * len(self.segments)
+        table = []
+        for (start, data), crc in zip(self.segments, self.crc32):
+            table.append(ENTRY.pack(start, len(data), offset, crc))
+            offset += len(data)
+        with open(path + ".tmp", "wb") as f:
+            f.write(HEADER.pack(CACHE_MAGIC, CACHE_VERSION, len(self.segments), bytes.fromhex(self.digest)))
+            f.write(b"".join(table))
+            for _, data in self.segments:
+                f.write(memoryview(data))
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def map(cls, path: str, sha256: str = None) -> "HexImage":
+        """ Image saved by save(), segments are views of the mapped file """
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mm) < HEADER.size:
+            raise HexFormatError(f"truncated cache file {path}")
+        magic, version, count, digest = HEADER.unpack_from(mm)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or len(mm) < HEADER.size + ENTRY.size * count:
+            raise HexFormatError(f"not a version {CACHE_VERSION} cache file: {path}")
+        buf = np.frombuffer(mm, np.uint8)
+        segments, crc32 = [], []
+        for i in range(count):
+            start, size, offset, crc = ENTRY.unpack_from(mm, HEADER.size + i * ENTRY.size)
+            if offset + size > len(mm):
+                raise HexFormatError(f"truncated cache file {path}")
+            segments.append((start, buf[offset:offset + size]))
+            crc32.append(crc)
+        return cls(segments, sha256, digest.hex(), crc32)
+
+
+def _prune(cache_dir: str) -> None:
+    entries = [e for e in os.scandir(cache_dir) if e.name.endswith(".bin")]
+    entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    for e in entries[MAX_CACHE_ENTRIES:]:
+        try:
+            os.remove(e.path)
+        except OSError:
+            pass
+
+
+# (path, size, mtime) to HexImage, skips hashing files already loaded in this process
+_images = {}
+_images_lock = threading.Lock()
+
+def load_hex(path: str, cache_dir: str = None) -> HexImage:
+    """ Image of a HEX file, from this process, the cache directory or parsed (and cached) """
+    cache_dir = cache_dir or HEX_CACHE_DIR
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns, cache_dir)
+    with _images_lock:
+        if key in _images:
+            STATS["memo"] += 1
+            return _images[key]
+
+    with open(path, "rb") as f:
+        text = f.read()
+    sha256 = hashlib.sha256(text).hexdigest()
+    cache_path = os.path.join(cache_dir, f"{sha256}.bin")
+    image = None
+    try:
+        image = HexImage.map(cache_path, sha256)
+        os.utime(cache_path)
+        STATS["mapped"] += 1
+    except (OSError, ValueError):
+        pass
+    if image is None:
+        image = HexImage(parse_hex(text), sha256)
+        STATS["parsed"] += 1
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            image.save(cache_path)
+            _prune(cache_dir)
+        except OSError:
+            # Read-only cache, parse again next time
+            pass
+    with _images_lock:
+        _images[key] = image
+    return image
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse and cache Intel HEX images")
+    parser.add_argument("hexfiles", nargs="+")
+    parser.add_argument("--cache-dir", default=HEX_CACHE_DIR)
+    args = parser.parse_args()
+
+    for hexfile in args.hexfiles:
+        image = load_hex(hexfile, args.cache_dir)
+        print(json.dumps({"file": hexfile, "sha256": image.sha256, "digest": image.digest,
+                          "size": image.size, "segments": image.checksums()}))
+    print(f"{STATS['parsed']} parsed, {STATS['mapped']} from cache", file=sys.stderr)
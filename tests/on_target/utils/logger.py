@@ -3,54 +3,229 @@
 # SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
 ##########################################################################################
 
-import copy
 import os
 import sys
+import atexit
+import queue
+import threading
 import termcolor
 import logging
+import logging.handlers
 import subprocess
-
-import inspect
+import tempfile
+import time
+sys.path.append(os.getcwd())
+from utils.structured_log import StructuredLog, DEFAULT_MAX_BYTES
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
 LOG_FILENAME = os.getenv("LOG_FILENAME", "att_test_log")
 LOG_PREFIX = os.getenv("LOG_PREFIX")
 LOG_PREFIX_COLOR = os.getenv("LOG_PREFIX_COLOR")
 
+# Compression of the JSON-lines outcome log (gzip, zstd or none), disabled if not set
+LOG_JSONL = os.getenv("LOG_JSONL")
+LOG_JSONL_MAX_BYTES = int(os.getenv("LOG_JSONL_MAX_BYTES", DEFAULT_MAX_BYTES))
+
 LOG_DIR = "outcomes"
 
+# All loggers put records on one queue, a single writer thread formats and writes them
+_log_queue = queue.SimpleQueue()
+_writer = None
+_writer_lock = threading.Lock()
+WRITER_THREAD_NAME = "log-writer"
+
 def get_logger(log_level = LOG_LEVEL):
-    caller = inspect.stack()[1]
-    filename = caller.filename
+    # Logger per calling file, without materializing the whole stack
+    filename = sys._getframe(1).f_code.co_filename
 
     # Global Logging Function
     logger = logging.getLogger(filename)
-    formatter = None
 
     if not logger.handlers:
         # Prevent logging from propagating to the root logger
         logger.propagate = 0
-        console = logging.StreamHandler(sys.stdout)
-        console.setLevel(log_level)
-        logger.addHandler(console)
+        logger.addHandler(_QueueHandler(_get_writer(), log_level))
+        logger.setLevel(logging.DEBUG)
+
+    return logger
+
+def log_device_line(name, line, module = "uart"):
+    """
+    Fast path for device output lines, which are the bulk of all log lines.
+
+    No LogRecord is created and the line is written as-is by the writer thread,
+    in the same format as logger.debug(f"{name}: {line}") from module.
+    """
+    _log_queue.put((time.time(), module, name, line))
+
+def log_event(event_type, **fields):
+    """
+    Write a harness event (test start, cloud call, ...) to the JSON-lines outcome log.
+
+    "test_start" and "test_finish" events with a "test" field set the test ID
+    of all records written in between.
+    """
+    if LOG_JSONL:
+        _log_queue.put({"ts": time.time(), "type": event_type, **fields})
+
+def flush_logging(timeout = 10):
+    """ Block until all records queued so far have been written """
+    if _writer:
+        _writer.flush(timeout)
+
+def stop_logging():
+    """ Write remaining records and stop the writer thread """
+    global _writer
+    with _writer_lock:
+        if _writer:
+            _writer.stop()
+            _writer = None
+
+def _get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _LogWriter(_log_queue)
+            _writer.start()
+            atexit.register(stop_logging)
+        return _writer
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Hands records over to the writer thread with minimal work on the calling thread"""
 
+    def __init__(self, writer, console_level):
+        super().__init__(writer.queue)
+        self.console_levelno = logging.getLevelName(console_level) \
+            if isinstance(console_level, str) else console_level
+
+    def prepare(self, record):
+        # The record is owned by this handler only, so it is not copied
+        record.msg = record.getMessage()
+        record.args = None
+        record.console_levelno = self.console_levelno
+        return record
+
+
+class _LogWriter(logging.handlers.QueueListener):
+    """Single background thread writing to console and log file"""
+
+    def __init__(self, log_queue, log_prefix=None, console_stream=None):
+        """
+        :param log_prefix: Path prefix of the debug and outcome logs, default LOG_DIR/LOG_FILENAME
+        :param console_stream: Stream for console output, default stdout
+        """
+        if log_prefix is None and LOG_FILENAME:
+            log_prefix = f"{LOG_DIR}/{LOG_FILENAME}"
+        self.console = logging.StreamHandler(console_stream or sys.stdout)
         formatter = '%(asctime)s:%(module)s:%(levelname)s:%(message)s'
+        self.console.setFormatter(ColoredFormatter(formatter, datefmt='%H:%M:%S'))
+        handlers = [self.console]
 
-        formatter = ColoredFormatter(formatter, datefmt='%H:%M:%S')
-        console.setFormatter(formatter)
+        self.file_handler = None
+        if log_prefix:
+            os.makedirs(os.path.dirname(log_prefix) or ".", exist_ok=True)
+            self.file_handler = logging.FileHandler(f"{log_prefix}_debug.txt")
+            self.file_handler.setLevel(logging.DEBUG)
+            self.file_handler.setFormatter(logging.Formatter(formatter, datefmt='%Y-%m-%d %H:%M:%S'))
+            handlers.append(self.file_handler)
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.structured = None
+        if LOG_JSONL and log_prefix:
+            self.structured = StructuredLog(log_prefix, LOG_JSONL, LOG_JSONL_MAX_BYTES)
+        self.test = None
+        self.console_device_lines = logging.getLevelName(LOG_LEVEL) <= logging.DEBUG
+        self.console_debug = f":{ColoredFormatter.COLORED['DEBUG']}:{ColoredFormatter.PREFIX}"
+        self._second = None
+        self._file_time = ""
+        self._console_time = ""
 
-    if LOG_FILENAME:
-        os.makedirs(LOG_DIR, exist_ok=True)
-        for level in ["debug"]:
-            file_handler = logging.FileHandler(f"{LOG_DIR}/{LOG_FILENAME}_{level}.txt")
-            file_handler.setLevel(level.upper())
-            logger.addHandler(file_handler)
-            formatter = '%(asctime)s:%(module)s:%(levelname)s:%(message)s'
-            file_handler.setFormatter(logging.Formatter(formatter, datefmt='%Y-%m-%d %H:%M:%S'))
+    def handle(self, record):
+        if isinstance(record, tuple):
+            self._write_device_line(*record)
+            return
+        if isinstance(record, dict):
+            self._write_event(record)
+            return
+        if isinstance(record, threading.Event):
+            # flush() marker
+            for handler in self.handlers:
+                try:
+                    handler.flush()
+                except (OSError, ValueError):
+                    pass
+            if self.structured:
+                self.structured.flush()
+            record.set()
+            return
+        if record.levelno >= record.console_levelno:
+            self.console.handle(record)
+        if self.file_handler and record.levelno >= self.file_handler.level:
+            self.file_handler.handle(record)
+        if self.structured:
+            self.structured.write({
+                "ts": record.created,
+                "type": "log",
+                "test": self.test,
+                "level": record.levelname,
+                "module": record.module,
+                "msg": record.msg,
+            })
 
-    logger.setLevel(logging.DEBUG)
+    def _write_event(self, record):
+        if record["type"] == "test_start":
+            self.test = record.get("test")
+        record.setdefault("test", self.test)
+        if self.structured:
+            self.structured.write(record)
+        if record["type"] == "test_finish":
+            self.test = None
 
-    return logger
+    def _write_device_line(self, t, module, name, line):
+        second = int(t)
+        if second != self._second:
+            # Timestamps only have second resolution, format them once per second
+            self._second = second
+            local = time.localtime(t)
+            self._file_time = time.strftime('%Y-%m-%d %H:%M:%S', local)
+            self._console_time = time.strftime('%H:%M:%S', local)
+        try:
+            if self.file_handler:
+                stream = self.file_handler.stream
+                stream.write(f"{self._file_time}:{module}:DEBUG:{name}: {line}\n")
+                if self.queue.empty():
+                    stream.flush()
+            if self.console_device_lines:
+                stream = self.console.stream
+                stream.write(f"{self._console_time}:{module}{self.console_debug}{name}: {line}\n")
+                if self.queue.empty():
+                    stream.flush()
+        except (OSError, ValueError):
+            pass
+        if self.structured:
+            self.structured.write({"ts": t, "type": module, "test": self.test, "name": name, "line": line})
+
+    def start(self):
+        super().start()
+        self._thread.name = WRITER_THREAD_NAME
+
+    def flush(self, timeout):
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait(timeout)
+
+    def stop(self):
+        super().stop()
+        for handler in self.handlers:
+            try:
+                handler.flush()
+            except (OSError, ValueError):
+                # Stream already closed at interpreter exit
+                pass
+        if self.file_handler:
+            self.file_handler.close()
+        if self.structured:
+            self.structured.close()
 
 def debug_explicit(logger, info, message):
     """ Explicitly print local arguments for debug """
@@ -83,14 +258,25 @@ class ColoredFormatter(logging.Formatter):
         'CRITICAL': dict(color='grey', on_color='on_blue'),
     }
 
+    # Colored level names are computed once instead of per record
+    COLORED = {level: termcolor.colored(level, **seq) for level, seq in MAPPING.items()}
+
+    PREFIX = f"\033[43;1m\033[{LOG_PREFIX_COLOR}m{LOG_PREFIX}\033[0m" if LOG_PREFIX else ""
+
     def format(self, record):
         """Add log ansi colors"""
-        crecord = copy.copy(record)
-        seq = self.MAPPING.get(crecord.levelname, self.MAPPING['INFO'])
-        crecord.levelname = termcolor.colored(crecord.levelname, **seq)
-        if LOG_PREFIX:
-            crecord.msg = f"\033[43;1m\033[{LOG_PREFIX_COLOR}m{LOG_PREFIX}\033[0m" + str(crecord.msg)
-        return super().format(crecord)
+        # Record is shared with the file handler, restore it instead of copying
+        levelname, msg = record.levelname, record.msg
+        colored = self.COLORED.get(levelname)
+        if colored is None:
+            colored = termcolor.colored(levelname, **self.MAPPING['INFO'])
+        record.levelname = colored
+        if self.PREFIX:
+            record.msg = self.PREFIX + str(msg)
+        try:
+            return super().format(record)
+        finally:
+            record.levelname, record.msg = levelname, msg
 
 class LogFilter(object):
     """
@@ -109,3 +295,51 @@ class LogFilter(object):
 
     def filter(self, logRecord):
         return logRecord.levelno <= self.__level
+
+def benchmark_logging(n_lines = 100000):
+    """
+    Lines per second sustained by the logging layer, from the calling thread until
+    the writer thread has written everything, for generic and device line logging.
+
+    Runs on its own writer with the log files in a temporary directory and the
+    console discarded, the session logs are left untouched.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="log_benchmark") as tmp, open(os.devnull, "w") as console:
+        writer = _LogWriter(queue.SimpleQueue(), f"{tmp}/benchmark", console)
+        writer.start()
+        logger = logging.getLogger("log_benchmark")
+        logger.propagate = 0
+        logger.handlers = [_QueueHandler(writer, LOG_LEVEL)]
+        logger.setLevel(logging.DEBUG)
+        try:
+            for path in ["logger.debug", "log_device_line"]:
+                writer.flush(600)
+                start = time.perf_counter()
+                for i in range(n_lines):
+                    if path == "logger.debug":
+                        logger.debug(f"benchmark: device line {i}")
+                    else:
+                        # Same as log_device_line(), on the benchmark writer's queue
+                        writer.queue.put((time.time(), "uart", "benchmark", f"device line {i}"))
+                enqueued = time.perf_counter()
+                writer.flush(600)
+                done = time.perf_counter()
+                results[path] = {
+                    "caller_us_per_line": (enqueued - start) / n_lines * 1e6,
+                    "lines_per_second": n_lines / (done - start),
+                }
+        finally:
+            logger.handlers = []
+            writer.stop()
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Benchmark the logging layer")
+    parser.add_argument("-n", "--lines", type=int, default=100000, help="number of lines per run")
+    args = parser.parse_args()
+
+    print(json.dumps(benchmark_logging(args.lines), indent=2), file=sys.stderr)
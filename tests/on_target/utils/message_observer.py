@@ -0,0 +1,264 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Device messages pushed over MQTT, with REST polling as fallback.
+
+With NRFCLOUD_MQTT_BROKER set and paho-mqtt installed, the observer subscribes
+to the account's message topics (nRF Cloud publishes device messages on
+<stage>/<team id>/m/d/<device id>/d2c) and messages arrive in an in-memory
+buffer indexed by device and appId as they are published. Without a broker,
+or while disconnected, wait_for() polls NRFCloud.get_messages() instead:
+
+    with MessageObserver(cloud) as messages:
+        t, message = messages.wait_for(device_id, "sample_message", since=start,
+                                       predicate=lambda m: "Hello" in m.get("data", ""), timeout=180)
+
+The broker is configurable, so a local Mosquitto works for tests:
+
+    NRFCLOUD_MQTT_BROKER=localhost:1883 NRFCLOUD_MQTT_TOPIC='test/+/m/#'
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import threading
+from collections import defaultdict
+from datetime import timezone
+from typing import Callable
+
+try:
+    import paho.mqtt.client as mqtt
+except ImportError:
+    mqtt = None
+from requests.exceptions import RequestException
+sys.path.append(os.getcwd())
+from utils.logger import get_logger, log_event
+
+logger = get_logger()
+
+MQTT_BROKER = os.getenv("NRFCLOUD_MQTT_BROKER")
+MQTT_TOPIC = os.getenv("NRFCLOUD_MQTT_TOPIC", "+/+/m/#")
+MQTT_CLIENT_ID = os.getenv("NRFCLOUD_MQTT_CLIENT_ID", "")
+MQTT_USERNAME = os.getenv("NRFCLOUD_MQTT_USERNAME")
+MQTT_PASSWORD = os.getenv("NRFCLOUD_MQTT_PASSWORD")
+# Account device credentials for TLS, unset for a plain local broker
+MQTT_CA = os.getenv("NRFCLOUD_MQTT_CA")
+MQTT_CERT = os.getenv("NRFCLOUD_MQTT_CERT")
+MQTT_KEY = os.getenv("NRFCLOUD_MQTT_KEY")
+
+POLL_INTERVAL = 5.0
+# REST safety net while pushed messages arrive, e.g. for a topic filter that misses the device
+PUSH_POLL_INTERVAL = 60.0
+# Same message from MQTT and REST within this many seconds is stored once
+DEDUPE_WINDOW = 60.0
+MAX_MESSAGES = 10000
+
+DEVICE_TOPIC_RE = re.compile(r"/m/d/(?P<device_id>[^/]+)/")
+
+
+def _broker_address(broker: str) -> tuple:
+    host, _, port = broker.rpartition(":") if ":" in broker else (broker, "", "")
+    return host, int(port) if port else 1883
+
+
+class MessageBuffer:
+    """ Device messages indexed by device and appId, waitable """
+
+    def __init__(self, max_messages: int = MAX_MESSAGES) -> None:
+        self.max_messages = max_messages
+        # device_id to appId to [(time, message)] in arrival order
+        self._index = defaultdict(lambda: defaultdict(list))
+        self._seen = {}
+        self._count = 0
+        # Incremented for every stored message, see wait()
+        self.seq = 0
+        self._cond = threading.Condition()
+        self.stats = defaultdict(int)
+
+    def add(self, device_id: str, message: dict, t: float = None, source: str = "mqtt") -> bool:
+        """ Store a message, False if it is a duplicate of a recent one """
+        t = time.time() if t is None else t
+        key = (device_id, json.dumps(message, sort_keys=True))
+        with self._cond:
+            seen = self._seen.get(key)
+            if seen is not None and abs(t - seen) < DEDUPE_WINDOW:
+                self.stats["duplicates"] += 1
+                return False
+            self._seen[key] = t
+            self._index[device_id][message.get("appId")].append((t, message))
+            self._count += 1
+            self.seq += 1
+            self.stats[source] += 1
+            if self._count > self.max_messages:
+                self._drop_oldest()
+            self._cond.notify_all()
+        return True
+
+    def _drop_oldest(self) -> None:
+        # Caller holds the condition
+        _, device_id, app_id = min((msgs[0][0], d, a) for d, apps in self._index.items()
+                                   for a, msgs in apps.items() if msgs)
+        self._index[device_id][app_id].pop(0)
+        self._count -= 1
+
+    def get(self, device_id: str = None, app_id: str = None, since: float = 0.0) -> list:
+        """ [(time, message)] newest first, like NRFCloud.get_messages() """
+        with self._cond:
+            devices = [device_id] if device_id is not None else list(self._index)
+            result = []
+            for d in devices:
+                apps = self._index.get(d, {})
+                for a in ([app_id] if app_id is not None else list(apps)):
+                    result += [x for x in apps.get(a, []) if x[0] >= since]
+        return sorted(result, key=lambda x: x[0], reverse=True)
+
+    def wait(self, timeout: float, seq: int = None) -> None:
+        """ Block until a message is added after seq (default now) or the timeout """
+        with self._cond:
+            seq = self.seq if seq is None else seq
+            self._cond.wait_for(lambda: self.seq != seq, timeout)
+
+
+class MessageObserver:
+    def __init__(
+        self,
+        cloud,
+        broker: str = MQTT_BROKER,
+        topic: str = MQTT_TOPIC,
+        poll_interval: float = POLL_INTERVAL,
+        push_poll_interval: float = PUSH_POLL_INTERVAL,
+        buffer: MessageBuffer = None,
+    ) -> None:
+        """
+        :param cloud: NRFCloud, for the REST fallback
+        :param broker: "host[:port]" of the MQTT broker, None for REST polling only
+        :param topic: Topic filter to subscribe to
+        """
+        self.cloud = cloud
+        self.broker = broker
+        self.topic = topic
+        self.poll_interval = poll_interval
+        self.push_poll_interval = push_poll_interval
+        self.buffer = buffer or MessageBuffer()
+        self.connected = threading.Event()
+        self._client = None
+
+    def start(self) -> "MessageObserver":
+        if not self.broker:
+            return self
+        if mqtt is None:
+            logger.warning("paho-mqtt not installed, polling device messages over REST")
+            return self
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=MQTT_CLIENT_ID)
+        if MQTT_USERNAME:
+            client.username_pw_set(MQTT_USERNAME, MQTT_PASSWORD)
+        if MQTT_CA or MQTT_CERT:
+            client.tls_set(ca_certs=MQTT_CA, certfile=MQTT_CERT, keyfile=MQTT_KEY)
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_message = self.on_message
+        host, port = _broker_address(self.broker)
+        client.connect_async(host, port, keepalive=60)
+        client.loop_start()
+        self._client = client
+        return self
+
+    def stop(self) -> None:
+        if self._client is not None:
+            self._client.disconnect()
+            self._client.loop_stop()
+            self._client = None
+        self.connected.clear()
+
+    def __enter__(self) -> "MessageObserver":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @property
+    def push(self) -> bool:
+        """ Messages are being pushed, REST is only polled as a safety net """
+        return self.connected.is_set()
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties) -> None:
+        if reason_code.is_failure:
+            logger.warning(f"MQTT connection to {self.broker} failed: {reason_code}")
+            return
+        client.subscribe(self.topic, qos=1)
+        self.connected.set()
+        logger.info(f"Subscribed to {self.topic} on {self.broker}")
+
+    def _on_disconnect(self, client, userdata, flags, reason_code, properties) -> None:
+        if self.connected.is_set():
+            logger.warning(f"MQTT connection to {self.broker} lost ({reason_code}), polling over REST")
+        self.connected.clear()
+
+    def on_message(self, client, userdata, msg) -> None:
+        m = DEVICE_TOPIC_RE.search(msg.topic)
+        if not m:
+            return
+        try:
+            message = json.loads(msg.payload)
+        except ValueError:
+            logger.debug(f"Non-JSON message on {msg.topic}")
+            return
+        if isinstance(message, dict):
+            self.buffer.add(m.group("device_id"), message, source="mqtt")
+
+    def poll(self, device_id: str, app_id: str = None, since: float = None) -> int:
+        """ Fetch messages over REST into the buffer, returns the number of new ones """
+        since = time.time() - 300 if since is None else since
+        self.buffer.stats["polls"] += 1
+        try:
+            messages = self.cloud.get_messages(device_id, appname=app_id, max_records=100, start=since)
+        except RequestException as e:
+            logger.warning(f"Exception {e} while polling device messages")
+            return 0
+        new = 0
+        # Oldest first, so buffer order matches arrival order
+        for received_at, message in reversed(messages):
+            t = received_at.replace(tzinfo=timezone.utc).timestamp()
+            new += self.buffer.add(device_id, message, t=t, source="rest")
+        return new
+
+    def wait_for(
+        self,
+        device_id: str,
+        app_id: str = None,
+        predicate: Callable[[dict], bool] = None,
+        since: float = None,
+        timeout: float = 180,
+    ):
+        """
+        Wait for a message of the device (and appId) received after since
+
+        :param predicate: Returns True for the message waited for
+        :return: (time, message), None on timeout
+        """
+        start = time.time()
+        since = start if since is None else since
+        deadline = start + timeout
+        next_poll = start
+        while True:
+            # Read before checking, so a message added after the check ends the wait
+            seq = self.buffer.seq
+            for t, message in self.buffer.get(device_id, app_id, since):
+                if predicate is None or predicate(message):
+                    log_event("cloud_message", device_id=device_id, app_id=app_id, push=self.push,
+                              latency=time.time() - since, polls=self.buffer.stats["polls"])
+                    return t, message
+            now = time.time()
+            if now >= deadline:
+                return None
+            if now >= next_poll:
+                # Catch up once when pushed, messages sent before the subscription are only in REST
+                self.poll(device_id, app_id, since)
+                next_poll = time.time() + (self.push_poll_interval if self.push else self.poll_interval)
+                continue
+            self.buffer.wait(min(next_poll, deadline) - now, seq)
@@ -6,15 +6,23 @@
 
 from pyocd.core.helpers import ConnectHelper
 from pyocd.flash.file_programmer import FileProgrammer
+from pyocd.flash.loader import FlashLoader
 from pyocd.core.target import Target
 from pyocd.target.family.target_nRF91 import ModemUpdater
 from pyocd.core.exceptions import TargetError
-from intelhex import IntelHex
-from tempfile import TemporaryDirectory
 import os
+import sys
+import re
+import json
+import time
+import hashlib
+import serial
 from timeit import default_timer as timer
 import argparse
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from hex_cache import load_hex, HexFormatError
+
 import logging
 logging.basicConfig(level=logging.INFO)
 
@@ -31,8 +39,97 @@ options = {
 }
 
 SEGGER = os.getenv('SEGGER')
+MODEM_CACHE_DIR = os.getenv('MODEM_CACHE_DIR', os.path.expanduser("~/.cache/nrf91_flasher"))
+
+FLASH_RANGE = (0x00000000, 0x00100000)
+UICR_RANGE = (0x00FF8000, 0x00FF9000)
+
+# Seconds to wait for the AT+CGMR response
+MODEM_VERSION_TIMEOUT = 2
+
+MODEM_VERSION_RE = re.compile(r"(mfw_nrf91\w*?_\d+\.\d+\.\d+(?:-FOTA-TEST)?)")
+
+def parse_modem_version(text):
+    """
+    Return the last modem FW version found in text, e.g. a "Modem FW:" log line,
+    an AT+CGMR response or a modem zip file name.
+    """
+    versions = MODEM_VERSION_RE.findall(text or "")
+    return versions[-1] if versions else None
+
+def read_modem_version(port, timeout=MODEM_VERSION_TIMEOUT):
+    """
+    Modem FW version reported by the running device with AT+CGMR, None if it doesn't answer.
+
+    Tries the AT client first, then the "at" shell command of the test images.
+    """
+    try:
+        with serial.serial_for_url(port, baudrate=115200, timeout=0.2) as s:
+            s.reset_input_buffer()
+            for cmd in (b"AT+CGMR\r\n", b"at AT+CGMR\r\n"):
+                s.write(cmd)
+                response = b""
+                deadline = time.time() + timeout
+                while time.time() < deadline and b"OK" not in response and b"ERROR" not in response:
+                    response += s.read(256)
+                version = parse_modem_version(response.decode("utf-8", errors="replace"))
+                if version:
+                    logging.info(f"device reports modem FW {version}")
+                    return version
+    except (serial.SerialException, OSError) as e:
+        logging.warning(f"failed to read modem FW version from {port}: {e}")
+    return None
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _modem_cache_path(probe_uid):
+    return os.path.join(MODEM_CACHE_DIR, f"{probe_uid}.json")
+
+def load_modem_cache(probe_uid):
+    try:
+        with open(_modem_cache_path(probe_uid)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_modem_cache(probe_uid, modem_hash=None, modem_version=None):
+    """ Record the modem image known to be on the device behind probe_uid, or clear the entry """
+    path = _modem_cache_path(probe_uid)
+    if not modem_hash:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    os.makedirs(MODEM_CACHE_DIR, exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"modem_zip_sha256": modem_hash, "modem_version": modem_version}, f)
+    os.replace(path + ".tmp", path)
+
+def modem_verify_needed(probe_uid, modem_hash, modem_version=None, force_verify=False):
+    """
+    Decide whether the full (read back and hash) modem verify has to run.
+
+    The verify is skipped only when the modem version reported by the device matches
+    the version recorded for this probe the last time the same modem zip was verified.
+    """
+    if force_verify or not modem_version:
+        return True
+    cache = load_modem_cache(probe_uid)
+    return not (
+        cache.get("modem_zip_sha256") == modem_hash
+        and cache.get("modem_version") == modem_version
+    )
 
-def nrf91_flasher(erase=False, program=None, modem=None, uid=SEGGER):
+def nrf91_flasher(erase=False, program=None, modem=None, uid=SEGGER, modem_version=None, force_verify=False):
+    """
+    :param modem_version: Modem FW version currently reported by the device ("Modem FW:" log
+                          line or AT+CGMR), enables skipping the full modem verify
+    :param force_verify: Always run the full modem verify
+    """
     with ConnectHelper.session_with_chosen_probe(unique_id=uid, options=options, blocking=False) as session:
 
         board = session.board
@@ -47,39 +144,52 @@ def nrf91_flasher(erase=False, program=None, modem=None, uid=SEGGER):
             if program.endswith("hex"):
                 # Load firmware into device.
                 logging.info("flashing program")
-                input = IntelHex(program)
-                flash = input[0x00000000:0x00100000]
-                uicr  = input[0x00FF8000:0x00FF9000]
-                with TemporaryDirectory() as tempdir:
-                    if len(uicr.segments()) > 0:
-                        logging.info("writing UICR")
-                        for start, end in uicr.segments():
-                            target.write_flash(start, uicr[start:end].tobinarray())
-
-                    logging.info("writing flash")
-                    flash_file = os.path.join(tempdir, "flash.hex")
-                    flash.tofile(flash_file, format="hex")
-                    FileProgrammer(session).program(flash_file)
+                image = load_hex(program)
+                logging.info(f"image {image.digest[:12]}: {len(image.segments)} segments, {image.size} bytes")
+                uicr = image.range(*UICR_RANGE)
+                if uicr:
+                    logging.info("writing UICR")
+                    for start, data in uicr:
+                        target.write_flash(start, data.tolist())
+
+                logging.info("writing flash")
+                loader = FlashLoader(session)
+                for start, data in image.range(*FLASH_RANGE):
+                    loader.add_data(start, data.tolist())
+                loader.commit()
             else:
                 logging.info("not a HEX file, flashing without range checks")
                 FileProgrammer(session).program(program)
 
         if modem:
             modem_needs_update = False
+            probe_uid = session.probe.unique_id
+            modem_hash = file_sha256(modem)
 
             # Check modem firmware version
-            try:
-                ModemUpdater(session).verify(modem)
-            except TargetError as e:
-                modem_needs_update = True
+            if modem_verify_needed(probe_uid, modem_hash, modem_version, force_verify):
+                start = timer()
+                try:
+                    ModemUpdater(session).verify(modem)
+                except TargetError as e:
+                    modem_needs_update = True
+                end = timer()
+                logging.info(f"modem verify took {end-start} seconds")
+            else:
+                logging.info(f"modem FW {modem_version} already verified, skipping verify")
 
             # Update modem firmware.
             if modem_needs_update:
                 logging.warning("modem verify failed, updating modem firmware")
+                save_modem_cache(probe_uid)
                 start = timer()
                 ModemUpdater(session).program_and_verify(modem)
                 end = timer()
                 logging.info(f"modem update took {end-start} seconds")
+                # Device reports the version of the new image from now on
+                modem_version = parse_modem_version(os.path.basename(modem))
+
+            save_modem_cache(probe_uid, modem_hash, modem_version or parse_modem_version(os.path.basename(modem)))
         # Reset, run.
         logging.info("resetting device")
         target.reset()
@@ -90,15 +200,25 @@ if __name__ == "__main__":
     parser.add_argument("-p", "--program", help = "program file (hex, elf, bin)")
     parser.add_argument("-m", "--modem", help = "modem update zip file")
     parser.add_argument("-u", "--uid", help = "probe uid")
+    parser.add_argument("--modem-version", help = "modem FW version reported by the device, skips verify if already verified")
+    parser.add_argument("--modem-version-port", help = "serial port to read the modem FW version from the running device with AT+CGMR, like --modem-version")
+    parser.add_argument("--force-verify", help = "always perform full modem verify", action='store_true')
 
     args = parser.parse_args()
 
     if args.erase:
         options["auto_unlock"] = True
 
+    modem_version = args.modem_version
+    if args.modem and not modem_version and args.modem_version_port and not args.force_verify:
+        # Before flashing, while the device still runs its previous image
+        modem_version = read_modem_version(args.modem_version_port)
+
     nrf91_flasher(
         erase=args.erase,
         program=args.program,
         modem=args.modem,
-        uid=args.uid
+        uid=args.uid,
+        modem_version=modem_version,
+        force_verify=args.force_verify
     )
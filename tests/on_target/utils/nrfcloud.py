@@ -10,11 +10,14 @@ import re
 import json
 import time
 import random
+import functools
 import requests
 from enum import Enum
 from typing import Union
 from datetime import datetime, timedelta, timezone
-from utils.logger import get_logger
+from utils.logger import get_logger, log_event
+from utils.fota_job import FotaJobTracker, FotaJobError
+from utils.shadow import DeviceShadow
 from requests.exceptions import HTTPError
 
 logger = get_logger()
@@ -30,9 +33,16 @@ class NRFCloudFOTAError(Exception):
 BASEURL = os.getenv('BASEURL', "nrfcloud.com")
 
 class NRFCloud():
-    def __init__(self, api_key: str, url: str=f"https://api.{BASEURL}/v1", timeout: int=10) -> None:
+    def __init__(
+        self,
+        api_key: str,
+        url: str=f"https://api.{BASEURL}/v1",
+        timeout: int=10,
+        provisioning_url: str=f"https://api.provisioning.{BASEURL}/v1"
+    ) -> None:
         """ Initalizes the class """
         self.url = url
+        self.provisioning_url = provisioning_url
         # Time format used by nrfcloud.com
         self.time_fmt = '%Y-%m-%dT%H:%M:%S.%fZ'
         self.default_headers = {
@@ -43,31 +53,36 @@ class NRFCloud():
         self.session = requests.Session()
         self.session.headers.update(self.default_headers)
         self.timeout = timeout
+        self._shadows = {}
+
+    def _request(self, method: str, path: str, **kwargs):
+        start = time.time()
+        r = self.session.request(method, url=self.url + path, **kwargs, timeout=self.timeout)
+        log_event(
+            "cloud",
+            method=method,
+            path=path,
+            status=r.status_code,
+            duration=time.time() - start,
+            bytes=len(r.content),
+        )
+        r.raise_for_status()
+        return r
 
     def _get(self, path: str, **kwargs) -> dict:
-        r = self.session.get(url=self.url + path, **kwargs, timeout=self.timeout)
-        r.raise_for_status()
-        return r.json()
+        return self._request("GET", path, **kwargs).json()
 
     def _post(self, path: str, **kwargs):
-        r = self.session.post(self.url + path, **kwargs, timeout=self.timeout)
-        r.raise_for_status()
-        return r
+        return self._request("POST", path, **kwargs)
 
     def _put(self, path: str, **kwargs):
-        r = self.session.put(self.url + path, **kwargs, timeout=self.timeout)
-        r.raise_for_status()
-        return r
+        return self._request("PUT", path, **kwargs)
 
     def _delete(self, path: str, **kwargs):
-        r = self.session.delete(self.url + path, **kwargs, timeout=self.timeout)
-        r.raise_for_status()
-        return r
+        return self._request("DELETE", path, **kwargs)
 
     def _patch(self, path: str, **kwargs):
-        r = self.session.patch(self.url + path, **kwargs, timeout=self.timeout)
-        r.raise_for_status()
-        return r
+        return self._request("PATCH", path, **kwargs)
 
     def claim_device(self, attestation_token: str) -> None:
         """
@@ -83,7 +98,7 @@ class NRFCloud():
 
         # Use the provisioning API endpoint for unclaiming
         original_url = self.url
-        self.url = f"https://api.provisioning.{BASEURL}/v1"
+        self.url = self.provisioning_url
         try:
             self._post(path=f"/claimed-devices", data=data)
         finally:
@@ -98,7 +113,7 @@ class NRFCloud():
         """
         # Use the provisioning API endpoint for unclaiming
         original_url = self.url
-        self.url = f"https://api.provisioning.{BASEURL}/v1"
+        self.url = self.provisioning_url
         try:
             response = self._delete(path=f"/claimed-devices/{device_id}")
             return response.status_code
@@ -118,7 +133,7 @@ class NRFCloud():
 
         # Use the provisioning API endpoint for unclaiming
         original_url = self.url
-        self.url = f"https://api.provisioning.{BASEURL}/v1"
+        self.url = self.provisioning_url
         try:
             self._post(path=f"/claimed-devices/{device_id}/provisioning", data=data)
         finally:
@@ -136,6 +151,17 @@ class NRFCloud():
         """
         return self.get_devices(path=f"/{device_id}", params=params)
 
+    def shadow(self, device_id: str) -> DeviceShadow:
+        """
+        Cached shadow of a device, fetched conditionally (see shadow.py)
+
+        :param device_id: Device ID
+        :return: DeviceShadow, the same one for every call with device_id
+        """
+        if device_id not in self._shadows:
+            self._shadows[device_id] = DeviceShadow(self, device_id)
+        return self._shadows[device_id]
+
     def get_messages(self, device: str=None, appname: str=None, max_records: int=50, start: float=time.time()-300) -> list:
         """
         Get device messages.
@@ -406,17 +432,26 @@ class NRFCloudFOTA(NRFCloud):
         logger.info(f"Deleled bundle ID: {bundle_id}")
         return True
 
-    def create_fota_job(self, device_id: str, bundle_id: str) -> str:
+    def create_fota_job(self, device_id: Union[str, list], bundle_id: str) -> str:
         """
         Start a FOTA update process
 
-        :param device_id: Name as shown in nrfCloud UI
+        :param device_id: Name as shown in nrfCloud UI, or a list of them for a multi-device job
         :param bundle_id: Path to binary firmware image
         :return: nRFCloud jobId parameter"
         """
-        data = json.dumps({"deviceIds": [device_id], "bundleId": bundle_id})
+        device_ids = [device_id] if isinstance(device_id, str) else list(device_id)
+        data = json.dumps({"deviceIds": device_ids, "bundleId": bundle_id})
         return self._post("/fota-jobs", data=data).json()["jobId"]
 
+    def get_fota_execution(self, device_id: str, job_id: str) -> dict:
+        """
+        Get the execution of a FOTA job on one device
+
+        :return: Execution with "status" and "lastUpdatedAt"
+        """
+        return self._get(f"/fota-job-executions/{device_id}/{job_id}")
+
     def get_fota_status(self, job_id: str) -> str:
         """Get status of a FOTA job
 
@@ -426,13 +461,14 @@ class NRFCloudFOTA(NRFCloud):
         return self._get(f"/fota-jobs/{job_id}")["status"]
 
 
-    def post_fota_job(self, uuid: str, fw_id: str) -> Union[str, None]:
+    def post_fota_job(self, uuid: str, fw_id: str, uart=None, timeout: float = 50) -> Union[str, None]:
         """
         Posts a new FOTA job for the devices specified in the list 'uuids'
 
         If the job is successfully posted, i.e., a 200 status code is returned,
-        then the validity of the job is checked by probing nRF Cloud a number of
-        times in sleep intervals. Repeat 3 times until the job is IN_PROGRESS.
+        then the job is tracked until it is IN_PROGRESS, from its status in
+        nRF Cloud and, if uart is given, from the device log, whichever is first.
+        Repeat 3 times until the job is IN_PROGRESS.
 
         Returns the FOTA job id if the job was successfully posted, otherwise
         'None'.
@@ -447,19 +483,16 @@ class NRFCloudFOTA(NRFCloud):
                 pass # Do nothing if the above API call failed
             finally:
                 logger.info(f"Job {job_id} is applied")
-            status = "NONE"
-            for _ in range(10):
-                time.sleep(5)
-                try:
-                    status = self.get_fota_status(job_id)
-                except HTTPError:
-                    continue
-                logger.info(f"FOTA job status: {status}")
-                if status == "IN_PROGRESS":
-                    return job_id
-            logger.warning("Timed out while waiting for job status 'IN_PROGRESS'")
+            tracker = FotaJobTracker(functools.partial(self.get_fota_status, job_id), uart=uart, job_id=job_id)
+            try:
+                tracker.wait_for("IN_PROGRESS", timeout)
+                return job_id
+            except FotaJobError as e:
+                logger.warning(f"{e}")
+            finally:
+                tracker.finish()
             logger.info("Cancel job, delete and retry")
-            if status != "CANCELLED":
+            if tracker.cloud_status != "CANCELLED":
                 self.cancel_fota_job(job_id)
             self.delete_fota_job(job_id)
         return None
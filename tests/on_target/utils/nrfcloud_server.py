@@ -0,0 +1,647 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Local stand-in for the nRF Cloud REST API used by NRFCloud and NRFCloudFOTA.
+
+Three modes are supported:
+    stub   - in-memory devices, messages, locations, firmwares and FOTA jobs,
+             with ETags and 304 responses to If-None-Match
+    record - proxy to the real service and capture responses in a cassette file
+    replay - serve responses from a cassette file
+
+In all modes, responses can be delayed (latency), list responses re-paginated
+(page_limit) and every n-th request throttled with a 429 (rate_limit_every).
+
+    with NRFCloudServer() as server:
+        cloud = NRFCloud(api_key="x", url=server.url, provisioning_url=server.url)
+"""
+
+import os
+import sys
+import re
+import io
+import json
+import time
+import uuid
+import random
+import hashlib
+import zipfile
+import argparse
+import threading
+import requests
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+sys.path.append(os.getcwd())
+from utils.logger import get_logger
+
+logger = get_logger()
+
+BASEURL = os.getenv('BASEURL', "nrfcloud.com")
+
+TIME_FMT = '%Y-%m-%dT%H:%M:%S.%fZ'
+TENANT_ID = "00000000-0000-0000-0000-000000000000"
+
+# Query parameters that change between otherwise identical requests
+VOLATILE_PARAMS = ("start", "end", "pageLimit", "pageNextToken")
+
+FOTA_TERMINAL_STATES = ["SUCCEEDED", "FAILED", "TIMED_OUT", "CANCELLED", "REJECTED"]
+FW_TYPE_PREFIX = {"application": "APP", "modem": "MODEM", "mcuboot": "BOOT", "bootloader": "BOOT"}
+
+
+class Response:
+    def __init__(self, status: int = 200, body=None, headers: dict = None) -> None:
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    def encode(self) -> bytes:
+        if self.body is None:
+            return b""
+        if isinstance(self.body, bytes):
+            return self.body
+        if isinstance(self.body, str):
+            return self.body.encode("utf-8")
+        return json.dumps(self.body).encode("utf-8")
+
+
+def _timestamp(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).strftime(TIME_FMT)
+
+def _parse_time(value: str) -> float:
+    return datetime.strptime(value, TIME_FMT).replace(tzinfo=timezone.utc).timestamp()
+
+def _merge_state(target: dict, update: dict) -> None:
+    for key, value in update.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge_state(target[key], value)
+        else:
+            target[key] = value
+
+
+class StubBackend:
+    """ In-memory model of the parts of nRF Cloud the tests use """
+
+    def __init__(self, fota_step: float = None, etags: bool = True) -> None:
+        # Seconds between automatic FOTA execution state changes, None to only change on PATCH
+        self.fota_step = fota_step
+        # ETag on GET responses and 304 for a matching If-None-Match
+        self.etags = etags
+        # Devices whose executions end in FAILED instead of SUCCEEDED
+        self.fota_failures = set()
+        self.devices = {}
+        self.messages = []
+        self.locations = []
+        self.firmwares = {}
+        self.jobs = {}
+        self.claimed = {}
+        self.lock = threading.RLock()
+        self.routes = [
+            ("GET", r"/devices", self.list_devices),
+            ("GET", r"/devices/(?P<device_id>[^/]+)", self.get_device),
+            ("PATCH", r"/devices/(?P<device_id>[^/]+)/state", self.patch_state),
+            ("GET", r"/messages", self.list_messages),
+            ("GET", r"/location/history", self.list_locations),
+            ("GET", r"/firmwares", self.list_firmwares),
+            ("POST", r"/firmwares", self.upload_firmware),
+            ("DELETE", r"/firmwares/(?P<bundle_id>[^/]+)", self.delete_firmware),
+            ("GET", r"/fota-jobs", self.list_jobs),
+            ("POST", r"/fota-jobs", self.create_job),
+            ("GET", r"/fota-jobs/(?P<job_id>[^/]+)", self.get_job),
+            ("DELETE", r"/fota-jobs/(?P<job_id>[^/]+)", self.delete_job),
+            ("PUT", r"/fota-jobs/(?P<job_id>[^/]+)/cancel", self.cancel_job),
+            ("POST", r"/fota-jobs/(?P<job_id>[^/]+)/apply", self.apply_job),
+            ("GET", r"/fota-job-executions/(?P<device_id>[^/]+)/(?P<job_id>[^/]+)", self.get_execution),
+            ("PATCH", r"/fota-job-executions/(?P<device_id>[^/]+)/(?P<job_id>[^/]+)", self.patch_execution),
+            ("POST", r"/claimed-devices", self.claim_device),
+            ("DELETE", r"/claimed-devices/(?P<device_id>[^/]+)", self.unclaim_device),
+            ("POST", r"/claimed-devices/(?P<device_id>[^/]+)/provisioning", self.add_provisioning_command),
+        ]
+        self.routes = [(m, re.compile(p + "$"), f) for m, p, f in self.routes]
+
+    def handle(self, method: str, path: str, query: dict, body: bytes, headers: dict) -> Response:
+        for route_method, pattern, func in self.routes:
+            m = pattern.match(path)
+            if m and route_method == method:
+                with self.lock:
+                    response = func(query=query, body=body, **m.groupdict())
+                # List responses are re-paginated later, only documents get an ETag
+                if method == "GET" and response.status == 200 and self.etags and \
+                        not (isinstance(response.body, dict) and "items" in response.body):
+                    return self._conditional(response, headers)
+                return response
+        return Response(404, {"message": f"No route for {method} {path}"})
+
+    def _conditional(self, response: Response, headers: dict) -> Response:
+        etag = '"' + hashlib.sha1(response.encode()).hexdigest()[:16] + '"'
+        if_none_match = {k.lower(): v for k, v in headers.items()}.get("if-none-match")
+        if if_none_match and etag in [x.strip() for x in if_none_match.split(",")]:
+            return Response(304, None, {"ETag": etag})
+        return Response(200, response.body, {**response.headers, "ETag": etag})
+
+    # Seeding helpers
+
+    def add_device(self, device_id: str, reported: dict = None, desired: dict = None) -> dict:
+        with self.lock:
+            self.devices[device_id] = {
+                "id": device_id,
+                "name": device_id,
+                "type": "Generic",
+                "state": {"reported": reported or {}, "desired": desired or {}, "version": 1},
+            }
+            return self.devices[device_id]
+
+    def add_message(self, device_id: str, message: dict, app_id: str = None, received_at: float = None) -> None:
+        received_at = time.time() if received_at is None else received_at
+        with self.lock:
+            self.messages.append({
+                "deviceId": device_id,
+                "appId": app_id or message.get("appId"),
+                "receivedAt": _timestamp(received_at),
+                "message": message,
+                "_t": received_at,
+            })
+
+    def add_location(self, device_id: str, location: dict, inserted_at: float = None) -> None:
+        inserted_at = time.time() if inserted_at is None else inserted_at
+        with self.lock:
+            self.locations.append({
+                "deviceId": device_id,
+                "insertedAt": _timestamp(inserted_at),
+                **location,
+                "_t": inserted_at,
+            })
+
+    # Devices
+
+    def list_devices(self, query, body):
+        return Response(200, {"items": list(self.devices.values()), "total": len(self.devices)})
+
+    def get_device(self, query, body, device_id):
+        if device_id not in self.devices:
+            return Response(404, {"message": f"Device {device_id} not found"})
+        return Response(200, self.devices[device_id])
+
+    def patch_state(self, query, body, device_id):
+        if device_id not in self.devices:
+            return Response(404, {"message": f"Device {device_id} not found"})
+        state = self.devices[device_id]["state"]
+        update = json.loads(body or b"{}")
+        for section in ["desired", "reported"]:
+            if section in update:
+                _merge_state(state.setdefault(section, {}), update[section] or {})
+        state["version"] += 1
+        return Response(202)
+
+    # Messages and locations
+
+    def _filter_by_time(self, items, query, device_key="deviceId"):
+        start = _parse_time(query["start"]) if "start" in query else 0
+        end = _parse_time(query["end"]) if "end" in query else float("inf")
+        result = [x for x in items if start <= x["_t"] <= end]
+        if "deviceId" in query:
+            result = [x for x in result if x[device_key] == query["deviceId"]]
+        result.sort(key=lambda x: x["_t"], reverse=query.get("pageSort", "desc") == "desc")
+        return [{k: v for k, v in x.items() if k != "_t"} for x in result]
+
+    def list_messages(self, query, body):
+        items = self._filter_by_time(self.messages, query)
+        if "appId" in query:
+            items = [x for x in items if x["appId"] == query["appId"]]
+        return Response(200, {"items": items, "total": len(items)})
+
+    def list_locations(self, query, body):
+        items = self._filter_by_time(self.locations, query)
+        return Response(200, {"items": items, "total": len(items)})
+
+    # Firmwares
+
+    def list_firmwares(self, query, body):
+        items = list(self.firmwares.values())
+        if query.get("modemOnly") == "true":
+            items = [x for x in items if x["type"] == "MODEM"]
+        return Response(200, {"items": items, "total": len(items)})
+
+    def add_firmware(self, name: str, fw_type: str = "modem", version: str = "") -> str:
+        prefix = FW_TYPE_PREFIX.get(fw_type, "APP")
+        bundle_id = f"{prefix}*{uuid.uuid4().hex[:8]}*{version or name}"
+        with self.lock:
+            self.firmwares[bundle_id] = {
+                "bundleId": bundle_id,
+                "name": name,
+                "version": version,
+                "type": prefix,
+                "lastModified": _timestamp(time.time()),
+            }
+        return bundle_id
+
+    def upload_firmware(self, query, body):
+        try:
+            with zipfile.ZipFile(io.BytesIO(body)) as z:
+                manifest = json.loads(z.read("manifest.json"))
+        except (zipfile.BadZipFile, KeyError, ValueError) as e:
+            return Response(400, {"message": f"Invalid firmware zip: {e}"})
+        fw_type = manifest["files"][0].get("type", "application")
+        bundle_id = self.add_firmware(manifest.get("name", ""), fw_type, manifest.get("fwversion", ""))
+        uris = [f"https://firmware.{BASEURL}/{TENANT_ID}/{bundle_id}/{f['file']}" for f in manifest["files"]]
+        return Response(200, {"bundleId": bundle_id, "uris": uris})
+
+    def delete_firmware(self, query, body, bundle_id):
+        if self.firmwares.pop(bundle_id, None) is None:
+            return Response(404, {"message": f"Bundle {bundle_id} not found"})
+        return Response(204)
+
+    # FOTA
+
+    def _advance(self, job: dict) -> None:
+        """ Move executions forward by one state per fota_step seconds """
+        if self.fota_step is None or job["status"] == "CANCELLED":
+            return
+        now = time.time()
+        for execution in job["executions"].values():
+            if execution["status"] in FOTA_TERMINAL_STATES:
+                continue
+            steps = int((now - execution["_changed"]) / self.fota_step) if self.fota_step else 2
+            for _ in range(steps):
+                final = "FAILED" if execution["deviceId"] in self.fota_failures else "SUCCEEDED"
+                next_status = {"QUEUED": "IN_PROGRESS", "IN_PROGRESS": final}.get(execution["status"])
+                if next_status is None:
+                    break
+                self._set_execution(execution, next_status, execution["_changed"] + self.fota_step)
+
+    def _set_execution(self, execution: dict, status: str, changed: float = None) -> None:
+        execution["status"] = status
+        execution["_changed"] = time.time() if changed is None else changed
+        execution["lastUpdatedAt"] = _timestamp(execution["_changed"])
+
+    def _job_view(self, job: dict) -> dict:
+        self._advance(job)
+        statuses = [x["status"] for x in job["executions"].values()]
+        if job["status"] != "CANCELLED":
+            if statuses and all(x in FOTA_TERMINAL_STATES for x in statuses):
+                job["status"] = "COMPLETED"
+            elif any(x != "QUEUED" for x in statuses):
+                job["status"] = "IN_PROGRESS"
+        return {k: v for k, v in job.items() if k != "executions"}
+
+    def _execution_view(self, execution: dict) -> dict:
+        return {k: v for k, v in execution.items() if not k.startswith("_")}
+
+    def list_jobs(self, query, body):
+        items = [self._job_view(x) for x in self.jobs.values()]
+        return Response(200, {"items": items, "total": len(items)})
+
+    def create_job(self, query, body):
+        data = json.loads(body or b"{}")
+        device_ids = data.get("deviceIds", [])
+        if not device_ids or "bundleId" not in data:
+            return Response(400, {"message": "deviceIds and bundleId are required"})
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        job = {
+            "jobId": job_id,
+            "bundleId": data["bundleId"],
+            "status": "QUEUED",
+            "createdAt": _timestamp(now),
+            "target": {"deviceIds": device_ids, "tags": []},
+            "executions": {},
+        }
+        for device_id in device_ids:
+            job["executions"][device_id] = {"jobId": job_id, "deviceId": device_id}
+            self._set_execution(job["executions"][device_id], "QUEUED", now)
+        self.jobs[job_id] = job
+        return Response(200, {"jobId": job_id})
+
+    def get_job(self, query, body, job_id):
+        if job_id not in self.jobs:
+            return Response(404, {"message": f"Job {job_id} not found"})
+        return Response(200, self._job_view(self.jobs[job_id]))
+
+    def delete_job(self, query, body, job_id):
+        if self.jobs.pop(job_id, None) is None:
+            return Response(404, {"message": f"Job {job_id} not found"})
+        return Response(204)
+
+    def cancel_job(self, query, body, job_id):
+        if job_id not in self.jobs:
+            return Response(404, {"message": f"Job {job_id} not found"})
+        job = self.jobs[job_id]
+        self._job_view(job)
+        job["status"] = "CANCELLED"
+        for execution in job["executions"].values():
+            if execution["status"] not in FOTA_TERMINAL_STATES:
+                self._set_execution(execution, "CANCELLED")
+        return Response(200)
+
+    def apply_job(self, query, body, job_id):
+        if job_id not in self.jobs:
+            return Response(404, {"message": f"Job {job_id} not found"})
+        return Response(200)
+
+    def get_execution(self, query, body, device_id, job_id):
+        job = self.jobs.get(job_id)
+        if not job or device_id not in job["executions"]:
+            return Response(404, {"message": f"Execution {device_id}/{job_id} not found"})
+        self._advance(job)
+        return Response(200, self._execution_view(job["executions"][device_id]))
+
+    def patch_execution(self, query, body, device_id, job_id):
+        job = self.jobs.get(job_id)
+        if not job or device_id not in job["executions"]:
+            return Response(404, {"message": f"Execution {device_id}/{job_id} not found"})
+        self._set_execution(job["executions"][device_id], json.loads(body)["status"])
+        return Response(200)
+
+    # Provisioning
+
+    def claim_device(self, query, body):
+        data = json.loads(body or b"{}")
+        if "claimToken" not in data:
+            return Response(400, {"message": "claimToken is required"})
+        device_id = str(uuid.uuid4())
+        self.claimed[device_id] = {"id": device_id, "claimToken": data["claimToken"],
+                                   "tags": data.get("tags", []), "commands": []}
+        return Response(201, {"id": device_id})
+
+    def unclaim_device(self, query, body, device_id):
+        if self.claimed.pop(device_id, None) is None:
+            return Response(404, {"message": f"Device {device_id} not claimed"})
+        return Response(204)
+
+    def add_provisioning_command(self, query, body, device_id):
+        if device_id not in self.claimed:
+            return Response(404, {"message": f"Device {device_id} not claimed"})
+        self.claimed[device_id]["commands"].append(json.loads(body or b"{}"))
+        return Response(201, {"id": str(uuid.uuid4())})
+
+
+class RecordBackend:
+    """ Forwards requests to the real service and captures the responses """
+
+    def __init__(self, url: str = f"https://api.{BASEURL}/v1",
+                 provisioning_url: str = f"https://api.provisioning.{BASEURL}/v1", timeout: int = 30) -> None:
+        self.url = url
+        self.provisioning_url = provisioning_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.interactions = []
+        self.lock = threading.Lock()
+
+    def _forward(self, method, path, query, body, headers):
+        base = self.provisioning_url if path.startswith("/claimed-devices") else self.url
+        forward_headers = {k: v for k, v in headers.items()
+                           if k.lower() in ["authorization", "accept", "content-type", "if-none-match"]}
+        return self.session.request(method, base + path, params=query, data=body or None,
+                                    headers=forward_headers, timeout=self.timeout)
+
+    def handle(self, method: str, path: str, query: dict, body: bytes, headers: dict) -> Response:
+        r = self._forward(method, path, query, body, headers)
+        content = r.content
+        # Follow upstream pagination so replay can re-paginate the complete list
+        if method == "GET" and r.ok and "json" in r.headers.get("Content-Type", ""):
+            data = r.json()
+            if isinstance(data, dict) and isinstance(data.get("items"), list):
+                while data.get("pageNextToken"):
+                    page = self._forward(method, path, {**query, "pageNextToken": data["pageNextToken"]}, body, headers)
+                    page.raise_for_status()
+                    page = page.json()
+                    data["items"] += page["items"]
+                    data["pageNextToken"] = page.get("pageNextToken")
+                data.pop("pageNextToken", None)
+                content = json.dumps(data).encode("utf-8")
+        response = Response(r.status_code, content,
+                            {k: v for k, v in r.headers.items() if k.lower() in ["content-type", "etag"]})
+        with self.lock:
+            self.interactions.append({
+                "method": method,
+                "path": path,
+                "query": {k: v for k, v in query.items() if k not in VOLATILE_PARAMS},
+                "status": r.status_code,
+                "headers": response.headers,
+                "body": content.decode("utf-8", errors="replace"),
+            })
+        return response
+
+    def save(self, cassette: str) -> None:
+        with open(cassette, "w") as f:
+            json.dump({"interactions": self.interactions}, f, indent=1)
+        logger.info(f"Recorded {len(self.interactions)} interactions to {cassette}")
+
+
+class ReplayBackend:
+    """ Serves recorded responses, repeating the last one when a request is made more often """
+
+    def __init__(self, cassette: str) -> None:
+        with open(cassette) as f:
+            interactions = json.load(f)["interactions"]
+        self.recorded = {}
+        for x in interactions:
+            self.recorded.setdefault(self._key(x["method"], x["path"], x["query"]), []).append(x)
+        self.served = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _key(method, path, query):
+        query = {k: v for k, v in query.items() if k not in VOLATILE_PARAMS}
+        return (method, path, tuple(sorted(query.items())))
+
+    def handle(self, method: str, path: str, query: dict, body: bytes, headers: dict) -> Response:
+        key = self._key(method, path, query)
+        with self.lock:
+            recorded = self.recorded.get(key)
+            if not recorded:
+                return Response(404, {"message": f"No recorded response for {method} {path}"})
+            index = min(self.served.get(key, 0), len(recorded) - 1)
+            self.served[key] = index + 1
+        x = recorded[index]
+        return Response(x["status"], x["body"], x["headers"])
+
+
+class NRFCloudServer:
+    def __init__(
+        self,
+        mode: str = "stub",
+        cassette: str = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        page_limit: int = None,
+        rate_limit_every: int = 0,
+        retry_after: int = 1,
+        fota_step: float = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """
+        :param mode: stub, record or replay
+        :param cassette: File to record to / replay from
+        :param latency: Seconds added to every response
+        :param jitter: Random extra latency, uniform in [0, jitter] seconds
+        :param page_limit: Maximum number of items in list responses
+        :param rate_limit_every: Answer every n-th request with 429, 0 to disable
+        :param retry_after: Retry-After header value for 429 responses
+        :param fota_step: Seconds between automatic FOTA execution state changes (stub mode)
+        """
+        if mode == "stub":
+            self.backend = StubBackend(fota_step=fota_step)
+        elif mode == "record":
+            self.backend = RecordBackend()
+        elif mode == "replay":
+            if not cassette:
+                raise ValueError("Replay mode requires a cassette")
+            self.backend = ReplayBackend(cassette)
+        else:
+            raise ValueError(f"Unknown mode '{mode}'")
+        self.mode = mode
+        self.cassette = cassette
+        self.latency = latency
+        self.jitter = jitter
+        self.page_limit = page_limit
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.stats = {"requests": 0, "throttled": 0, "bytes_sent": 0, "paths": {}}
+        self._stats_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._t = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "NRFCloudServer":
+        self._t = threading.Thread(target=self._httpd.serve_forever, kwargs={"poll_interval": 0.1}, daemon=True)
+        self._t.start()
+        logger.info(f"nRF Cloud stand-in ({self.mode}) listening on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._t:
+            self._t.join()
+        if self.mode == "record" and self.cassette:
+            self.backend.save(self.cassette)
+
+    def __enter__(self) -> "NRFCloudServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def __getattr__(self, name):
+        # Seeding helpers of the stub backend, e.g. server.add_device()
+        if name.startswith("add_") and isinstance(self.__dict__.get("backend"), StubBackend):
+            return getattr(self.backend, name)
+        raise AttributeError(name)
+
+    def _paginate(self, response: Response, query: dict) -> Response:
+        if not isinstance(response.body, (dict, str, bytes)) or response.status != 200:
+            return response
+        body = response.body
+        if not isinstance(body, dict):
+            try:
+                body = json.loads(body)
+            except ValueError:
+                return response
+        if not isinstance(body, dict) or not isinstance(body.get("items"), list):
+            return response
+        limits = [int(x) for x in [query.get("pageLimit"), self.page_limit] if x]
+        offset = int(query.get("pageNextToken", 0) or 0)
+        items = body["items"]
+        end = offset + min(limits) if limits else len(items)
+        page = {**body, "items": items[offset:end], "total": len(items)}
+        page.pop("pageNextToken", None)
+        if end < len(items):
+            page["pageNextToken"] = str(end)
+        return Response(response.status, page, {**response.headers, "Content-Type": "application/json"})
+
+    def _throttle(self) -> bool:
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            throttle = self.rate_limit_every and self.stats["requests"] % self.rate_limit_every == 0
+            if throttle:
+                self.stats["throttled"] += 1
+            return throttle
+
+    def _handle(self, method: str, path: str, query: dict, body: bytes, headers: dict) -> Response:
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+        path = path[len("/v1"):] if path.startswith("/v1") else path
+        with self._stats_lock:
+            self.stats["paths"][path] = self.stats["paths"].get(path, 0) + 1
+        if self._throttle():
+            return Response(429, {"message": "Too Many Requests"}, {"Retry-After": str(self.retry_after)})
+        try:
+            response = self.backend.handle(method, path, query, body, headers)
+        except Exception as e:
+            logger.error(f"nRF Cloud stand-in failed on {method} {path}: {e}")
+            return Response(500, {"message": str(e)})
+        return self._paginate(response, query)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                url = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length) if length else b""
+                response = server._handle(self.command, url.path, dict(parse_qsl(url.query)),
+                                          body, dict(self.headers))
+                data = response.encode()
+                self.send_response(response.status)
+                headers = {"Content-Type": "application/json", **response.headers}
+                for key, value in headers.items():
+                    if key.lower() not in ["content-length", "transfer-encoding", "connection"]:
+                        self.send_header(key, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                with server._stats_lock:
+                    server.stats["bytes_sent"] += len(data)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _serve
+
+            def log_message(self, format, *args):
+                logger.debug(f"nRF Cloud stand-in: {format % args}")
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local nRF Cloud REST stand-in")
+    parser.add_argument("--mode", choices=["stub", "record", "replay"], default="stub")
+    parser.add_argument("--cassette", help="cassette file to record to or replay from")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency in seconds")
+    parser.add_argument("--page-limit", type=int, help="maximum items per list response")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="answer every n-th request with 429")
+    parser.add_argument("--fota-step", type=float, help="seconds between FOTA execution state changes")
+    args = parser.parse_args()
+
+    server = NRFCloudServer(
+        mode=args.mode,
+        cassette=args.cassette,
+        latency=args.latency,
+        jitter=args.jitter,
+        page_limit=args.page_limit,
+        rate_limit_every=args.rate_limit_every,
+        fota_step=args.fota_step,
+        port=args.port,
+    ).start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
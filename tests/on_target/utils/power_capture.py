@@ -0,0 +1,341 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Power capture with a Nordic Power Profiler Kit II, aligned with UART lines and
+test phases.
+
+Samples (100 kHz, in uA) are read in a separate process and decimated on the fly
+into windows of min/max/mean current, which are passed to the test process
+through a shared memory ring buffer:
+
+    with PowerCapture(PPK2Source(voltage_mv=3700)) as power:
+        power.attach_uart(dut_board.uart)
+        with power.phase("flash"):
+            flash_device(hexfile)
+        dut_board.uart.wait_for_str("Connected to LTE")
+    power.save("outcomes/power_test_coap_device_message")
+
+Phases are also marked from UART lines matching PHASE_PATTERNS and logged as
+"phase" events to the JSON-lines outcome log. SimulatedSource stands in for the
+PPK2 in unit tests and on runners without one.
+"""
+
+import os
+import re
+import sys
+import time
+import threading
+import contextlib
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Callable
+
+import numpy as np
+sys.path.append(os.getcwd())
+from utils.logger import get_logger, log_event
+
+logger = get_logger()
+
+PPK2_SAMPLE_RATE = 100000
+# Samples per decimated window, 1 ms at 100 kHz
+DEFAULT_WINDOW = 100
+# Windows in the ring buffer, drained every DRAIN_INTERVAL seconds
+DEFAULT_CAPACITY = 1 << 20
+DRAIN_INTERVAL = 0.05
+# Row layout of the ring buffer and of the decimated output
+COLUMNS = ["time", "min", "max", "mean"]
+
+# (phase, UART pattern), the phase is marked done when the line is received
+PHASE_PATTERNS = [
+    ("attach", r"Connected to LTE"),
+    ("cloud_connect", r"nrf_cloud_coap_transport: Authorized|Connection to nRF Cloud ready|nrf_cloud.*[Cc]onnected"),
+    ("send", r"Sent Hello World message"),
+]
+
+
+class SimulatedSource:
+    """ Sample source for tests, generates current at the real sample rate """
+
+    def __init__(self, rate: int = PPK2_SAMPLE_RATE, current: Callable = None, seed: int = 0) -> None:
+        """
+        :param current: Function of a time array (seconds since open) returning uA,
+                        default is a 5 uA floor with 2 ms 50 mA peaks every second
+        """
+        self.rate = rate
+        self.current = current or self.default_current
+        self.seed = seed
+
+    @staticmethod
+    def default_current(t: np.ndarray) -> np.ndarray:
+        return np.where((t % 1.0) < 0.002, 50000.0, 5.0)
+
+    def open(self) -> None:
+        self._rng = np.random.default_rng(self.seed)
+        self._start = time.monotonic()
+        self._n = 0
+
+    def read(self) -> np.ndarray:
+        n = int((time.monotonic() - self._start) * self.rate) - self._n
+        if n <= 0:
+            return np.empty(0)
+        t = (self._n + np.arange(n)) / self.rate
+        self._n += n
+        return self.current(t) + self._rng.normal(0, 0.5, n)
+
+    def close(self) -> None:
+        pass
+
+
+class PPK2Source:
+    """ PPK2 in source meter (supplies the DUT) or ampere meter mode """
+
+    rate = PPK2_SAMPLE_RATE
+
+    def __init__(self, port: str = None, voltage_mv: int = 3700, source_meter: bool = True) -> None:
+        self.port = port
+        self.voltage_mv = voltage_mv
+        self.source_meter = source_meter
+
+    def open(self) -> None:
+        from ppk2_api.ppk2_api import PPK2_API
+
+        port = self.port
+        if not port:
+            devices = PPK2_API.list_devices()
+            if not devices:
+                raise RuntimeError("No PPK2 found")
+            port = devices[0][0] if isinstance(devices[0], (list, tuple)) else devices[0]
+        self.ppk2 = PPK2_API(port, timeout=1, write_timeout=1, exclusive=True)
+        self.ppk2.get_modifiers()
+        self.ppk2.set_source_voltage(self.voltage_mv)
+        if self.source_meter:
+            self.ppk2.use_source_meter()
+            self.ppk2.toggle_DUT_power("ON")
+        else:
+            self.ppk2.use_ampere_meter()
+        self.ppk2.start_measuring()
+
+    def read(self) -> np.ndarray:
+        data = self.ppk2.get_data()
+        if not data:
+            return np.empty(0)
+        samples, _ = self.ppk2.get_samples(data)
+        return np.asarray(samples, dtype=np.float64)
+
+    def close(self) -> None:
+        self.ppk2.stop_measuring()
+
+
+def decimate(samples: np.ndarray, window: int) -> tuple:
+    """ min, max and mean of every full window, and the samples left over """
+    n = len(samples) // window * window
+    blocks = samples[:n].reshape(-1, window)
+    return blocks.min(axis=1), blocks.max(axis=1), blocks.mean(axis=1), samples[n:]
+
+def _capture_main(source, shm_name: str, capacity: int, window: int, written, stop, ready, error) -> None:
+    # Runs in the capture process, writes decimated windows into the ring buffer
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray((capacity, len(COLUMNS)), dtype=np.float64, buffer=shm.buf)
+    try:
+        source.open()
+    except Exception as e:
+        error.value = str(e).encode()[:255]
+        ready.set()
+        shm.close()
+        return
+    pending = np.empty(0)
+    # Time of the first pending sample, no window starts before the capture is ready
+    pending_t = time.time()
+    ready.set()
+    period = 1.0 / source.rate
+    try:
+        while not stop.is_set():
+            samples = source.read()
+            if not len(samples):
+                time.sleep(0.001)
+                continue
+            now = time.time()
+            if not len(pending):
+                # Samples of this read end now, but never before the previous window
+                pending_t = max(now - len(samples) * period, pending_t)
+            pending = np.concatenate([pending, samples])
+            mins, maxs, means, rest = decimate(pending, window)
+            rows = len(mins)
+            if rows:
+                times = pending_t + np.arange(rows) * window * period
+                pos = written.value
+                idx = (pos + np.arange(rows)) % capacity
+                ring[idx] = np.column_stack([times, mins, maxs, means])
+                # Publish after the rows are in place
+                written.value = pos + rows
+                pending_t += rows * window * period
+            pending = rest
+    finally:
+        source.close()
+        shm.close()
+
+
+class PowerCapture:
+    def __init__(
+        self,
+        source=None,
+        window: int = DEFAULT_WINDOW,
+        capacity: int = DEFAULT_CAPACITY,
+        phase_patterns: list = PHASE_PATTERNS,
+    ) -> None:
+        """
+        :param source: PPK2Source (default) or SimulatedSource, opened in the capture process
+        :param window: Samples per decimated window
+        :param capacity: Windows in the shared ring buffer
+        """
+        self.source = source or PPK2Source()
+        self.window = window
+        self.capacity = capacity
+        self.phase_patterns = [(name, re.compile(p)) for name, p in phase_patterns]
+        # (time, name, "start"|"end")
+        self.marks = []
+        # (time, line) of attached Uarts
+        self.uart_lines = []
+        self.lost_windows = 0
+        self._chunks = []
+        self._read = 0
+        self._uarts = []
+        self._proc = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "PowerCapture":
+        ctx = multiprocessing.get_context("fork" if sys.platform.startswith("linux") else "spawn")
+        self._shm = shared_memory.SharedMemory(create=True, size=self.capacity * len(COLUMNS) * 8)
+        self._ring = np.ndarray((self.capacity, len(COLUMNS)), dtype=np.float64, buffer=self._shm.buf)
+        self._written = ctx.Value("q", 0, lock=False)
+        self._stop = ctx.Event()
+        ready = ctx.Event()
+        self._error = ctx.Array("c", 256)
+        self._proc = ctx.Process(
+            target=_capture_main,
+            args=(self.source, self._shm.name, self.capacity, self.window, self._written, self._stop, ready, self._error),
+            daemon=True,
+        )
+        self._proc.start()
+        ready.wait(30)
+        if self._error.value:
+            self._cleanup()
+            raise RuntimeError(f"Power capture failed to start: {self._error.value.decode()}")
+        self._drain_stop = threading.Event()
+        self._drainer = threading.Thread(target=self._drain_loop, daemon=True)
+        self._drainer.start()
+        return self
+
+    def stop(self) -> None:
+        if self._proc is None:
+            return
+        self._stop.set()
+        self._proc.join(10)
+        self._drain_stop.set()
+        self._drainer.join()
+        self._drain()
+        for uart in self._uarts:
+            uart.line_listeners.remove(self._on_uart_line)
+        self._uarts = []
+        self._cleanup()
+
+    def _cleanup(self) -> None:
+        self._ring = None
+        self._shm.close()
+        self._shm.unlink()
+        self._proc = None
+
+    def __enter__(self) -> "PowerCapture":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def _drain(self) -> None:
+        written = self._written.value
+        if written == self._read:
+            return
+        if written - self._read > self.capacity:
+            self.lost_windows += written - self._read - self.capacity
+            logger.warning(f"Power capture ring buffer overflow, {self.lost_windows} windows lost")
+            self._read = written - self.capacity
+        idx = np.arange(self._read, written) % self.capacity
+        with self._lock:
+            self._chunks.append(self._ring[idx].copy())
+        self._read = written
+
+    def _drain_loop(self) -> None:
+        while not self._drain_stop.wait(DRAIN_INTERVAL):
+            self._drain()
+
+    def windows(self) -> np.ndarray:
+        """ All decimated windows so far, columns as in COLUMNS """
+        with self._lock:
+            if len(self._chunks) > 1:
+                self._chunks = [np.concatenate(self._chunks)]
+            return self._chunks[0] if self._chunks else np.empty((0, len(COLUMNS)))
+
+    def mark(self, name: str, kind: str = "start", t: float = None) -> None:
+        t = time.time() if t is None else t
+        self.marks.append((t, name, kind))
+        log_event("phase", name=name, kind=kind, t=t)
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """ Mark start and end of a test phase """
+        self.mark(name, "start")
+        try:
+            yield self
+        finally:
+            self.mark(name, "end")
+
+    def attach_uart(self, uart) -> None:
+        """ Record lines received by uart (or the owner of a view) and mark phases from them """
+        uart = getattr(uart, "owner", uart)
+        uart.line_listeners.append(self._on_uart_line)
+        self._uarts.append(uart)
+
+    def _on_uart_line(self, t: float, line: str) -> None:
+        self.uart_lines.append((t, line))
+        for name, pattern in self.phase_patterns:
+            if pattern.search(line):
+                self.mark(name, "end", t)
+
+    def arrays(self) -> dict:
+        """ Windows, marks and UART lines as saved by save() """
+        data = self.windows()
+        marks = list(self.marks)
+        uart_lines = list(self.uart_lines)
+        return {
+            **{name: data[:, i] for i, name in enumerate(COLUMNS)},
+            "mark_time": np.array([m[0] for m in marks], dtype=np.float64),
+            "mark_name": np.array([m[1] for m in marks], dtype=str),
+            "mark_kind": np.array([m[2] for m in marks], dtype=str),
+            "uart_time": np.array([x[0] for x in uart_lines], dtype=np.float64),
+            "uart_line": np.array([x[1] for x in uart_lines], dtype=str),
+            "window": np.array(self.window),
+            "rate": np.array(self.source.rate),
+        }
+
+    def save(self, prefix: str) -> list:
+        """ Write prefix.npz, and prefix.parquet when pandas has a Parquet engine """
+        arrays = self.arrays()
+        os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+        np.savez_compressed(f"{prefix}.npz", **arrays)
+        paths = [f"{prefix}.npz"]
+        try:
+            import pandas
+            pandas.DataFrame({name: arrays[name] for name in COLUMNS}).to_parquet(f"{prefix}.parquet")
+            paths.append(f"{prefix}.parquet")
+        except ImportError:
+            pass
+        return paths
+
+
+def load(path: str) -> dict:
+    """ Arrays saved by PowerCapture.save() """
+    with np.load(path) as f:
+        return {k: f[k] for k in f.files}
@@ -0,0 +1,239 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Results store and regression detection across builds.
+
+Every run's timings (as extracted by dashboard.py: test duration, flash, attach,
+cloud connect, FOTA and API latencies, energy) are stored in SQLite, keyed by
+ARTIFACT_VERSION, device type, stage, test and metric. Runs are identified by
+their session start, as CI writes every run to the same log prefix. The store
+lives on the runner, so history accumulates between workflow runs:
+
+    python utils/results_db.py --db ~/.cache/nrfcloud_fw_ci/results.db ingest "outcomes/*.jsonl.*"
+    python utils/results_db.py --db ~/.cache/nrfcloud_fw_ci/results.db check --version "$ARTIFACT_VERSION"
+
+Each series (device type, stage, test, metric) is reduced to one median per
+build, in build order. A build is flagged when
+- its median is above the given percentile of the previous builds and more
+  than min_rel slower (percentile shift), or
+- the series has a change point, the split with the largest Welch t statistic
+  between the builds before and after, with the later level min_rel higher and
+  the flagged build at or after the split.
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+from collections import defaultdict
+
+import numpy as np
+sys.path.append(os.getcwd())
+from utils.dashboard import find_runs, extract_run, run_id, _signature
+
+DEFAULT_DB = os.path.expanduser("~/.cache/nrfcloud_fw_ci/results.db")
+HISTORY = 20
+MIN_HISTORY = 3
+PERCENTILE = 90
+MIN_REL = 0.1
+T_THRESHOLD = 4.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run TEXT UNIQUE,
+    signature TEXT,
+    artifact_version TEXT,
+    device_type TEXT,
+    stage TEXT,
+    start REAL
+);
+CREATE TABLE IF NOT EXISTS measurements (
+    run_id INTEGER REFERENCES runs(id) ON DELETE CASCADE,
+    test TEXT,
+    metric TEXT,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS measurements_series ON measurements(test, metric);
+CREATE INDEX IF NOT EXISTS runs_build ON runs(device_type, stage, start);
+"""
+
+
+def _short_test(test: str, device_type: str, stage: str) -> str:
+    # Node IDs are prefixed with RUNNER_DEVICE_TYPE::STAGE, see pytest_itemcollected
+    prefix = f"{device_type}::{stage}::"
+    return test[len(prefix):] if test and test.startswith(prefix) else test
+
+
+class ResultsDB:
+    def __init__(self, path: str = DEFAULT_DB) -> None:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "ResultsDB":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def add_run(self, summary: dict) -> int:
+        """ Store a run summary of dashboard.extract_run(), replacing an earlier import of it """
+        with self.conn:
+            self.conn.execute("DELETE FROM runs WHERE run = ?", (summary["run"],))
+            cur = self.conn.execute(
+                "INSERT INTO runs (run, signature, artifact_version, device_type, stage, start) VALUES (?, ?, ?, ?, ?, ?)",
+                (summary["run"], json.dumps(summary.get("signature")), summary["artifact_version"],
+                 summary["device_type"], summary["stage"], summary["start"]),
+            )
+            run_id = cur.lastrowid
+            self.conn.executemany(
+                "INSERT INTO measurements (run_id, test, metric, value) VALUES (?, ?, ?, ?)",
+                [(run_id, _short_test(test, summary["device_type"], summary["stage"]), metric, value)
+                 for test, metric, value in summary["metrics"]],
+            )
+        return run_id
+
+    def ingest(self, patterns: list) -> int:
+        """ Import runs from outcome logs, skipping runs already imported unchanged """
+        count = 0
+        for prefix, files in find_runs(patterns).items():
+            run = run_id(prefix, files)
+            signature = json.dumps(_signature(files))
+            row = self.conn.execute("SELECT signature FROM runs WHERE run = ?", (run,)).fetchone()
+            if row and row[0] == signature:
+                continue
+            summary = extract_run(run, files)
+            summary["signature"] = _signature(files)
+            self.add_run(summary)
+            count += 1
+        return count
+
+    def builds(self, device_type: str = None, stage: str = None) -> list:
+        """ Artifact versions in order of their first run """
+        rows = self.conn.execute(
+            "SELECT artifact_version, MIN(start) AS first FROM runs "
+            "WHERE artifact_version IS NOT NULL AND (?1 IS NULL OR device_type = ?1) AND (?2 IS NULL OR stage = ?2) "
+            "GROUP BY artifact_version ORDER BY first",
+            (device_type, stage),
+        )
+        return [r[0] for r in rows]
+
+    def series(self, device_type: str = None, stage: str = None) -> dict:
+        """ (device type, stage, test, metric) to [(build, median)] in build order """
+        rows = self.conn.execute(
+            "SELECT r.device_type, r.stage, m.test, m.metric, r.artifact_version, m.value "
+            "FROM measurements m JOIN runs r ON m.run_id = r.id "
+            "WHERE r.artifact_version IS NOT NULL AND (?1 IS NULL OR r.device_type = ?1) AND (?2 IS NULL OR r.stage = ?2) "
+            "ORDER BY r.start",
+            (device_type, stage),
+        )
+        values = defaultdict(lambda: defaultdict(list))
+        for device, stg, test, metric, build, value in rows:
+            values[(device, stg, test, metric)][build].append(value)
+        return {key: [(build, float(np.median(v))) for build, v in builds.items()] for key, builds in values.items()}
+
+
+def percentile_shift(history: np.ndarray, value: float, percentile: float = PERCENTILE, min_rel: float = MIN_REL) -> bool:
+    """ value above the percentile of history and min_rel above its median """
+    if len(history) < MIN_HISTORY:
+        return False
+    return value > np.percentile(history, percentile) and value > np.median(history) * (1 + min_rel)
+
+def change_point(values: np.ndarray, min_size: int = 2) -> tuple:
+    """
+    Split with the largest Welch t statistic of the levels before and after
+
+    :return: (index of the first value after the split, t statistic), (None, 0) if too short
+    """
+    n = len(values)
+    if n < 2 * min_size:
+        return None, 0.0
+    k = np.arange(min_size, n - min_size + 1)
+    csum = np.cumsum(values)
+    csq = np.cumsum(values ** 2)
+    left_mean = csum[k - 1] / k
+    right_mean = (csum[-1] - csum[k - 1]) / (n - k)
+    left_var = np.maximum(csq[k - 1] / k - left_mean ** 2, 0) * k / np.maximum(k - 1, 1)
+    right_var = np.maximum((csq[-1] - csq[k - 1]) / (n - k) - right_mean ** 2, 0) * (n - k) / np.maximum(n - k - 1, 1)
+    # Floor the noise at 1 % of the level, constant series would give infinite t
+    floor = (0.01 * np.abs(values).mean()) ** 2
+    se = np.sqrt(np.maximum(left_var, floor) / k + np.maximum(right_var, floor) / (n - k))
+    t = (right_mean - left_mean) / se
+    best = int(np.argmax(t))
+    return int(k[best]), float(t[best])
+
+def detect_regressions(
+    series: dict,
+    version: str = None,
+    history: int = HISTORY,
+    percentile: float = PERCENTILE,
+    min_rel: float = MIN_REL,
+    t_threshold: float = T_THRESHOLD,
+) -> list:
+    """
+    Regressions of one build (default the latest of every series)
+
+    :param series: ResultsDB.series()
+    :return: Dicts with device_type, stage, test, metric, build, value, baseline and method
+    """
+    regressions = []
+    for (device, stage, test, metric), points in series.items():
+        builds = [b for b, _ in points]
+        if version is not None and version not in builds:
+            continue
+        i = builds.index(version) if version is not None else len(builds) - 1
+        values = np.array([v for _, v in points[max(0, i - history):i + 1]])
+        value, previous = values[-1], values[:-1]
+        found = None
+        if percentile_shift(previous, value, percentile, min_rel):
+            found = ("percentile_shift", float(np.median(previous)))
+        else:
+            split, t = change_point(values)
+            if split is not None and t > t_threshold:
+                before, after = values[:split].mean(), values[split:].mean()
+                if after > before * (1 + min_rel) and value > before * (1 + min_rel):
+                    found = ("change_point", float(before))
+        if found:
+            regressions.append({
+                "device_type": device, "stage": stage, "test": test, "metric": metric,
+                "build": builds[i], "value": float(value), "baseline": found[1], "method": found[0],
+            })
+    return regressions
+
+def format_regression(r: dict) -> str:
+    return (f"{r['device_type']}/{r['stage']} {r['test']} {r['metric']}: {r['value']:.2f} in {r['build']}, "
+            f"baseline {r['baseline']:.2f} (+{(r['value'] / r['baseline'] - 1) * 100:.0f} %, {r['method']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Results database and regression detection")
+    parser.add_argument("--db", default=os.getenv("RESULTS_DB", DEFAULT_DB), help="SQLite database")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = sub.add_parser("ingest", help="import runs from outcome logs")
+    ingest_parser.add_argument("paths", nargs="+", help="outcome log files or glob patterns")
+    check_parser = sub.add_parser("check", help="report regressions of a build")
+    check_parser.add_argument("--version", help="artifact version, default the latest of every series")
+    check_parser.add_argument("--device-type")
+    check_parser.add_argument("--stage")
+    check_parser.add_argument("--min-rel", type=float, default=MIN_REL)
+    check_parser.add_argument("--fail", action="store_true", help="exit with 1 if regressions are found")
+    args = parser.parse_args()
+
+    with ResultsDB(args.db) as db:
+        if args.command == "ingest":
+            print(f"{db.ingest(args.paths)} runs imported into {args.db}")
+        else:
+            regressions = detect_regressions(db.series(args.device_type, args.stage), args.version, min_rel=args.min_rel)
+            for r in regressions:
+                print(format_regression(r))
+            sys.exit(1 if regressions and args.fail else 0)
@@ -0,0 +1,184 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Event driven discovery of serial ports.
+
+The registry watches directories like /dev/serial/by-id with inotify and wakes
+waiters as soon as an entry appears, instead of polling with sleeps. Directories
+which don't exist yet (by-id is removed by udev with the last device) are picked
+up through a watch on their parent. Without inotify (not Linux) waiters poll
+every POLL_INTERVAL seconds.
+
+    path = get_registry().find("THINGY91X_ABC123", timeout=60)
+    get_registry().wait_for_path(path, timeout=10)
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from typing import Callable, Optional
+sys.path.append(os.getcwd())
+from utils.logger import get_logger
+
+logger = get_logger()
+
+SERIAL_BY_ID = "/dev/serial/by-id"
+POLL_INTERVAL = 0.05
+
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch, libc.inotify_rm_watch
+    except (OSError, AttributeError):
+        return None
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+class SerialRegistry:
+    def __init__(self, use_inotify: bool = True) -> None:
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        # Directories to watch, wd to directory for active watches
+        self._dirs = set()
+        self._watches = {}
+        self.stats = {"events": 0, "wakeups": 0}
+        self._libc = _load_inotify() if use_inotify else None
+        self._fd = -1
+        if self._libc:
+            self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if self._fd < 0:
+                logger.warning(f"inotify not available ({os.strerror(ctypes.get_errno())}), polling serial ports")
+                self._libc = None
+        if self._libc:
+            self._t = threading.Thread(target=self._watch, daemon=True)
+            self._t.start()
+
+    @property
+    def event_driven(self) -> bool:
+        return self._libc is not None
+
+    def _add_watch(self, directory: str) -> bool:
+        wd = self._libc.inotify_add_watch(self._fd, directory.encode(), WATCH_MASK)
+        if wd < 0:
+            return False
+        self._watches[wd] = directory
+        return True
+
+    def _update_watches(self) -> None:
+        # Watch every directory, or its closest existing parent until it's created
+        with self._lock:
+            watched = set(self._watches.values())
+            for directory in self._dirs:
+                path = directory
+                while path not in watched and not self._add_watch(path):
+                    parent = os.path.dirname(path)
+                    if parent == path:
+                        break
+                    path = parent
+                watched.add(path)
+
+    def watch(self, directory: str) -> None:
+        """ Wake waiters on changes in directory, which doesn't have to exist yet """
+        directory = os.path.abspath(directory)
+        with self._lock:
+            if directory in self._dirs:
+                return
+            self._dirs.add(directory)
+        if self.event_driven:
+            self._update_watches()
+
+    def _watch(self) -> None:
+        while True:
+            try:
+                ready, _, _ = select.select([self._fd], [], [], 1.0)
+                if not ready:
+                    continue
+                data = os.read(self._fd, 64 * 1024)
+            except OSError as e:
+                if e.errno in [errno.EAGAIN, errno.EINTR]:
+                    continue
+                raise
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size + length
+                if mask & IN_IGNORED:
+                    with self._lock:
+                        self._watches.pop(wd, None)
+                self.stats["events"] += 1
+            # Directories created or removed change which watches are needed
+            self._update_watches()
+            with self._cond:
+                self.stats["wakeups"] += 1
+                self._cond.notify_all()
+
+    def wait(self, predicate: Callable[[], object], directory: str, timeout: float = None):
+        """
+        Wait until predicate() returns a true value, checked on every change in directory
+
+        :return: Value of predicate(), None on timeout
+        """
+        self.watch(directory)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                result = predicate()
+                if result:
+                    return result
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                # Bounded wait as a safety net for missed events, short when polling
+                interval = 1.0 if self.event_driven else POLL_INTERVAL
+                self._cond.wait(interval if remaining is None else min(remaining, interval))
+
+    def wait_for_path(self, path: str, timeout: float = None) -> bool:
+        """ Wait until path exists, e.g. a serial port after USB re-enumeration """
+        return bool(self.wait(lambda: os.path.exists(path), os.path.dirname(os.path.abspath(path)), timeout))
+
+    def find(self, name: str, directory: str = SERIAL_BY_ID, timeout: float = None) -> Optional[str]:
+        """ First path in directory (sorted) containing name, waiting for it to appear """
+        def match():
+            try:
+                entries = sorted(os.listdir(directory))
+            except (FileNotFoundError, PermissionError):
+                return None
+            return next((os.path.join(directory, x) for x in entries if name in x), None)
+        return self.wait(match, directory, timeout)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> SerialRegistry:
+    """ Process wide registry, created on first use """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SerialRegistry()
+        return _registry
@@ -0,0 +1,128 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Cached device shadow with conditional fetches.
+
+The last device document is kept with its ETag, and every fetch sends
+If-None-Match, so an unchanged shadow costs a 304 without a body instead of the
+whole document. Without ETag support, changes are found by diffing against the
+cached document. Fields are read from the cache by path:
+
+    shadow = cloud.shadow(device_id)
+    shadow.get("state.reported.device.deviceInfo.modemFirmware")
+    for version in shadow.watch("state.reported.device.deviceInfo.appVersion", timeout=600):
+        ...
+    shadow.stats    # requests, not_modified, bytes received and bytes saved by 304s
+"""
+
+import os
+import sys
+import time
+
+from requests.exceptions import RequestException
+sys.path.append(os.getcwd())
+from utils.logger import get_logger
+
+logger = get_logger()
+
+APP_VERSION = "state.reported.device.deviceInfo.appVersion"
+MODEM_FIRMWARE = "state.reported.device.deviceInfo.modemFirmware"
+WATCH_INTERVAL = 5.0
+
+_MISSING = object()
+
+
+def _split(path) -> tuple:
+    return tuple(path.split(".")) if isinstance(path, str) else tuple(path)
+
+def lookup(document, path, default=_MISSING):
+    """ Value at a dotted path (or tuple of keys), KeyError if missing and no default """
+    value = document
+    for key in _split(path):
+        if not isinstance(value, dict) or key not in value:
+            if default is _MISSING:
+                raise KeyError(".".join(_split(path)))
+            return default
+        value = value[key]
+    return value
+
+def diff_paths(old, new, prefix: tuple = ()) -> list:
+    """ Paths of the leaves that were added, removed or changed """
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return [] if old == new else [prefix]
+    changed = []
+    for key in old.keys() | new.keys():
+        if key not in old or key not in new:
+            changed.append(prefix + (key,))
+        else:
+            changed += diff_paths(old[key], new[key], prefix + (key,))
+    return changed
+
+
+class DeviceShadow:
+    def __init__(self, cloud, device_id: str) -> None:
+        """
+        :param cloud: NRFCloud
+        """
+        self.cloud = cloud
+        self.device_id = device_id
+        self.document = None
+        self.etag = None
+        self.size = 0
+        self.fetched_at = None
+        self.stats = {"requests": 0, "not_modified": 0, "bytes": 0, "bytes_saved": 0}
+
+    def fetch(self, max_age: float = 0.0) -> list:
+        """
+        Refresh the cached document, conditionally if an ETag is known
+
+        :param max_age: Use the cache without a request if fetched less than max_age seconds ago
+        :return: Paths changed since the previous fetch, [()] for the first one
+        """
+        if self.document is not None and max_age and time.time() - self.fetched_at < max_age:
+            return []
+        headers = {"If-None-Match": self.etag} if self.etag and self.document is not None else {}
+        r = self.cloud._request("GET", f"/devices/{self.device_id}", headers=headers)
+        self.fetched_at = time.time()
+        self.stats["requests"] += 1
+        self.stats["bytes"] += len(r.content)
+        if r.status_code == 304:
+            self.stats["not_modified"] += 1
+            self.stats["bytes_saved"] += self.size
+            return []
+        document = r.json()
+        changed = [()] if self.document is None else diff_paths(self.document, document)
+        self.document = document
+        self.etag = r.headers.get("ETag")
+        self.size = len(r.content)
+        return changed
+
+    def get(self, path, default=_MISSING, max_age: float = 0.0):
+        """ Field of the fetched document, KeyError if missing and no default """
+        self.fetch(max_age)
+        return lookup(self.document, path, default)
+
+    def watch(self, path, interval: float = WATCH_INTERVAL, timeout: float = None):
+        """
+        Yield the value of a field whenever it changes, starting with the current one
+
+        Missing fields are yielded as None, the generator ends at the timeout.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        last = _MISSING
+        while True:
+            try:
+                self.fetch()
+            except RequestException as e:
+                logger.warning(f"Exception {e} while fetching shadow of {self.device_id}")
+            else:
+                value = lookup(self.document, path, None)
+                if value != last:
+                    last = value
+                    yield value
+            if deadline is not None and time.time() + interval > deadline:
+                return
+            time.sleep(interval)
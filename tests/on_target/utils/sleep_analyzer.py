@@ -0,0 +1,211 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Idle behaviour of long power captures: does the device reach PSM/eDRX sleep
+between transmissions, how deep and how often does it wake up.
+
+The capture is processed in chunks (numpy reductions only, state carried from
+one chunk to the next), so hour long captures take seconds:
+
+    report = analyze(load("outcomes/power_test_coap_device_message.npz"))
+    assert report["floor_ua"] < 10, "PSM not reached"
+
+    python utils/sleep_analyzer.py outcomes/power_*.npz --max-floor-ua 10
+
+Windows with a mean current above the threshold are active, everything else is
+idle. Idle gaps shorter than min_idle_s are counted as part of the surrounding
+activity. Without a threshold it is derived from the sleep floor, estimated
+from the 5th percentile of all windows.
+"""
+
+import sys
+import json
+import argparse
+from typing import Iterator
+
+import numpy as np
+
+CHUNK_SIZE = 1 << 20
+# Log spaced current histogram for percentiles, 0.1 uA to 1 A
+CURRENT_BINS = np.logspace(-1, 6, 701)
+# Log spaced duration histogram for time in state, 1 ms to 1 day
+DURATION_BINS = np.logspace(-3, np.log10(86400), 61)
+FLOOR_PERCENTILE = 5
+ACTIVE_FACTOR = 20
+MIN_THRESHOLD_UA = 50.0
+OUTLIER_MADS = 5
+# Outliers are also at least this much above the median, segment means hardly vary
+OUTLIER_MIN_RATIO = 0.5
+
+
+def _percentile(counts: np.ndarray, q: float) -> float:
+    # Percentile from a histogram over CURRENT_BINS, geometric bin center
+    total = counts.sum()
+    if not total:
+        return float("nan")
+    i = int(np.searchsorted(np.cumsum(counts), total * q / 100))
+    return float(np.sqrt(CURRENT_BINS[i] * CURRENT_BINS[i + 1]))
+
+def _histogram(current: np.ndarray) -> np.ndarray:
+    return np.histogram(np.clip(current, CURRENT_BINS[0], CURRENT_BINS[-1] * 0.999), CURRENT_BINS)[0]
+
+def iter_chunks(capture: dict, chunk_size: int = CHUNK_SIZE) -> Iterator[tuple]:
+    """ (time, mean current) chunks of a capture saved by PowerCapture """
+    t, current = capture["time"], capture["mean"]
+    for i in range(0, len(t), chunk_size):
+        yield t[i:i + chunk_size], current[i:i + chunk_size]
+
+
+class SleepAnalyzer:
+    def __init__(self, threshold_ua: float, min_idle_s: float = 0.01) -> None:
+        self.threshold_ua = threshold_ua
+        self.min_idle_s = min_idle_s
+        self.idle_hist = np.zeros(len(CURRENT_BINS) - 1, dtype=np.int64)
+        # Completed segments
+        self._starts = []
+        self._ends = []
+        self._states = []
+        self._charges = []
+        # Open segment carried between chunks: [state, start, charge]
+        self._open = None
+        self._last_t = None
+        self._dt = None
+
+    def feed(self, t: np.ndarray, current: np.ndarray) -> None:
+        if not len(t):
+            return
+        if self._dt is None:
+            self._dt = float(np.median(np.diff(t[:1000]))) if len(t) > 1 else 0.001
+        prev = self._last_t if self._last_t is not None else t[0] - self._dt
+        dt = np.diff(t, prepend=prev)
+        charge = current * dt
+        active = current > self.threshold_ua
+        self.idle_hist += _histogram(current[~active])
+
+        # Pieces of constant state within the chunk
+        starts = np.concatenate([[0], np.flatnonzero(active[1:] != active[:-1]) + 1])
+        piece_charge = np.add.reduceat(charge, starts)
+        piece_state = active[starts]
+        piece_start = t[starts] - dt[starts]
+
+        first = 0
+        if self._open is not None and self._open[0] == piece_state[0]:
+            self._open[2] += piece_charge[0]
+            first = 1
+        for i in range(first, len(starts)):
+            if self._open is not None:
+                self._close(piece_start[i])
+            self._open = [bool(piece_state[i]), float(piece_start[i]), float(piece_charge[i])]
+        self._last_t = float(t[-1])
+
+    def _close(self, end: float) -> None:
+        state, start, charge = self._open
+        self._states.append(state)
+        self._starts.append(start)
+        self._ends.append(end)
+        self._charges.append(charge)
+        self._open = None
+
+    def segments(self) -> dict:
+        """ Segments after merging short idle gaps into activity """
+        states = np.array(self._states + ([self._open[0]] if self._open else []), dtype=bool)
+        starts = np.array(self._starts + ([self._open[1]] if self._open else []))
+        ends = np.array(self._ends + ([self._last_t] if self._open else []))
+        charges = np.array(self._charges + ([self._open[2]] if self._open else []))
+        if not len(states):
+            return {"state": states, "start": starts, "end": ends, "charge": charges}
+        short_idle = ~states & (ends - starts < self.min_idle_s)
+        # Leading or trailing short idle stays idle, there is no activity around it
+        short_idle[[0, -1]] = False
+        states = states | short_idle
+        keep = np.concatenate([[0], np.flatnonzero(states[1:] != states[:-1]) + 1])
+        return {
+            "state": states[keep],
+            "start": starts[keep],
+            "end": np.append(starts[keep][1:], ends[-1]),
+            "charge": np.add.reduceat(charges, keep),
+        }
+
+    def report(self) -> dict:
+        seg = self.segments()
+        durations = seg["end"] - seg["start"]
+        idle = ~seg["state"]
+        active = seg["state"]
+        total = float(durations.sum())
+        idle_time = float(durations[idle].sum())
+        idle_current = np.divide(seg["charge"][idle], durations[idle], out=np.zeros(idle.sum()), where=durations[idle] > 0)
+        return {
+            "duration_s": total,
+            "threshold_ua": self.threshold_ua,
+            "floor_ua": _percentile(self.idle_hist, 50),
+            "floor_p10_ua": _percentile(self.idle_hist, 10),
+            "floor_p90_ua": _percentile(self.idle_hist, 90),
+            "avg_current_ua": float(seg["charge"].sum() / total) if total else float("nan"),
+            "idle_fraction": idle_time / total if total else float("nan"),
+            "wakeups": int(active.sum()),
+            "wakeups_per_hour": float(active.sum() / total * 3600) if total else float("nan"),
+            "idle_s_median": float(np.median(durations[idle])) if idle.any() else float("nan"),
+            "active_s_median": float(np.median(durations[active])) if active.any() else float("nan"),
+            "idle_duration_hist": np.histogram(durations[idle], DURATION_BINS)[0].tolist(),
+            "active_duration_hist": np.histogram(durations[active], DURATION_BINS)[0].tolist(),
+            "duration_bins_s": DURATION_BINS.tolist(),
+            "outliers": _outliers(seg, durations, idle_current),
+        }
+
+
+def _robust_outliers(values: np.ndarray) -> np.ndarray:
+    if len(values) < 3:
+        return np.zeros(len(values), dtype=bool)
+    median = np.median(values)
+    mad = np.median(np.abs(values - median))
+    return values > median + max(OUTLIER_MADS * mad, OUTLIER_MIN_RATIO * median)
+
+def _outliers(seg: dict, durations: np.ndarray, idle_current: np.ndarray) -> list:
+    """ Idle periods with a high floor, e.g. PSM not entered, and unusually long activity """
+    outliers = []
+    idle_idx = np.flatnonzero(~seg["state"])
+    for i in idle_idx[_robust_outliers(idle_current)]:
+        outliers.append({"kind": "idle_current", "start": float(seg["start"][i]), "duration_s": float(durations[i]),
+                         "current_ua": float(idle_current[np.searchsorted(idle_idx, i)])})
+    active_idx = np.flatnonzero(seg["state"])
+    for i in active_idx[_robust_outliers(durations[active_idx])]:
+        outliers.append({"kind": "active_duration", "start": float(seg["start"][i]), "duration_s": float(durations[i])})
+    return outliers
+
+def estimate_threshold(chunks) -> float:
+    """ Active threshold from the sleep floor of all windows """
+    hist = np.zeros(len(CURRENT_BINS) - 1, dtype=np.int64)
+    for _, current in chunks:
+        hist += _histogram(current)
+    return max(_percentile(hist, FLOOR_PERCENTILE) * ACTIVE_FACTOR, MIN_THRESHOLD_UA)
+
+def analyze(capture: dict, threshold_ua: float = None, min_idle_s: float = 0.01, chunk_size: int = CHUNK_SIZE) -> dict:
+    """ Sleep report of a capture as saved by PowerCapture (time and mean columns) """
+    if threshold_ua is None:
+        threshold_ua = estimate_threshold(iter_chunks(capture, chunk_size))
+    analyzer = SleepAnalyzer(threshold_ua, min_idle_s)
+    for t, current in iter_chunks(capture, chunk_size):
+        analyzer.feed(t, current)
+    return analyzer.report()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sleep/PSM analysis of power captures")
+    parser.add_argument("captures", nargs="+", help=".npz files saved by PowerCapture")
+    parser.add_argument("--threshold-ua", type=float, help="active threshold, derived from the floor if not given")
+    parser.add_argument("--min-idle-s", type=float, default=0.01, help="shorter idle gaps count as active")
+    parser.add_argument("--max-floor-ua", type=float, help="exit with 1 if a floor is above this")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.captures:
+        with np.load(path) as f:
+            report = analyze({"time": f["time"], "mean": f["mean"]}, args.threshold_ua, args.min_idle_s)
+        summary = {k: v for k, v in report.items() if not k.endswith(("_hist", "_bins_s"))}
+        print(json.dumps({"capture": path, **summary}, indent=2))
+        if args.max_floor_ua is not None and not report["floor_ua"] <= args.max_floor_ua:
+            failed = True
+    sys.exit(1 if failed else 0)
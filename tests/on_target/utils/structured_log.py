@@ -0,0 +1,197 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Compressed JSON-lines outcome logs.
+
+Every record is one JSON object per line with at least "ts" (seconds since epoch)
+and "type" (uart, log, event, cloud, ...). Files are compressed while written
+(gzip, or zstd when the zstandard module is installed) and rotated by size:
+
+    outcomes/nrfcloud_fw_test_log.000.jsonl.gz
+    outcomes/nrfcloud_fw_test_log.001.jsonl.gz
+
+iter_records() streams them back with filters, without decompressing whole files
+into memory:
+
+    python utils/structured_log.py "outcomes/*.jsonl.*" --type uart --test fota --contains ASSERT
+"""
+
+import os
+import re
+import io
+import sys
+import glob
+import gzip
+import json
+import logging
+import argparse
+from typing import Iterator, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Not utils.logger, which writes through this module
+logger = logging.getLogger(__name__)
+
+# Raised at the end of a compressed file that was not closed, e.g. after a killed run
+TRUNCATED_ERRORS = (EOFError, gzip.BadGzipFile) + ((zstandard.ZstdError,) if zstandard else ())
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+EXTENSIONS = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst", "none": ".jsonl"}
+
+
+def _open_write(path: str, compression: str):
+    raw = open(path, "wb")
+    if compression == "gzip":
+        return raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6)
+    if compression == "zstd":
+        return raw, zstandard.ZstdCompressor(level=3).stream_writer(raw)
+    return raw, raw
+
+def open_read(path: str) -> io.TextIOBase:
+    """ Open a (compressed) JSON-lines file for streaming text reads """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard module required to read {path}")
+        f = open(path, "rb")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(f, closefd=True),
+                                encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+
+class StructuredLog:
+    def __init__(self, prefix: str, compression: str = "gzip", max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        :param prefix: Path without extension, e.g. outcomes/nrfcloud_fw_test_log
+        :param compression: gzip, zstd or none, zstd falls back to gzip if not installed
+        :param max_bytes: Rotate when the current file reaches this size on disk
+        """
+        if compression == "zstd" and zstandard is None:
+            compression = "gzip"
+        if compression not in EXTENSIONS:
+            raise ValueError(f"Unknown compression '{compression}'")
+        self.prefix = prefix
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.index = 0
+        self.records = 0
+        self._raw = None
+        self._stream = None
+        os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+        # Continue numbering after files of a previous run with the same prefix
+        existing = list_files(prefix)
+        if existing:
+            self.index = _file_index(existing[-1]) + 1
+
+    @property
+    def path(self) -> str:
+        return f"{self.prefix}.{self.index:03d}{EXTENSIONS[self.compression]}"
+
+    def write(self, record: dict) -> None:
+        if self._stream is None:
+            self._raw, self._stream = _open_write(self.path, self.compression)
+        self._stream.write(json.dumps(record, separators=(",", ":"), default=str).encode("utf-8") + b"\n")
+        self.records += 1
+        if self._raw.tell() >= self.max_bytes:
+            self.close()
+            self.index += 1
+
+    def flush(self) -> None:
+        if self._stream is not None:
+            self._stream.flush()
+            if self._raw is not self._stream:
+                self._raw.flush()
+
+    def close(self) -> None:
+        if self._stream is None:
+            return
+        self._stream.close()
+        if not self._raw.closed:
+            self._raw.close()
+        self._raw = self._stream = None
+
+
+def _file_index(path: str) -> int:
+    m = re.search(r"\.(\d+)\.jsonl", path)
+    return int(m.group(1)) if m else 0
+
+def list_files(prefix: str) -> list:
+    """ Rotated files of prefix, oldest first """
+    return sorted(glob.glob(f"{glob.escape(prefix)}.*.jsonl*"), key=_file_index)
+
+def iter_records(
+    paths: Union[str, list],
+    types: Union[str, list] = None,
+    test: str = None,
+    since: float = None,
+    until: float = None,
+    contains: str = None,
+) -> Iterator[dict]:
+    """
+    Stream records from one or more files (glob patterns allowed), in file order
+
+    :param types: Only records of these types
+    :param test: Only records whose "test" contains this string
+    :param since: Only records with ts >= since
+    :param until: Only records with ts < until
+    :param contains: Only records whose raw JSON line contains this string
+    """
+    paths = [paths] if isinstance(paths, str) else paths
+    files = []
+    for pattern in paths:
+        files += sorted(glob.glob(pattern), key=lambda x: (re.sub(r"\.\d+\.jsonl.*$", "", x), _file_index(x)))
+    types = [types] if isinstance(types, str) else types
+    for path in files:
+        try:
+            yield from _iter_file(path, types, test, since, until, contains)
+        except TRUNCATED_ERRORS as e:
+            # Records before the damage have been yielded, continue with the next file
+            logger.warning(f"{path} is truncated, skipping its remainder: {e}")
+
+def _iter_file(path, types, test, since, until, contains) -> Iterator[dict]:
+    with open_read(path) as f:
+        for line in f:
+            # Cheap substring checks before parsing the line
+            if contains and contains not in line:
+                continue
+            if test and test not in line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Truncated last line of a file that was not closed
+                continue
+            if types and record.get("type") not in types:
+                continue
+            if test and test not in (record.get("test") or ""):
+                continue
+            if since is not None and record.get("ts", 0) < since:
+                continue
+            if until is not None and record.get("ts", 0) >= until:
+                continue
+            yield record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Filter JSON-lines outcome logs")
+    parser.add_argument("paths", nargs="+", help="files or glob patterns")
+    parser.add_argument("-t", "--type", action="append", help="record type, can be repeated")
+    parser.add_argument("--test", help="substring of the test ID")
+    parser.add_argument("--since", type=float, help="start time, seconds since epoch")
+    parser.add_argument("--until", type=float, help="end time, seconds since epoch")
+    parser.add_argument("-c", "--contains", help="substring of the record")
+    args = parser.parse_args()
+
+    try:
+        for record in iter_records(args.paths, args.type, args.test, args.since, args.until, args.contains):
+            sys.stdout.write(json.dumps(record) + "\n")
+    except BrokenPipeError:
+        pass
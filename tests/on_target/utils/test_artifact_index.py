@@ -0,0 +1,70 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import os
+import hashlib
+
+from utils.artifact_index import ArtifactIndex, get_index, INDEX_FILE
+
+PARTITIONS = """
+mcuboot:
+  address: 0x0
+  end_address: 0xc000
+  region: flash_primary
+  size: 0xc000
+mcuboot_primary:
+  address: 0xc000
+  end_address: 0x80000
+  region: flash_primary
+  size: 0x74000
+"""
+
+
+def make_tree(root):
+    for device, build in [("thingy91x", "nrf_cloud_coap_fota"), ("thingy91x", "nrf_cloud_coap_fota_test"),
+                          ("nrf9151dk", "nrf_cloud_coap_fota")]:
+        d = root / f"{device}-{build}"
+        d.mkdir()
+        (d / "zephyr.signed.hex").write_bytes(f":00000001FF {device} {build}\n".encode())
+        (d / "dfu_application.zip").write_bytes(b"PK" + build.encode())
+        (d / "partitions.yml").write_text(PARTITIONS)
+        (d / "build_info.yml").write_text("cmake:\n  board:\n    name: thingy91x\n")
+        (d / "app-dotconfig.txt").write_text(
+            'CONFIG_FOTA_DL_TIMEOUT_MIN=30\nCONFIG_APP_VERSION="1.0.0"\n# CONFIG_NRF_CLOUD_MQTT is not set\n'
+        )
+
+def test_index_1_lookup(tmp_path):
+    """Test file lookups, hashes and parsed metadata"""
+    make_tree(tmp_path)
+    index = ArtifactIndex(str(tmp_path)).scan()
+    assert index.find("thingy91x", ["nrf_cloud_coap_fota_test", "nrf_cloud_coap_fota_fmfu"], "dfu_application.zip") == \
+        str(tmp_path / "thingy91x-nrf_cloud_coap_fota_test" / "dfu_application.zip")
+    assert index.find("thingy91x", "nrf_cloud_coap_fota_fmfu", "zephyr.signed.hex") is None
+    assert index.builds_for("thingy91x") == ["nrf_cloud_coap_fota", "nrf_cloud_coap_fota_test"]
+    path = index.find("nrf9151dk", "nrf_cloud_coap_fota", "zephyr.signed.hex")
+    assert index.sha256("nrf9151dk", "nrf_cloud_coap_fota", "zephyr.signed.hex") == \
+        hashlib.sha256(open(path, "rb").read()).hexdigest()
+    config = index.config("thingy91x", "nrf_cloud_coap_fota")
+    assert config["CONFIG_FOTA_DL_TIMEOUT_MIN"] == "30"
+    assert config["CONFIG_APP_VERSION"] == "1.0.0"
+    assert config["CONFIG_NRF_CLOUD_MQTT"] == "n"
+    assert index.partitions("thingy91x", "nrf_cloud_coap_fota")["mcuboot_primary"]["size"] == 0x74000
+    assert index.build_info("thingy91x", "nrf_cloud_coap_fota")["cmake"]["board"]["name"] == "thingy91x"
+
+def test_index_2_persisted(tmp_path):
+    """Test that a saved index only rehashes changed images"""
+    make_tree(tmp_path)
+    index = get_index(str(tmp_path))
+    assert index.stats == {"hashed": 6, "reused": 0}
+    assert get_index(str(tmp_path)) is index
+    assert os.path.isfile(tmp_path / INDEX_FILE)
+
+    changed = tmp_path / "thingy91x-nrf_cloud_coap_fota" / "zephyr.signed.hex"
+    changed.write_bytes(b":00000001FF changed\n")
+    os.utime(changed, (1, 1))
+    index = ArtifactIndex.load(str(tmp_path)).scan()
+    assert index.stats == {"hashed": 1, "reused": 5}
+    assert index.sha256("thingy91x", "nrf_cloud_coap_fota", "zephyr.signed.hex") == \
+        hashlib.sha256(b":00000001FF changed\n").hexdigest()
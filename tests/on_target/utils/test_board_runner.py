@@ -0,0 +1,55 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import xml.etree.ElementTree as ET
+
+from utils.board_runner import assign, merge_junit, board_env, board_options
+
+
+def collected(nodeid, image, duration):
+    return {"nodeid": nodeid, "arg": nodeid, "image": [image], "duration": duration}
+
+def test_assign_1_balance():
+    """Test that firmware groups stay on one board and load is balanced"""
+    tests = [
+        collected("a1", "a_hex_file", 100),
+        collected("a2", "a_hex_file", 100),
+        collected("b1", "b_hex_file", 150),
+        collected("c1", "c_hex_file", 60),
+    ]
+    assigned = assign(tests, [{"name": "x"}, {"name": "y"}])
+    assert [t["nodeid"] for t in assigned["x"]] == ["a1", "a2"]
+    assert [t["nodeid"] for t in assigned["y"]] == ["b1", "c1"]
+
+def test_assign_2_board_env():
+    """Test that board settings override the environment of the worker"""
+    env = board_env({"name": "dk", "serial": "123", "device_type": "nrf9160dk", "traceport_index": 2})
+    assert env["SEGGER"] == "123"
+    assert env["UART_ID"] == "123"
+    assert env["TRACEPORT_INDEX"] == "2"
+    assert env["LOG_FILENAME"].endswith("_dk")
+    assert env["LOG_PREFIX"] == "dk"
+    assert board_env({"name": "dk", "serial": "123", "device_type": "nrf9160dk"}, 1)["LOG_PREFIX_COLOR"] != env["LOG_PREFIX_COLOR"]
+
+def test_assign_3_board_options():
+    """Test that every board writes its own pytest-html report"""
+    options = ["-m", "fota", "--html=results/test-results.html", "--self-contained-html"]
+    assert board_options(options, "dk") == ["-m", "fota", "--html=results/test-results_dk.html", "--self-contained-html"]
+    assert board_options(["--html", "report.html", "-v"], "x") == ["--html=report_x.html", "-v"]
+
+def test_merge_1_junit(tmp_path):
+    """Test that junit files of all boards are merged with totals"""
+    for name, failures in [("x", 0), ("y", 1)]:
+        (tmp_path / f"{name}.xml").write_text(
+            f'<testsuites><testsuite name="pytest" tests="2" failures="{failures}" errors="0" skipped="0" time="1.5">'
+            f'<testcase name="t_{name}"/></testsuite></testsuites>'
+        )
+    output = tmp_path / "merged.xml"
+    merge_junit([str(tmp_path / "x.xml"), str(tmp_path / "y.xml"), str(tmp_path / "missing.xml")], str(output))
+    root = ET.parse(output).getroot()
+    assert root.get("tests") == "4"
+    assert root.get("failures") == "1"
+    assert root.get("time") == "3.000"
+    assert len(root.findall("testsuite/testcase")) == 2
@@ -0,0 +1,90 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import re
+
+from utils.dashboard import Dashboard, extract_run, find_runs
+from utils.structured_log import StructuredLog
+
+TEST = "thingy91x::prod::tests/test_functional/test_uart_output.py::test_device_message"
+
+
+def write_run(path, version, t0=1000.0, attach=12.0):
+    log = StructuredLog(str(path), "gzip")
+    log.write({"ts": t0, "type": "session_start", "artifact_version": version, "device_type": "thingy91x", "stage": "prod"})
+    log.write({"ts": t0 + 1, "type": "test_start", "test": TEST})
+    log.write({"ts": t0 + 31, "type": "flash", "test": TEST, "duration": 30.0, "skipped": False})
+    log.write({"ts": t0 + 31, "type": "phase", "test": TEST, "name": "flash", "kind": "start", "t": t0 + 1})
+    log.write({"ts": t0 + 31, "type": "phase", "test": TEST, "name": "flash", "kind": "end", "t": t0 + 31})
+    log.write({"ts": t0 + 31 + attach, "type": "phase", "test": TEST, "name": "attach", "kind": "end", "t": t0 + 31 + attach})
+    log.write({"ts": t0 + 60, "type": "cloud", "test": TEST, "method": "GET",
+               "path": "/v1/messages?deviceId=nrf-352656100000001", "status": 200, "duration": 0.4, "bytes": 100})
+    log.write({"ts": t0 + 61, "type": "cloud", "test": TEST, "method": "GET",
+               "path": "/v1/devices/nrf-352656100000001", "status": 200, "duration": 0.2, "bytes": 100})
+    log.write({"ts": t0 + 61.5, "type": "fota", "test": TEST, "kind": "app", "download_s": 20.0, "bytes": 400000})
+    log.write({"ts": t0 + 61.5, "type": "fota_job", "test": TEST, "latencies": {"IN_PROGRESS": 3.0}})
+    log.write({"ts": t0 + 62, "type": "test_result", "test": TEST, "when": "call", "outcome": "passed", "duration": 61.0})
+    log.write({"ts": t0 + 62, "type": "test_finish", "test": TEST})
+    log.close()
+
+def test_dashboard_1_extract(tmp_path):
+    """Test metrics and spans of a run"""
+    write_run(tmp_path / "run1" / "log", "v1.0.0")
+    (prefix, files), = find_runs([str(tmp_path / "*" / "*.jsonl.*")]).items()
+    run = extract_run(prefix, files)
+    assert run["artifact_version"] == "v1.0.0"
+    metrics = {m[1]: m[2] for m in run["metrics"]}
+    assert metrics == {
+        "flash": 30.0,
+        "attach": 42.0,
+        "cloud GET /v1/messages": 0.4,
+        "cloud GET /v1/devices/{id}": 0.2,
+        "fota app download": 20.0,
+        "fota app s/MB": 50.0,
+        "fota_job IN_PROGRESS": 3.0,
+        "test_duration": 61.0,
+    }
+    assert run["tests"][TEST]["outcome"] == "passed"
+    assert [s[2] for s in run["spans"]] == ["flash", "phase", "phase", "cloud", "cloud", "fota", "test"]
+
+def test_dashboard_2_incremental(tmp_path):
+    """Test that only new or changed runs are extracted again"""
+    pattern = str(tmp_path / "*" / "*.jsonl.*")
+    output = str(tmp_path / "dashboard.html")
+    write_run(tmp_path / "run1" / "log", "v1.0.0")
+    dashboard = Dashboard(str(tmp_path / "cache"))
+    dashboard.build([pattern], output)
+    assert dashboard.stats == {"extracted": 1, "cached": 0, "history": 0}
+
+    write_run(tmp_path / "run2" / "log", "v1.1.0", t0=5000.0, attach=20.0)
+    dashboard = Dashboard(str(tmp_path / "cache"))
+    dashboard.build([pattern], output)
+    assert dashboard.stats == {"extracted": 1, "cached": 1, "history": 0}
+
+    page = open(output).read()
+    # plotly.js inlined, two timelines and one trend chart per metric
+    assert "<script src=" not in page
+    assert len(set(re.findall(r'id="(timeline-\w+)"', page))) == 2
+    assert len(set(re.findall(r'id="(trend-\d+)"', page))) == 8
+    assert "v1.0.0" in page and "v1.1.0" in page
+
+def test_dashboard_3_history(tmp_path):
+    """Test that runs of earlier builds are shown from the cache after their logs are deleted"""
+    output = str(tmp_path / "dashboard.html")
+    for i, version in enumerate(["v1.0.0", "v1.1.0", "v1.2.0"]):
+        # Like CI, which deletes outcomes/ and reuses LOG_FILENAME for every run
+        for f in (tmp_path / "outcomes").glob("*"):
+            f.unlink()
+        write_run(tmp_path / "outcomes" / "log", version, t0=1000.0 + i * 3600)
+        dashboard = Dashboard(str(tmp_path / "cache"))
+        dashboard.build([str(tmp_path / "outcomes" / "*.jsonl.*")], output)
+    assert dashboard.stats == {"extracted": 1, "cached": 0, "history": 2}
+    page = open(output).read()
+    assert len(set(re.findall(r'id="(timeline-\w+)"', page))) == 3
+    assert all(version in page for version in ["v1.0.0", "v1.1.0", "v1.2.0"])
+
+    dashboard = Dashboard(str(tmp_path / "cache"))
+    dashboard.build([str(tmp_path / "outcomes" / "*.jsonl.*")], output, history=1)
+    assert dashboard.stats == {"extracted": 0, "cached": 1, "history": 1}
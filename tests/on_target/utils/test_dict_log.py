@@ -0,0 +1,98 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import json
+import base64
+import struct
+
+import pytest
+from utils.dict_log import DictLogDecoder
+from utils.uart import UartDict
+from utils.virtual_dut import VirtualDut
+
+RODATA_START = 0x10000
+RODATA = (
+    b"Modem FW: %s\0"                   # 0x10000
+    b"mfw_nrf91x1_2.0.2\0"              # 0x1000d
+    b"Connected after %d ms, %lld B\0"  # 0x1001f
+    b"rsrp %.1f dBm\0"                  # 0x1003d
+)
+FMT_MODEM = 0x10000
+STR_MFW = 0x1000D
+FMT_CONN = 0x1001F
+FMT_RSRP = 0x1003D
+
+
+@pytest.fixture
+def dictionary(tmp_path):
+    path = tmp_path / "log_dictionary.json"
+    path.write_text(json.dumps({
+        "target": {"bits": 32, "little_endianness": True},
+        "kconfigs": {"CONFIG_SYS_CLOCK_HW_CYCLES_PER_SEC": 1000},
+        "sections": {"rodata": {"start": RODATA_START, "end": RODATA_START + len(RODATA),
+                                "data_b64": base64.b64encode(RODATA).decode()}},
+        "log_subsys": {"log_instances": {"0x2000": {"source_id": 3, "name": "nrf_cloud_info"}}},
+    }))
+    return str(path)
+
+def frame(fmt_ptr, args=b"", strings=(), level=3, source=3, ts=1234):
+    """Normal message with a cbprintf package, strings are (word index, bytes)"""
+    words = (8 + len(args)) // 4
+    pkg = struct.pack("<BBBBI", words, len(strings), 0, 0, fmt_ptr) + args
+    for idx, s in strings:
+        pkg += bytes([idx]) + s + b"\0"
+    return struct.pack("<BBHHII", 0, level << 3, len(pkg), 0, source, ts) + pkg
+
+def test_dict_1_decode(dictionary):
+    """Test argument types, rodata and packaged strings, dropped messages"""
+    decoder = DictLogDecoder(dictionary)
+    data = (
+        frame(FMT_MODEM, struct.pack("<I", STR_MFW))
+        + frame(FMT_MODEM, struct.pack("<I", 0), strings=[(2, b"mfw_copied")])
+        # long long is 8 byte aligned after the 4 byte int at offset 8
+        + frame(FMT_CONN, struct.pack("<i4xq", 250, 1 << 40))
+        + frame(FMT_RSRP, struct.pack("<d", -98.25), level=4)
+        + struct.pack("<BH", 1, 7)
+    )
+    assert list(decoder.feed(data)) == [
+        "[00:00:01.234,000] <inf> nrf_cloud_info: Modem FW: mfw_nrf91x1_2.0.2",
+        "[00:00:01.234,000] <inf> nrf_cloud_info: Modem FW: mfw_copied",
+        f"[00:00:01.234,000] <inf> nrf_cloud_info: Connected after 250 ms, {1 << 40} B",
+        "[00:00:01.234,000] <dbg> nrf_cloud_info: rsrp -98.2 dBm",
+        "--- 7 messages dropped ---",
+    ]
+    assert decoder.stats["dropped"] == 7
+
+def test_dict_2_stream(dictionary):
+    """Test that frames split across reads and garbage before a frame are handled"""
+    decoder = DictLogDecoder(dictionary)
+    data = b"\xff\x42" + frame(FMT_MODEM, struct.pack("<I", STR_MFW))
+    lines = []
+    for i in range(len(data)):
+        lines += decoder.feed(data[i:i + 1])
+    assert lines == ["[00:00:01.234,000] <inf> nrf_cloud_info: Modem FW: mfw_nrf91x1_2.0.2"]
+    assert decoder.stats["resyncs"] == 2
+
+    # A frame cut by a disconnect is dropped instead of swallowing the next one
+    assert list(decoder.feed(data[2:20])) == []
+    decoder.reset()
+    assert len(list(decoder.feed(data[2:]))) == 1
+
+def test_dict_3_hex(dictionary):
+    """Test hex encoded output with the ZLOGV1 marker"""
+    decoder = DictLogDecoder(dictionary, hex_encoded=True)
+    data = b"boot\r\n##ZLOGV1##" + frame(FMT_MODEM, struct.pack("<I", STR_MFW)).hex().encode() + b"\r\n"
+    assert list(decoder.feed(data)) == ["[00:00:01.234,000] <inf> nrf_cloud_info: Modem FW: mfw_nrf91x1_2.0.2"]
+
+def test_dict_4_uart(dictionary):
+    """Test that UartDict feeds decoded lines to the usual waiters"""
+    with VirtualDut() as dut:
+        uart = UartDict(dut.port, dictionary, timeout=60)
+        try:
+            assert uart.opened.wait(5)
+            dut.inject_garbage(frame(FMT_MODEM, struct.pack("<I", STR_MFW)) * 100)
+            uart.wait_for_str("nrf_cloud_info: Modem FW: mfw_nrf91x1_2.0.2", timeout=5)
+        finally:
+            uart.stop()
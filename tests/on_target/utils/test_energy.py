@@ -0,0 +1,62 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import json
+
+import numpy as np
+import pytest
+from utils.energy import charge_between, operation_energy, check_baselines, update_baselines, compare
+
+
+def capture(markers, current=lambda t: np.full_like(t, 1000.0)):
+    """1 kHz windows over 10 s, UART markers at the given times"""
+    t = np.arange(0, 10, 0.001)
+    lines = [(m, "<inf> sample: Sent Hello World message with ID: 1") for m in markers]
+    return {
+        "time": t,
+        "mean": current(t),
+        "mark_time": np.array([1.0]),
+        "mark_name": np.array(["cloud_connect"]),
+        "mark_kind": np.array(["end"]),
+        "uart_time": np.array([x[0] for x in lines]),
+        "uart_line": np.array([x[1] for x in lines]),
+    }
+
+def test_energy_1_charge():
+    """Test vectorized integration over many intervals"""
+    t = np.arange(0, 10, 0.001)
+    current = np.where(t < 5, 1000.0, 3000.0)
+    charge = charge_between(t, current, [0, 5, 4.5], [1, 6, 5.5])
+    assert charge == pytest.approx([1000, 3000, 2000], rel=1e-2)
+
+def test_energy_2_operations():
+    """Test energy per operation from phase mark and UART markers"""
+    result = operation_energy(capture([3.0, 5.0, 7.0]), r"Sent Hello World message", voltage_mv=3700)
+    assert result["count"] == 3
+    assert result["duration_s"] == pytest.approx(2.0)
+    assert result["charge_uc"] == pytest.approx(2000, rel=1e-3)
+    assert result["energy_uj"] == pytest.approx(7400, rel=1e-3)
+    assert result["avg_current_ua"] == pytest.approx(1000, rel=1e-3)
+    assert operation_energy(capture([]), r"Sent Hello", voltage_mv=3700) == {"count": 0}
+
+def test_energy_3_baselines(tmp_path):
+    """Test regression detection against stored baselines and comparison"""
+    results = {
+        "device_message/coap/thingy91x/prod": {"count": 3, "energy_uj": 1050.0},
+        "device_message/mqtt/thingy91x/prod": {"count": 3, "energy_uj": 1500.0},
+    }
+    path = tmp_path / "baselines.json"
+    path.write_text(json.dumps({
+        "device_message/coap/thingy91x/prod": {"energy_uj": 1000.0},
+        "device_message/mqtt/thingy91x/prod": {"energy_uj": 1000.0, "tolerance": 0.6},
+    }))
+    assert check_baselines(results, str(path)) == []
+    assert len(check_baselines(results, str(path), tolerance=0.01)) == 1
+    assert compare(results, "device_message/coap/thingy91x/prod")["device_message/mqtt/thingy91x/prod"] == pytest.approx(1.4286, rel=1e-3)
+
+    update_baselines(results, str(path))
+    baselines = json.loads(path.read_text())
+    assert baselines["device_message/coap/thingy91x/prod"] == {"energy_uj": 1050.0}
+    assert baselines["device_message/mqtt/thingy91x/prod"]["tolerance"] == 0.6
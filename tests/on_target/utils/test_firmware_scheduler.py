@@ -0,0 +1,72 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import types
+from unittest.mock import patch
+
+import utils.flash_tools as flash_tools
+from utils.firmware_scheduler import order_items, count_flashes
+
+
+def item(name, fixtures, slow=False, skip=False):
+    markers = {"slow": slow or None, "skip": skip or None}
+    return types.SimpleNamespace(
+        nodeid=name,
+        fixturenames=["request", *fixtures],
+        get_closest_marker=lambda marker: markers.get(marker),
+    )
+
+def names(items):
+    return [x.nodeid for x in items]
+
+def test_order_1_groups_by_image():
+    """Test that tests sharing a hex file run back to back, app FOTA last"""
+    items = [
+        item("coap_msg", ["dut_cloud", "coap_device_message_hex_file"]),
+        item("coap_app_fota", ["dut_fota", "coap_fota_hex_file", "coap_fota_test_zip_file"]),
+        item("rest_msg", ["dut_cloud", "rest_device_message_hex_file"]),
+        item("coap_loc", ["dut_cloud", "coap_device_message_hex_file"]),
+        item("coap_mfw_fota", ["dut_fota", "coap_fota_hex_file"], slow=True),
+        item("unit", []),
+    ]
+    ordered = order_items(items)
+    assert names(ordered) == ["unit", "rest_msg", "coap_msg", "coap_loc", "coap_mfw_fota", "coap_app_fota"]
+    assert count_flashes(items) == 5
+    assert count_flashes(ordered) == 3
+
+def test_order_2_durations():
+    """Test that measured durations order tests within and across groups"""
+    items = [
+        item("a_slow", ["a_hex_file"]),
+        item("a_fast", ["a_hex_file"]),
+        item("b", ["b_hex_file"]),
+    ]
+    ordered = order_items(items, {"a_slow": 100, "a_fast": 1, "b": 500})
+    assert names(ordered) == ["a_fast", "a_slow", "b"]
+
+def test_order_3_skipped_not_counted():
+    """Test that tests skipped at collection don't count as image changes"""
+    items = [
+        item("a", ["a_hex_file"]),
+        item("b_missing", ["b_hex_file"], skip=True),
+        item("a2", ["a_hex_file"]),
+    ]
+    assert count_flashes(items) == 1
+
+@patch.object(flash_tools, "SKIP_REFLASH", True)
+@patch.object(flash_tools, "reset_device")
+@patch.object(flash_tools, "flash_device_jlink")
+def test_flash_1_skip_reflash(flash_device_jlink, reset_device, tmp_path):
+    """Test that an image already on the device is not flashed again until invalidated"""
+    hexfile = tmp_path / "merged.hex"
+    hexfile.write_text(":00000001FF\n")
+    flash_tools._flashed_images.clear()
+    flash_tools.flash_device(str(hexfile), serial="123")
+    flash_tools.flash_device(str(hexfile), serial="123")
+    assert flash_device_jlink.call_count == 1
+    reset_device.assert_called_once_with("123")
+    flash_tools.invalidate_flash_cache("123")
+    flash_tools.flash_device(str(hexfile), serial="123")
+    assert flash_device_jlink.call_count == 2
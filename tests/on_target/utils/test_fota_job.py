@@ -0,0 +1,81 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import time
+import functools
+
+import pytest
+from utils.fota_job import FotaJobTracker, FotaJobError
+from utils.nrfcloud import NRFCloudFOTA
+from utils.uart import Uart
+from utils.virtual_dut import VirtualDut
+from utils.test_nrfcloud_server import server, cloud_for, DEVICE_ID
+
+BUNDLE_ID = "APP*1234abcd*1.0.0"
+
+
+def test_fota_job_1_uart_first(server):
+    """Test that UART evidence advances the job before the cloud does"""
+    fota = cloud_for(server, NRFCloudFOTA)
+    job_id = fota.create_fota_job(DEVICE_ID, BUNDLE_ID)
+    with VirtualDut() as dut:
+        uart = Uart(dut.port, timeout=60)
+        try:
+            tracker = FotaJobTracker(functools.partial(fota.get_fota_status, job_id), uart=uart, job_id=job_id)
+            # Boot banner before the download is not the reboot into the update
+            dut.send(["*** Booting nRF Connect SDK ***", "fota_download: Downloading update"], delay=0.2)
+            start = time.time()
+            tracker.wait_for("IN_PROGRESS", timeout=10)
+            assert time.time() - start < 2
+            assert tracker.reached["IN_PROGRESS"][1] == "uart"
+            assert "REBOOTED" not in tracker.reached
+
+            dut.send(["Download complete", "*** Booting nRF Connect SDK ***"])
+            tracker.wait_for("REBOOTED", timeout=10)
+            # The device log never completes the job, the cloud status has to
+            with pytest.raises(FotaJobError, match="Timeout awaiting FOTA job COMPLETED"):
+                tracker.wait_for("COMPLETED", timeout=0.5)
+            fota.patch_execution_state(DEVICE_ID, job_id, "SUCCEEDED")
+            tracker.wait_for("COMPLETED", timeout=10)
+        finally:
+            uart.stop()
+    result = tracker.finish()
+    assert result["sources"] == {"CREATED": "cloud", "IN_PROGRESS": "uart", "DOWNLOADED": "uart",
+                                 "REBOOTED": "uart", "COMPLETED": "cloud"}
+    assert list(result["latencies"]) == ["IN_PROGRESS", "DOWNLOADED", "REBOOTED", "COMPLETED"]
+    assert uart.line_listeners == []
+
+def test_fota_job_2_cloud_only_completed():
+    """Test that COMPLETED can not be taken from the device log"""
+    with pytest.raises(ValueError, match="COMPLETED"):
+        FotaJobTracker(lambda: "QUEUED", evidence=[("COMPLETED", r"1\.0\.0-fotatest", "IN_PROGRESS")])
+
+def test_fota_job_3_cloud(server):
+    """Test cloud only tracking, skipped states and failed jobs"""
+    server.backend.fota_step = 0.3
+    fota = cloud_for(server, NRFCloudFOTA)
+    job_id = fota.create_fota_job(DEVICE_ID, BUNDLE_ID)
+    tracker = FotaJobTracker(functools.partial(fota.get_fota_status, job_id))
+    tracker.wait_for("COMPLETED", timeout=10)
+    assert tracker.reached["DOWNLOADED"][1] == "implied"
+
+    server.backend.fota_step = None
+    job_id = fota.create_fota_job(DEVICE_ID, BUNDLE_ID)
+    tracker = FotaJobTracker(functools.partial(fota.get_fota_status, job_id))
+    fota.cancel_fota_job(job_id)
+    with pytest.raises(FotaJobError, match="CANCELLED"):
+        tracker.wait_for("IN_PROGRESS", timeout=10)
+
+def test_fota_job_4_post(server):
+    """Test that post_fota_job returns as soon as the job is in progress and retries otherwise"""
+    server.backend.fota_step = 0.2
+    fota = cloud_for(server, NRFCloudFOTA)
+    start = time.time()
+    job_id = fota.post_fota_job(DEVICE_ID, BUNDLE_ID)
+    assert job_id and time.time() - start < 3
+
+    server.backend.fota_step = None
+    assert fota.post_fota_job(DEVICE_ID, BUNDLE_ID, timeout=0.5) is None
+    assert len(server.backend.jobs) == 1
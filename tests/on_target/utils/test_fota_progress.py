@@ -0,0 +1,77 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import json
+import time
+
+import pytest
+from utils.fota_progress import FotaProgress, FotaStallError
+from utils.uart import Uart
+from utils.virtual_dut import VirtualDut
+
+
+def test_fota_progress_1_throughput(tmp_path):
+    """Test throughput, restarts and milestones from progress lines"""
+    progress = FotaProgress("app", "coap")
+    t0 = progress.created
+    progress.add_cloud_status("IN_PROGRESS", t0 + 2)
+    progress.on_line(t0 + 5, "fota_download: Downloading update")
+    for i in range(11):
+        progress.on_line(t0 + 10 + i, f"fota_download: Downloaded {i * 4096}/40960 bytes ({i * 10}%)")
+    summary = progress.finish(str(tmp_path / "fota.json"))
+    assert summary["size"] == 40960
+    assert summary["download_s"] == 10
+    assert summary["bytes_per_s"] == 4096
+    assert summary["min_bytes_per_s"] == summary["max_bytes_per_s"] == 4096
+    assert summary["completed"]
+    assert summary["milestones"] == {"cloud:IN_PROGRESS": 2, "uart:download_start": 5, "uart:first_progress": 10}
+    saved = json.load(open(tmp_path / "fota.json"))
+    assert len(saved["samples"]) == 11
+
+    # Resumed download from an earlier offset
+    progress = FotaProgress("mfw_full", "rest")
+    for t, offset in [(0, 0), (1, 1000), (2, 2000), (3, 1000), (4, 3000)]:
+        progress.on_line(t0 + t, f"Downloaded {offset}/100000 bytes (1%)")
+    assert progress.restarts == 1
+    assert progress.summary()["bytes"] == 4000
+
+def test_fota_progress_2_stall():
+    """Test that a stall is detected after the download started, not before"""
+    progress = FotaProgress("mfw_delta", "mqtt", stall_timeout=30)
+    now = time.time()
+    assert not progress.stalled(now + 1000)
+    progress.on_line(now, "Download progress: 10%")
+    progress.on_line(now + 20, "Download progress: 20%")
+    # Repeated progress without new bytes does not count
+    progress.on_line(now + 40, "Download progress: 20%")
+    assert not progress.stalled(now + 45)
+    assert progress.stalled(now + 51)
+
+    progress = FotaProgress("app", "rest", stall_timeout=0.1)
+    progress.on_line(time.time(), "Downloaded 1024/40960 bytes (2%)")
+    time.sleep(0.2)
+    with pytest.raises(FotaStallError, match="stalled at 1024/40960"):
+        progress.check()
+
+    progress = FotaProgress("app", "rest")
+    progress.on_line(time.time(), "fota_download: FOTA download failed")
+    with pytest.raises(FotaStallError, match="failed on the device"):
+        progress.check()
+
+def test_fota_progress_3_uart(tmp_path):
+    """Test that progress is parsed from an attached Uart"""
+    progress = FotaProgress("app", "coap")
+    with VirtualDut() as dut:
+        uart = Uart(dut.port, timeout=60)
+        try:
+            progress.attach(uart)
+            dut.send([f"Downloaded {i * 1024}/4096 bytes ({i * 25}%)" for i in range(5)], delay=0.05)
+            uart.wait_for_str("Downloaded 4096/4096", timeout=5)
+        finally:
+            uart.stop()
+    summary = progress.finish(str(tmp_path / "fota.json"))
+    assert progress.offset == 4096
+    assert summary["completed"]
+    assert uart.line_listeners == []
@@ -0,0 +1,43 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import pytest
+from utils.fota_rollout import FotaRollout, FotaRolloutAborted, wave_slices
+from utils.nrfcloud import NRFCloudFOTA
+from utils.test_nrfcloud_server import server, cloud_for
+
+BUNDLE_ID = "APP*1234abcd*1.0.0"
+FLEET = [f"nrf-3526561000000{i:02d}" for i in range(20)]
+
+
+def test_rollout_1_waves():
+    """Test wave sizes from counts and cumulative fractions"""
+    assert wave_slices(20, [1, 0.25, 1.0]) == [(0, 1), (1, 5), (5, 20)]
+    assert wave_slices(20, [5]) == [(0, 5), (5, 20)]
+    assert wave_slices(2, [1, 0.1, 1.0]) == [(0, 1), (1, 2)]
+
+def test_rollout_2_run(server):
+    """Test that all waves run as multi-device jobs"""
+    server.backend.fota_step = 0.1
+    fota = cloud_for(server, NRFCloudFOTA)
+    rollout = FotaRollout(fota, BUNDLE_ID, FLEET, waves=[2, 0.5, 1.0], max_concurrency=4, poll_interval=0.05)
+    reports = rollout.run()
+    assert [r["devices"] for r in reports] == [2, 8, 10]
+    assert all(r["succeeded"] == r["devices"] and not r["aborted"] for r in reports)
+    assert set(rollout.results.values()) == {"SUCCEEDED"}
+    jobs = list(server.backend.jobs.values())
+    assert [len(j["target"]["deviceIds"]) for j in jobs] == [2, 8, 10]
+
+def test_rollout_3_abort(server):
+    """Test that a wave above the failure threshold stops the rollout"""
+    server.backend.fota_step = 0.1
+    server.backend.fota_failures = set(FLEET[2:5])
+    fota = cloud_for(server, NRFCloudFOTA)
+    rollout = FotaRollout(fota, BUNDLE_ID, FLEET, waves=[2, 0.5, 1.0], failure_threshold=0.2, poll_interval=0.05)
+    with pytest.raises(FotaRolloutAborted, match="wave 1: 3 of 8 devices failed"):
+        rollout.run()
+    assert len(rollout.reports) == 2
+    assert list(rollout.results.values()).count("NOT_STARTED") == 10
+    assert len(server.backend.jobs) == 2
@@ -0,0 +1,90 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import random
+
+import pytest
+from intelhex import IntelHex
+
+from utils import hex_cache
+from utils.hex_cache import load_hex, parse_hex, HexFormatError
+
+
+@pytest.fixture(autouse=True)
+def clear_memo():
+    hex_cache._images.clear()
+    yield
+    hex_cache._images.clear()
+
+def make_hex(path):
+    ih = IntelHex()
+    rnd = random.Random(42)
+    ih.frombytes(bytes(rnd.randrange(256) for _ in range(70000)), offset=0x8000)
+    ih.frombytes(bytes(rnd.randrange(256) for _ in range(300)), offset=0x000FFF00)
+    ih.frombytes(bytes(range(40)), offset=0x00FF8000)
+    ih.tofile(str(path), format="hex")
+    return ih
+
+def test_parse_1_matches_intelhex(tmp_path):
+    """Test that segments and data match IntelHex, including extended linear addresses"""
+    ih = make_hex(tmp_path / "a.hex")
+    segments = parse_hex((tmp_path / "a.hex").read_bytes())
+    assert [(s, s + len(d)) for s, d in segments] == ih.segments()
+    for start, data in segments:
+        assert data.tobytes() == ih.tobinstr(start=start, size=len(data))
+
+def test_parse_2_segment_address_and_order():
+    """Test extended segment address records and records out of address order"""
+    lines = [":020000021234B6", ":0400000001020304F2", ":020000020000FC", ":020010000506E3", ":00000001FF"]
+    segments = parse_hex("\r\n".join(lines).encode())
+    assert [(s, d.tobytes()) for s, d in segments] == [(0x10, b"\x05\x06"), (0x12340, b"\x01\x02\x03\x04")]
+
+def test_parse_3_errors():
+    """Test that malformed records, bad checksums and overlaps raise HexFormatError"""
+    with pytest.raises(HexFormatError, match="checksum"):
+        parse_hex(b":0400000001020304F3\n:00000001FF\n")
+    with pytest.raises(HexFormatError, match="byte count"):
+        parse_hex(b":0500000001020304F2\n:00000001FF\n")
+    with pytest.raises(HexFormatError, match="':'"):
+        parse_hex(b"0400000001020304F2\n")
+    with pytest.raises(HexFormatError, match="hex digits"):
+        parse_hex(b":04000000010203ZZF2\n")
+    with pytest.raises(HexFormatError, match="overlapping"):
+        parse_hex(b":0400000001020304F2\n:0400020001020304F0\n:00000001FF\n")
+
+def test_load_1_cache_reused(tmp_path):
+    """Test that the second load maps the cache file instead of parsing"""
+    make_hex(tmp_path / "a.hex")
+    cache = tmp_path / "cache"
+    parsed = hex_cache.STATS["parsed"]
+    mapped = hex_cache.STATS["mapped"]
+    first = load_hex(str(tmp_path / "a.hex"), str(cache))
+    assert hex_cache.STATS["parsed"] == parsed + 1
+    assert load_hex(str(tmp_path / "a.hex"), str(cache)) is first
+
+    hex_cache._images.clear()
+    second = load_hex(str(tmp_path / "a.hex"), str(cache))
+    assert hex_cache.STATS["mapped"] == mapped + 1
+    assert second.sha256 == first.sha256 and second.digest == first.digest
+    assert second.checksums() == first.checksums()
+    assert [(s, d.tobytes()) for s, d in second.segments] == [(s, d.tobytes()) for s, d in first.segments]
+
+def test_load_2_range(tmp_path):
+    """Test that range() clips segments to the flash and UICR regions"""
+    ih = make_hex(tmp_path / "a.hex")
+    image = load_hex(str(tmp_path / "a.hex"), str(tmp_path / "cache"))
+    flash = image.range(0x00000000, 0x00100000)
+    assert [(s, len(d)) for s, d in flash] == [(0x8000, 70000), (0x000FFF00, 256)]
+    assert flash[1][1].tobytes() == ih.tobinstr(start=0x000FFF00, size=256)
+    assert [(s, len(d)) for s, d in image.range(0x00FF8000, 0x00FF9000)] == [(0x00FF8000, 40)]
+
+def test_load_3_digest_ignores_formatting(tmp_path):
+    """Test that the content digest is the same for differently formatted files"""
+    ih = make_hex(tmp_path / "a.hex")
+    ih.write_hex_file(str(tmp_path / "b.hex"), byte_count=32)
+    a = load_hex(str(tmp_path / "a.hex"), str(tmp_path / "cache"))
+    b = load_hex(str(tmp_path / "b.hex"), str(tmp_path / "cache"))
+    assert a.sha256 != b.sha256
+    assert a.digest == b.digest
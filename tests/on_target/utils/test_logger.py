@@ -0,0 +1,70 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import re
+import uuid
+import logging
+import threading
+
+from utils import logger as logger_module
+from utils.logger import get_logger, flush_logging, log_device_line, ColoredFormatter, WRITER_THREAD_NAME
+
+
+def read_log_file():
+    flush_logging()
+    path = logger_module._writer.file_handler.baseFilename
+    with open(path) as f:
+        return f.read()
+
+def test_logger_1_idempotent():
+    """Test that repeated get_logger() calls don't add handlers"""
+    first = get_logger()
+    second = get_logger()
+    assert first is second
+    assert len(first.handlers) == 1
+
+def test_logger_2_no_duplicate_writes():
+    """Test that a line is written once to the log file"""
+    get_logger()
+    logger = get_logger()
+    marker = uuid.uuid4().hex
+    logger.debug(f"marker {marker}")
+    assert read_log_file().count(marker) == 1
+
+def test_logger_3_single_writer_thread():
+    """Test that loggers of different modules share one writer thread"""
+    get_logger()
+    before = set(threading.enumerate())
+    loggers = []
+    for i in range(3):
+        # get_logger() names the logger after the calling file
+        namespace = {"get_logger": get_logger}
+        exec(compile("logger = get_logger('INFO')", f"module_{i}.py", "exec"), namespace)
+        loggers.append(namespace["logger"])
+    assert len({id(x) for x in loggers}) == 3
+    assert set(threading.enumerate()) == before
+    writers = [t for t in threading.enumerate() if t.name == WRITER_THREAD_NAME]
+    assert len(writers) == 1
+
+def test_logger_4_lazy_args():
+    """Test that %-style arguments are formatted on the way to the writer"""
+    logger = get_logger()
+    marker = uuid.uuid4().hex
+    logger.info("lazy %s %d", marker, 42)
+    assert f"lazy {marker} 42" in read_log_file()
+
+def test_logger_5_device_line_format():
+    """Test that log_device_line() writes the same format as logger.debug() from uart"""
+    marker = uuid.uuid4().hex
+    log_device_line("", f"nrf_cloud_info: {marker}")
+    line = [x for x in read_log_file().splitlines() if marker in x][0]
+    assert re.match(rf"^\d{{4}}-\d\d-\d\d \d\d:\d\d:\d\d:uart:DEBUG:: nrf_cloud_info: {marker}$", line)
+
+def test_logger_6_colored_formatter_restores_record():
+    """Test that ColoredFormatter doesn't leak colors into other handlers"""
+    record = logging.LogRecord("x", logging.WARNING, __file__, 1, "message", None, None)
+    formatted = ColoredFormatter("%(levelname)s:%(message)s").format(record)
+    assert ColoredFormatter.COLORED["WARNING"] in formatted
+    assert record.levelname == "WARNING"
@@ -0,0 +1,102 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import os
+import json
+import time
+import threading
+
+import pytest
+from utils.message_observer import MessageBuffer, MessageObserver, _broker_address
+from utils.test_nrfcloud_server import server, cloud_for, DEVICE_ID
+
+# Local broker (e.g. Mosquitto) for the end to end test, skipped if unset
+MQTT_TEST_BROKER = os.getenv("MQTT_TEST_BROKER")
+
+
+def test_buffer_1_index():
+    """Test that messages are indexed by device and appId, newest first"""
+    buffer = MessageBuffer()
+    buffer.add("a", {"appId": "TEMP", "data": "1"}, t=10)
+    buffer.add("a", {"appId": "HELLO", "data": "2"}, t=20)
+    buffer.add("b", {"appId": "TEMP", "data": "3"}, t=30)
+    assert [m["data"] for _, m in buffer.get("a")] == ["2", "1"]
+    assert [m["data"] for _, m in buffer.get("a", "TEMP")] == ["1"]
+    assert [m["data"] for _, m in buffer.get(app_id="TEMP")] == ["3", "1"]
+    assert [m["data"] for _, m in buffer.get(since=15)] == ["3", "2"]
+
+def test_buffer_2_dedupe_and_limit():
+    """Test that a message seen over MQTT and REST is stored once and the oldest are dropped"""
+    buffer = MessageBuffer(max_messages=2)
+    assert buffer.add("a", {"appId": "TEMP", "data": "1"}, t=10, source="mqtt")
+    assert not buffer.add("a", {"appId": "TEMP", "data": "1"}, t=11, source="rest")
+    assert buffer.stats["duplicates"] == 1
+    buffer.add("a", {"appId": "TEMP", "data": "2"}, t=12)
+    buffer.add("a", {"appId": "HELLO", "data": "3"}, t=13)
+    assert [m["data"] for _, m in buffer.get("a")] == ["3", "2"]
+
+def test_buffer_3_wait_seq():
+    """Test that a message added between a check and the wait ends the wait at once"""
+    buffer = MessageBuffer()
+    seq = buffer.seq
+    buffer.add("a", {"appId": "TEMP", "data": "1"})
+    start = time.time()
+    buffer.wait(5, seq)
+    assert time.time() - start < 1
+    start = time.time()
+    buffer.wait(0.2)
+    assert time.time() - start >= 0.2
+
+def test_observer_1_rest_fallback(server):
+    """Test that wait_for() polls REST without a broker and finds a message sent later"""
+    observer = MessageObserver(cloud_for(server), broker=None, poll_interval=0.1).start()
+    start = time.time()
+    server.add_message(DEVICE_ID, {"appId": "HELLO", "sample_message": "old"}, received_at=start - 60)
+    timer = threading.Timer(0.3, server.add_message, (DEVICE_ID, {"appId": "HELLO", "sample_message": "Hello World"}))
+    timer.start()
+    try:
+        found = observer.wait_for(DEVICE_ID, "HELLO", predicate=lambda m: "Hello" in m["sample_message"],
+                                  since=start, timeout=5)
+    finally:
+        timer.cancel()
+        observer.stop()
+    assert found[1]["sample_message"] == "Hello World"
+    assert not observer.push
+    assert observer.buffer.stats["polls"] >= 2
+    assert observer.wait_for(DEVICE_ID, "OTHER", since=start, timeout=0.3) is None
+
+def test_observer_2_on_message():
+    """Test that messages on nRF Cloud device topics are added to the buffer"""
+    mqtt = pytest.importorskip("paho.mqtt.client")
+    observer = MessageObserver(cloud=None, broker=None)
+    msg = mqtt.MQTTMessage(topic=f"prod/team/m/d/{DEVICE_ID}/d2c".encode())
+    msg.payload = json.dumps({"appId": "TEMP", "data": "21.5"}).encode()
+    observer.on_message(None, None, msg)
+    other = mqtt.MQTTMessage(topic=b"prod/team/a/connections")
+    other.payload = b"{}"
+    observer.on_message(None, None, other)
+    assert [m["data"] for _, m in observer.buffer.get(DEVICE_ID, "TEMP")] == ["21.5"]
+    assert observer.buffer.stats["mqtt"] == 1
+    assert _broker_address("localhost:8883") == ("localhost", 8883)
+    assert _broker_address("localhost") == ("localhost", 1883)
+
+@pytest.mark.skipif(not MQTT_TEST_BROKER, reason="MQTT_TEST_BROKER not set")
+def test_observer_3_broker(server):
+    """Test that a message published to the broker is pushed to wait_for()"""
+    mqtt = pytest.importorskip("paho.mqtt.client")
+    observer = MessageObserver(cloud_for(server), broker=MQTT_TEST_BROKER, topic="test/+/m/#").start()
+    try:
+        assert observer.connected.wait(5)
+        publisher = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        publisher.connect(*_broker_address(MQTT_TEST_BROKER))
+        publisher.loop_start()
+        publisher.publish(f"test/team/m/d/{DEVICE_ID}/d2c", json.dumps({"appId": "HELLO", "data": "pushed"}), qos=1)
+        found = observer.wait_for(DEVICE_ID, "HELLO", timeout=5)
+        publisher.loop_stop()
+        publisher.disconnect()
+    finally:
+        observer.stop()
+    assert found[1]["data"] == "pushed"
+    assert observer.buffer.stats["mqtt"] == 1
@@ -0,0 +1,77 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+from unittest.mock import patch
+
+import pytest
+import nrf91_flasher
+from nrf91_flasher import parse_modem_version, modem_verify_needed, save_modem_cache, load_modem_cache, read_modem_version
+from utils.virtual_dut import VirtualDut
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(nrf91_flasher, "MODEM_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+def test_parse_modem_version_1_log_line():
+    """Test that parse_modem_version() finds version in "Modem FW:" log line"""
+    log = "nrf_cloud_info: Modem FW:      mfw_nrf91x1_2.0.2\n"
+    assert parse_modem_version(log) == "mfw_nrf91x1_2.0.2"
+
+def test_parse_modem_version_2_last_match():
+    """Test that parse_modem_version() returns the latest version in the log"""
+    log = "Modem FW: mfw_nrf9160_1.3.6\nCGMR\nmfw_nrf9160_1.3.6-FOTA-TEST\nOK\n"
+    assert parse_modem_version(log) == "mfw_nrf9160_1.3.6-FOTA-TEST"
+
+def test_parse_modem_version_3_zip_name():
+    """Test that parse_modem_version() works for modem zip file names"""
+    assert parse_modem_version("mfw_nrf91x1_2.0.3.zip") == "mfw_nrf91x1_2.0.3"
+    assert parse_modem_version("firmware.zip") is None
+
+def test_verify_needed_1_empty_cache():
+    """Test that verify is needed when nothing is cached"""
+    assert modem_verify_needed("123", "abc", "mfw_nrf91x1_2.0.3")
+
+def test_verify_needed_2_cached():
+    """Test that verify is skipped when hash and device version match the cache"""
+    save_modem_cache("123", "abc", "mfw_nrf91x1_2.0.3")
+    assert not modem_verify_needed("123", "abc", "mfw_nrf91x1_2.0.3")
+    assert modem_verify_needed("123", "abc", "mfw_nrf91x1_2.0.3", force_verify=True)
+    assert modem_verify_needed("123", "abc", None)
+
+def test_verify_needed_3_mismatch():
+    """Test that verify is needed when zip, device version or probe differ"""
+    save_modem_cache("123", "abc", "mfw_nrf91x1_2.0.3")
+    assert modem_verify_needed("123", "def", "mfw_nrf91x1_2.0.3")
+    assert modem_verify_needed("123", "abc", "mfw_nrf91x1_2.0.2")
+    assert modem_verify_needed("456", "abc", "mfw_nrf91x1_2.0.3")
+
+def test_cache_clear():
+    """Test that save_modem_cache() without hash clears the entry"""
+    save_modem_cache("123", "abc", "mfw_nrf91x1_2.0.3")
+    save_modem_cache("123")
+    assert load_modem_cache("123") == {}
+
+@patch.object(nrf91_flasher, "ModemUpdater")
+@patch.object(nrf91_flasher, "ConnectHelper")
+def test_bringup_1_second_skips_verify(connect, updater, tmp_path):
+    """Test that a second bring-up with the version read from the device skips the verify"""
+    connect.session_with_chosen_probe.return_value.__enter__.return_value.probe.unique_id = "123"
+    modem = tmp_path / "mfw_nrf91x1_2.0.2.zip"
+    modem.write_bytes(b"modem")
+    with VirtualDut() as dut:
+        for _ in range(2):
+            version = read_modem_version(dut.port)
+            nrf91_flasher.nrf91_flasher(modem=str(modem), uid="123", modem_version=version)
+    assert version == "mfw_nrf91x1_2.0.2"
+    assert updater.return_value.verify.call_count == 1
+    updater.return_value.program_and_verify.assert_not_called()
+
+def test_bringup_2_no_answer():
+    """Test that a device not answering AT+CGMR gives no version, so the verify runs"""
+    with VirtualDut(at_responses=[]) as dut:
+        assert read_modem_version(dut.port, timeout=0.3) is None
+    assert read_modem_version("/nonexistent/port") is None
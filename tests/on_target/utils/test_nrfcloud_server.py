@@ -0,0 +1,102 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import json
+import time
+import zipfile
+
+import pytest
+from requests.exceptions import HTTPError
+from utils.nrfcloud import NRFCloud, NRFCloudFOTA
+from utils.nrfcloud_server import NRFCloudServer
+
+DEVICE_ID = "nrf-352656100000000"
+
+
+@pytest.fixture
+def server():
+    with NRFCloudServer() as s:
+        s.add_device(DEVICE_ID, reported={"device": {"deviceInfo": {"appVersion": "1.0.0"}}})
+        yield s
+
+def cloud_for(server, cls=NRFCloud):
+    return cls(api_key="test", url=server.url, provisioning_url=server.url)
+
+def test_server_1_device_shadow(server):
+    """Test that device shadow can be fetched and patched"""
+    cloud = cloud_for(server)
+    assert cloud.get_device(DEVICE_ID)["state"]["reported"]["device"]["deviceInfo"]["appVersion"] == "1.0.0"
+    cloud.patch_update_interval(DEVICE_ID, 60)
+    assert cloud.get_device(DEVICE_ID)["state"]["desired"]["config"]["update_interval"] == 60
+    with pytest.raises(HTTPError):
+        cloud.get_device("unknown")
+
+def test_server_2_messages(server):
+    """Test that get_messages() filters by time, device and appId"""
+    cloud = cloud_for(server)
+    server.add_message(DEVICE_ID, {"appId": "HELLO", "sample_message": "old"}, received_at=time.time() - 600)
+    server.add_message(DEVICE_ID, {"appId": "HELLO", "sample_message": "new"})
+    server.add_message("other", {"appId": "HELLO", "sample_message": "other"})
+    messages = cloud.get_messages(DEVICE_ID, appname="HELLO", start=time.time() - 60)
+    assert [x[1]["sample_message"] for x in messages] == ["new"]
+
+def test_server_3_pagination(server):
+    """Test that list responses are paginated and client follows pageNextToken"""
+    server.page_limit = 2
+    fota = cloud_for(server, NRFCloudFOTA)
+    for i in range(5):
+        server.add_firmware(f"MFW full: 2.0.{i}", "modem", f"2.0.{i}")
+    assert fota.list_mfw_bundles()["pageNextToken"] == "2"
+    assert fota.get_mfw_bundle_by_name("MFW full: 2.0.4").startswith("MODEM*")
+
+def test_server_4_rate_limit(server):
+    """Test that every n-th request is answered with 429"""
+    server.rate_limit_every = 2
+    cloud = cloud_for(server)
+    cloud.get_device(DEVICE_ID)
+    with pytest.raises(HTTPError) as ex_info:
+        cloud.get_device(DEVICE_ID)
+    assert ex_info.value.response.status_code == 429
+    assert server.stats["throttled"] == 1
+
+def test_server_5_fota_job(server, tmp_path):
+    """Test that FOTA jobs progress and can be cancelled"""
+    server.backend.fota_step = 0.05
+    fota = cloud_for(server, NRFCloudFOTA)
+    zip_path = tmp_path / "dfu_application.zip"
+    with zipfile.ZipFile(zip_path, "w") as z:
+        z.writestr("app_update.bin", b"\x00" * 16)
+        z.writestr("manifest.json", json.dumps({"files": [{"file": "app_update.bin", "type": "application"}]}))
+    bundle_id = fota.upload_zephyr_zip(str(zip_path), version="1.0.0-fotatest")
+    assert bundle_id.startswith("APP*")
+    job_id = fota.create_fota_job(DEVICE_ID, bundle_id)
+    time.sleep(0.2)
+    assert fota.get_fota_status(job_id) == "COMPLETED"
+    job_id = fota.create_fota_job(DEVICE_ID, bundle_id)
+    fota.cancel_fota_job(job_id)
+    assert fota.get_fota_status(job_id) == "CANCELLED"
+
+def test_server_6_claim(server):
+    """Test that provisioning endpoints are served"""
+    cloud = cloud_for(server)
+    cloud.claim_device("token")
+    device_id = next(iter(server.backend.claimed))
+    cloud.add_provisioning_command(device_id, json.dumps({"request": {}}))
+    assert cloud.unclaim_device(device_id) == 204
+
+def test_server_7_replay(server, tmp_path):
+    """Test that replay mode serves cassette responses with latency"""
+    cassette = tmp_path / "cassette.json"
+    cassette.write_text(json.dumps({"interactions": [{
+        "method": "GET", "path": f"/devices/{DEVICE_ID}", "query": {}, "status": 200,
+        "headers": {"Content-Type": "application/json"}, "body": json.dumps({"id": DEVICE_ID}),
+    }]}))
+    with NRFCloudServer(mode="replay", cassette=str(cassette), latency=0.05) as replay:
+        cloud = cloud_for(replay)
+        start = time.time()
+        assert cloud.get_device(DEVICE_ID)["id"] == DEVICE_ID
+        assert time.time() - start >= 0.05
+        with pytest.raises(HTTPError):
+            cloud.get_device("unknown")
@@ -0,0 +1,52 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import time
+
+import numpy as np
+from utils.power_capture import PowerCapture, SimulatedSource, decimate, load
+from utils.uart import Uart
+from utils.virtual_dut import VirtualDut
+
+
+def test_power_1_decimate():
+    """Test min/max/mean per window with leftover samples"""
+    mins, maxs, means, rest = decimate(np.arange(10.0), 4)
+    assert list(mins) == [0, 4]
+    assert list(maxs) == [3, 7]
+    assert list(means) == [1.5, 5.5]
+    assert list(rest) == [8, 9]
+
+def test_power_2_capture(tmp_path):
+    """Test capture from the simulated source with phases and UART lines"""
+    with VirtualDut() as dut:
+        uart = Uart(dut.port, timeout=60)
+        try:
+            with PowerCapture(SimulatedSource(rate=10000), window=10, capacity=4096) as power:
+                power.attach_uart(uart)
+                with power.phase("flash"):
+                    time.sleep(0.3)
+                dut.send("Connected to LTE")
+                uart.wait_for_str("Connected to LTE", timeout=5)
+                time.sleep(1.0)
+        finally:
+            uart.stop()
+
+    windows = power.windows()
+    # 10 kHz in windows of 10 samples, about 1000 windows per second
+    assert 1000 < len(windows) < 3000
+    assert np.all(np.diff(windows[:, 0]) > 0)
+    assert windows[:, 2].max() > 40000
+    assert np.median(windows[:, 3]) < 10
+    assert [m[1:] for m in power.marks] == [("flash", "start"), ("flash", "end"), ("attach", "end")]
+    assert power.uart_lines[0][1] == "Connected to LTE"
+    # First samples may arrive shortly after the phase started
+    assert windows[0, 0] - 0.01 <= power.marks[0][0] <= windows[-1, 0]
+
+    paths = power.save(str(tmp_path / "power"))
+    saved = load(paths[0])
+    assert len(saved["mean"]) == len(windows)
+    assert list(saved["mark_name"]) == ["flash", "flash", "attach"]
+    assert list(saved["uart_line"]) == ["Connected to LTE"]
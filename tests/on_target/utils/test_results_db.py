@@ -0,0 +1,63 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import numpy as np
+from utils.results_db import ResultsDB, detect_regressions, change_point
+from utils.test_dashboard import write_run, TEST
+
+SHORT_TEST = "tests/test_functional/test_uart_output.py::test_device_message"
+
+
+def add_build(db, version, start, metrics):
+    db.add_run({
+        "run": f"outcomes/{version}", "artifact_version": version, "device_type": "thingy91x", "stage": "prod",
+        "start": start, "metrics": [[f"thingy91x::prod::{SHORT_TEST}", m, v] for m, v in metrics.items()],
+    })
+
+def test_results_1_ingest(tmp_path):
+    """Test that runs are imported once and keyed without the node ID prefix"""
+    write_run(tmp_path / "run1" / "log", "v1.0.0")
+    with ResultsDB(str(tmp_path / "results.db")) as db:
+        assert db.ingest([str(tmp_path / "*" / "*.jsonl.*")]) == 1
+        assert db.ingest([str(tmp_path / "*" / "*.jsonl.*")]) == 0
+        series = db.series()
+    assert series[("thingy91x", "prod", SHORT_TEST, "attach")] == [("v1.0.0", 42.0)]
+    assert TEST.endswith(SHORT_TEST)
+
+def test_results_2_percentile_shift():
+    """Test that a slower build is flagged and noise is not"""
+    rng = np.random.default_rng(1)
+    with ResultsDB(":memory:") as db:
+        for i in range(10):
+            add_build(db, f"v{i}", i, {"attach": 30 + rng.normal(0, 1), "flash": 20 + rng.normal(0, 1)})
+        add_build(db, "v10", 10, {"attach": 45.0, "flash": 20.5})
+        regressions = detect_regressions(db.series())
+        assert [(r["metric"], r["build"], r["method"]) for r in regressions] == [("attach", "v10", "percentile_shift")]
+        assert detect_regressions(db.series(), version="v5") == []
+
+def test_results_3_change_point():
+    """Test a step change that is still flagged when it is no longer a percentile shift"""
+    values = np.array([10.0, 10.2, 9.9, 10.1, 10.0, 12.5, 12.6, 12.4, 12.5, 12.4])
+    split, t = change_point(values)
+    assert split == 5 and t > 10
+    with ResultsDB(":memory:") as db:
+        for i, v in enumerate(values):
+            add_build(db, f"v{i}", i, {"fota": v})
+        regressions = detect_regressions(db.series())
+        assert [(r["build"], r["method"]) for r in regressions] == [("v9", "change_point")]
+        assert abs(regressions[0]["baseline"] - 10.04) < 0.01
+
+def test_results_4_same_prefix(tmp_path):
+    """Test that runs written to the same log prefix are kept as separate runs"""
+    with ResultsDB(str(tmp_path / "results.db")) as db:
+        for i, version in enumerate(["v1.0.0", "v1.0.1"]):
+            # Like CI, which deletes outcomes/ and reuses LOG_FILENAME for every run
+            for f in (tmp_path / "outcomes").glob("*"):
+                f.unlink()
+            write_run(tmp_path / "outcomes" / "log", version, t0=1000.0 + i * 3600, attach=12.0 + i)
+            assert db.ingest([str(tmp_path / "outcomes" / "*.jsonl.*")]) == 1
+        assert db.builds() == ["v1.0.0", "v1.0.1"]
+        series = db.series()
+    assert series[("thingy91x", "prod", SHORT_TEST, "attach")] == [("v1.0.0", 42.0), ("v1.0.1", 43.0)]
@@ -0,0 +1,51 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import os
+import time
+import threading
+
+import pytest
+from utils.serial_registry import SerialRegistry
+from utils.uart import Uart
+from utils.virtual_dut import VirtualDut
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_registry_1_find(tmp_path, use_inotify):
+    """Test that find() returns as soon as a matching port appears in a new directory"""
+    registry = SerialRegistry(use_inotify=use_inotify)
+    directory = tmp_path / "by-id"
+    port = directory / "usb-Nordic_Semiconductor_Thingy_91_X_ABC123-if00"
+
+    def plug():
+        time.sleep(0.2)
+        directory.mkdir()
+        os.symlink("/dev/null", port)
+    threading.Thread(target=plug).start()
+
+    start = time.time()
+    assert registry.find("ABC123", str(directory), timeout=5) == str(port)
+    assert time.time() - start < 1
+    assert registry.find("XYZ", str(directory), timeout=0.1) is None
+
+def test_registry_2_uart_reconnect():
+    """Test that Uart reopens a re-enumerated port and keeps the partial line"""
+    with VirtualDut() as dut:
+        uart = Uart(dut.port, timeout=60)
+        try:
+            dut.send("before")
+            uart.wait_for_str("before", timeout=5)
+            dut.inject_garbage(b"partial ")
+            dut.wait_idle()
+            time.sleep(0.2)
+            dut.disconnect(duration=0.5)
+            # Opening a port drops input buffered before, send after the reopen
+            dut.send("line", delay=1.0)
+            uart.wait_for_str("partial line", timeout=10)
+            assert len(uart.reconnects) == 1
+            assert uart.reconnects[0]["latency"] < 2
+        finally:
+            uart.stop()
@@ -0,0 +1,80 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import json
+import threading
+
+import pytest
+from utils.shadow import APP_VERSION, lookup, diff_paths
+from utils.test_nrfcloud_server import server, cloud_for, DEVICE_ID
+
+
+def report_version(cloud, version):
+    data = json.dumps({"reported": {"device": {"deviceInfo": {"appVersion": version}}}})
+    cloud._patch(f"/devices/{DEVICE_ID}/state", data=data)
+
+def test_shadow_1_conditional(server):
+    """Test that an unchanged shadow is answered with 304 and served from the cache"""
+    cloud = cloud_for(server)
+    shadow = cloud.shadow(DEVICE_ID)
+    assert cloud.shadow(DEVICE_ID) is shadow
+    assert shadow.get(APP_VERSION) == "1.0.0"
+    size = shadow.stats["bytes"]
+    assert size > 0 and shadow.etag
+
+    assert shadow.get(APP_VERSION) == "1.0.0"
+    assert shadow.stats["not_modified"] == 1
+    assert shadow.stats["bytes"] == size
+    assert shadow.stats["bytes_saved"] == size
+
+    report_version(cloud, "2.0.0")
+    changed = shadow.fetch()
+    assert ("state", "reported", "device", "deviceInfo", "appVersion") in changed
+    assert ("state", "version") in changed
+    assert shadow.get(APP_VERSION) == "2.0.0"
+    assert shadow.stats["requests"] == 4
+
+def test_shadow_2_without_etags(server):
+    """Test that changes are found by diffing when the server sends no ETag"""
+    server.backend.etags = False
+    cloud = cloud_for(server)
+    shadow = cloud.shadow(DEVICE_ID)
+    assert shadow.fetch() == [()]
+    assert shadow.etag is None
+    assert shadow.fetch() == []
+    assert shadow.stats["not_modified"] == 0
+    report_version(cloud, "2.0.0")
+    assert ("state", "reported", "device", "deviceInfo", "appVersion") in shadow.fetch()
+
+def test_shadow_3_watch(server):
+    """Test that watch() yields the field on every change and ends at the timeout"""
+    cloud = cloud_for(server)
+    shadow = cloud.shadow(DEVICE_ID)
+    timer = threading.Timer(0.3, report_version, (cloud_for(server), "2.0.0"))
+    timer.start()
+    try:
+        values = []
+        for value in shadow.watch(APP_VERSION, interval=0.05, timeout=1.0):
+            values.append(value)
+            if value == "2.0.0":
+                break
+    finally:
+        timer.cancel()
+    assert values == ["1.0.0", "2.0.0"]
+    assert shadow.stats["not_modified"] > 0
+
+    assert list(shadow.watch("state.reported.missing", interval=0.05, timeout=0.2)) == [None]
+
+def test_shadow_4_lookup_and_diff():
+    """Test field lookup by path and diffing of documents"""
+    doc = {"state": {"reported": {"a": 1, "b": {"c": 2}}}}
+    assert lookup(doc, "state.reported.b.c") == 2
+    assert lookup(doc, ("state", "reported", "a")) == 1
+    assert lookup(doc, "state.desired.a", None) is None
+    with pytest.raises(KeyError):
+        lookup(doc, "state.reported.a.x")
+    new = {"state": {"reported": {"a": 1, "b": {"c": 3}, "d": 4}}}
+    assert sorted(diff_paths(doc, new)) == [("state", "reported", "b", "c"), ("state", "reported", "d")]
+    assert diff_paths(doc, doc) == []
@@ -0,0 +1,63 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import time
+
+import numpy as np
+from utils.sleep_analyzer import analyze, SleepAnalyzer
+
+
+def psm_trace(seconds=600, rate=1000, period=10.0, floor=3.0, seed=0):
+    """1 ms windows, 3 uA floor with a 200 ms 40 mA wakeup every period"""
+    rng = np.random.default_rng(seed)
+    t = 1000.0 + np.arange(seconds * rate) / rate
+    current = np.where(((t - 1000.0) % period) < 0.2, 40000.0, floor) + rng.normal(0, 0.2, len(t))
+    return {"time": t, "mean": current}
+
+def test_sleep_1_report():
+    """Test floor, wakeups and time in state of a PSM like trace"""
+    report = analyze(psm_trace())
+    assert 2.5 < report["floor_ua"] < 3.5
+    assert report["wakeups"] == 60
+    assert abs(report["wakeups_per_hour"] - 360) < 1
+    assert abs(report["idle_s_median"] - 9.8) < 0.01
+    assert abs(report["active_s_median"] - 0.2) < 0.01
+    assert abs(report["idle_fraction"] - 0.98) < 0.001
+    assert abs(report["avg_current_ua"] - (0.02 * 40000 + 0.98 * 3)) < 5
+    assert sum(report["active_duration_hist"]) == 60
+    assert report["outliers"] == []
+
+def test_sleep_2_chunks():
+    """Test that chunk boundaries do not change the result"""
+    trace = psm_trace(seconds=60)
+    whole = analyze(trace, threshold_ua=100)
+    chunked = analyze(trace, threshold_ua=100, chunk_size=777)
+    for key in ("wakeups", "idle_s_median", "active_s_median", "floor_ua"):
+        assert chunked[key] == whole[key]
+    assert abs(chunked["avg_current_ua"] - whole["avg_current_ua"]) < 1e-6
+
+def test_sleep_3_outliers():
+    """Test short idle gaps, a missed PSM period and a long active period"""
+    trace = psm_trace(seconds=300)
+    t = trace["time"] - 1000.0
+    current = trace["mean"]
+    # 5 ms dip within a wakeup is not a sleep period
+    current[(t >= 50.1) & (t < 50.105)] = 3.0
+    # PSM not entered for one period, long activity in another
+    current[(t >= 100.2) & (t < 110.0)] = 90.0
+    current[(t >= 200.0) & (t < 203.0)] = 40000.0
+    report = analyze(trace, threshold_ua=100)
+    assert report["wakeups"] == 30
+    kinds = {(o["kind"], round(o["start"] - 1000.0, 1)) for o in report["outliers"]}
+    assert kinds == {("idle_current", 100.2), ("active_duration", 200.0)}
+
+def test_sleep_4_speed():
+    """Test that an hour of 1 ms windows is analysed in seconds"""
+    trace = psm_trace(seconds=3600)
+    start = time.monotonic()
+    analyzer = SleepAnalyzer(threshold_ua=100)
+    analyzer.feed(trace["time"], trace["mean"])
+    assert analyzer.report()["wakeups"] == 360
+    assert time.monotonic() - start < 5
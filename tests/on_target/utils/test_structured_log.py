@@ -0,0 +1,60 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import pytest
+from utils.structured_log import StructuredLog, iter_records, list_files
+
+
+def write_records(prefix, n=1000, **kwargs):
+    log = StructuredLog(str(prefix), **kwargs)
+    for i in range(n):
+        log.write({"ts": i, "type": "uart" if i % 2 else "log", "test": f"test_{i // 100}", "line": f"line {i}"})
+    log.close()
+    return log
+
+def test_structured_1_roundtrip(tmp_path):
+    """Test that records are read back in order"""
+    write_records(tmp_path / "log")
+    records = list(iter_records(str(tmp_path / "log.*")))
+    assert [x["ts"] for x in records] == list(range(1000))
+    assert list_files(str(tmp_path / "log"))[0].endswith(".000.jsonl.gz")
+
+def test_structured_2_rotation(tmp_path):
+    """Test that files are rotated by size and read in rotation order"""
+    log = write_records(tmp_path / "log", n=20000, max_bytes=16 * 1024)
+    files = list_files(str(tmp_path / "log"))
+    assert len(files) == log.index + 1 > 2
+    assert [x["ts"] for x in iter_records(files)] == list(range(20000))
+
+def test_structured_3_filters(tmp_path):
+    """Test that type, test, time and substring filters are applied"""
+    write_records(tmp_path / "log", compression="none")
+    pattern = str(tmp_path / "log.*")
+    assert len(list(iter_records(pattern, types="uart"))) == 500
+    assert len(list(iter_records(pattern, test="test_3"))) == 100
+    assert len(list(iter_records(pattern, since=10, until=20))) == 10
+    assert [x["ts"] for x in iter_records(pattern, contains="line 999")] == [999]
+
+def test_structured_4_unknown_compression(tmp_path):
+    """Test that unknown compression is rejected"""
+    with pytest.raises(ValueError):
+        StructuredLog(str(tmp_path / "log"), compression="lz4")
+
+def test_structured_5_truncated_gzip(tmp_path):
+    """Test that a .gz without end-of-stream marker is read up to the damage and the next file still is"""
+    write_records(tmp_path / "a", n=5000)
+    write_records(tmp_path / "b", n=10)
+    truncated = list_files(str(tmp_path / "a"))[0]
+    with open(truncated, "rb+") as f:
+        # Without the trailer, like a file of a killed run
+        f.truncate(f.seek(0, 2) - 8)
+    records = list(iter_records([str(tmp_path / "a.*"), str(tmp_path / "b.*")]))
+    assert [x["ts"] for x in records] == list(range(5000)) + list(range(10))
+
+    with open(truncated, "rb+") as f:
+        f.truncate(f.seek(0, 2) // 2)
+    records = list(iter_records([str(tmp_path / "a.*"), str(tmp_path / "b.*")]))
+    assert 0 < len(records) - 10 < 5000
+    assert [x["ts"] for x in records[-10:]] == list(range(10))
@@ -0,0 +1,72 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import os
+import time
+
+from utils.trace_index import TraceIndex, save_trace, read_window, extract_window, index_path
+from utils.uart import UartBinary, UartBinaryView
+from utils.virtual_dut import VirtualDut
+
+
+def make_trace(tmp_path, seconds=100, rate=1000):
+    """One byte value per second of capture, rate bytes every second"""
+    index = TraceIndex()
+    data = bytearray()
+    for t in range(seconds):
+        index.add(1000.0 + t, len(data))
+        data += bytes([t]) * rate
+    path = str(tmp_path / "trace.bin")
+    save_trace(path, bytes(data), index)
+    return path
+
+def test_index_1_window(tmp_path):
+    """Test that a window is read and extracted without the rest of the trace"""
+    path = make_trace(tmp_path)
+    window = read_window(path, 1010.0, 1040.0)
+    assert window == b"".join(bytes([t]) * 1000 for t in range(10, 40))
+
+    output = str(tmp_path / "window.bin")
+    assert extract_window(path, output, 1010.5, 1012.0) == 2000
+    index = TraceIndex.load(index_path(output))
+    assert list(index.offsets) == [0, 1000]
+    assert read_window(output, 1011.0) == bytes([11]) * 1000
+
+def test_index_2_decimation():
+    """Test that entries are added at most every interval or 64 kB"""
+    index = TraceIndex()
+    for i in range(100):
+        index.add(1000.0 + i * 0.01, i * 100)
+    assert len(index) == 10
+    index.add(1001.0, 200 * 1024)
+    assert len(index) == 11
+
+def test_index_3_uart_binary(tmp_path):
+    """Test that UartBinary and its views save traces with an index"""
+    with VirtualDut() as dut:
+        traces = UartBinary(dut.port, timeout=60, serial_timeout=0.1)
+        try:
+            assert traces.opened.wait(5)
+            dut.inject_garbage(b"\x01" * 1000)
+            dut.wait_idle()
+            deadline = time.time() + 5
+            while traces.get_size() < 1000 and time.time() < deadline:
+                time.sleep(0.01)
+            assert traces.get_size() == 1000
+            view = UartBinaryView(traces)
+            dut.inject_garbage(b"\x02" * 500)
+            deadline = time.time() + 5
+            while view.get_size() < 500 and time.time() < deadline:
+                time.sleep(0.01)
+            assert view.get_size() == 500
+            view.stop()
+        finally:
+            traces.stop()
+    path = str(tmp_path / "trace.bin")
+    view.save_to_file(path)
+    assert open(path, "rb").read() == b"\x02" * 500
+    index = TraceIndex.load(index_path(path))
+    assert index.offsets[0] == 0
+    assert os.path.getsize(path) == 500
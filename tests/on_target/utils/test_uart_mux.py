@@ -0,0 +1,91 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import time
+import pytest
+from utils.uart import Uart
+from utils.uart_mux import UartMux, MuxClient, mux_port_url, mux_request, mux_subscribe_lines, parse_port
+from utils.virtual_dut import VirtualDut
+
+
+@pytest.fixture
+def dut():
+    with VirtualDut() as d:
+        yield d
+
+@pytest.fixture
+def mux(dut):
+    with UartMux([dut.port]) as m:
+        yield m
+
+def wait_for_clients(mux, port, count, timeout=5):
+    start = time.time()
+    while len(mux.get_stats()[port]["clients"]) < count:
+        assert time.time() - start < timeout, "Mux clients not connected"
+        time.sleep(0.01)
+
+def test_mux_1_fan_out(dut, mux):
+    """Test that two Uart instances see the same stream through the mux"""
+    url = mux_port_url(mux.control_address, dut.port)
+    uarts = [Uart(url, timeout=60), Uart(url, timeout=60)]
+    try:
+        lines = mux_subscribe_lines(mux.control_address, dut.port)
+        wait_for_clients(mux, dut.port, 3)
+        dut.replay([(0, "Connected to LTE"), (0, "nrf_cloud_coap_transport: Authorized")], speed=None)
+        for uart in uarts:
+            uart.wait_for_str_ordered(["Connected to LTE", "Authorized"], timeout=5)
+        assert next(lines) == "Connected to LTE"
+    finally:
+        for uart in uarts:
+            uart.stop()
+
+def test_mux_2_write(dut, mux):
+    """Test that writes through the mux reach the device and answers reach all clients"""
+    url = mux_port_url(mux.control_address, dut.port)
+    writer, watcher = Uart(url, timeout=60), Uart(url, timeout=60)
+    try:
+        wait_for_clients(mux, dut.port, 2)
+        writer.at_cmd_write("AT+CGMR")
+        watcher.wait_for_str("mfw_nrf91x1_2.0.2", timeout=5)
+        assert "AT+CGMR" in dut.commands
+    finally:
+        writer.stop()
+        watcher.stop()
+    stats = mux_request(mux.control_address, {"cmd": "stats"})[dut.port]
+    assert stats["writes"] >= 1
+    assert stats["bytes_in"] > 0
+
+def test_mux_3_bounded_buffer():
+    """Test that a slow client drops its oldest data instead of growing"""
+    class StuckConn:
+        def sendall(self, data):
+            raise OSError("not expected")
+        def shutdown(self, how):
+            pass
+        def close(self):
+            pass
+    client = MuxClient(StuckConn(), "stuck", max_buffer=100)
+    client.closed.set()
+    for _ in range(10):
+        client.send(b"x" * 30)
+    assert client.buffered <= 100
+    assert client.stats["dropped_bytes"] == 300 - client.buffered
+
+def test_mux_4_invalid_request(mux):
+    """Test that unknown control requests are answered with an error"""
+    assert "error" in mux_request(mux.control_address, {"cmd": "unknown"})
+
+def test_mux_5_baudrate_per_port():
+    """Test that every port gets its own baudrate and clients can set it"""
+    assert parse_port("/dev/ttyACM1@1000000") == ("/dev/ttyACM1", 1000000)
+    assert parse_port("socket://127.0.0.1:5000") == ("socket://127.0.0.1:5000", None)
+    with VirtualDut() as log_dut, VirtualDut() as trace_dut:
+        with UartMux([log_dut.port, f"{trace_dut.port}@1000000"]) as m:
+            assert m.ports[log_dut.port]._serial.baudrate == 115200
+            assert m.ports[trace_dut.port]._serial.baudrate == 1000000
+            mux_port_url(m.control_address, log_dut.port, baudrate=230400)
+            assert m.ports[log_dut.port]._serial.baudrate == 230400
+        with UartMux({trace_dut.port: 1000000}) as m:
+            assert m.ports[trace_dut.port].baudrate == 1000000
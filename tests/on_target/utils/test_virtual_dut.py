@@ -0,0 +1,81 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+import pytest
+from utils.uart import Uart, UartView
+from utils.virtual_dut import VirtualDut, load_log
+
+
+@pytest.fixture
+def dut():
+    with VirtualDut() as d:
+        yield d
+
+@pytest.fixture
+def uart(dut):
+    u = Uart(dut.port, timeout=60)
+    # Opening the port flushes its input, the DUT must not write before
+    assert u.opened.wait(5)
+    yield u
+    u.stop()
+
+def test_vdut_1_replay(dut, uart):
+    """Test that replayed lines reach the Uart log in order"""
+    dut.replay([(0, "Connected to LTE"), (0.1, "nrf_cloud_info: Modem FW: mfw_nrf91x1_2.0.2")], speed=10)
+    uart.wait_for_str_ordered(["Connected to LTE", "Modem FW:"], timeout=5)
+
+def test_vdut_2_at_command(dut, uart):
+    """Test that AT commands written by Uart are answered"""
+    uart.at_cmd_write("AT+CGMR")
+    assert "mfw_nrf91x1_2.0.2" in uart.log
+    assert "AT+CGMR" in dut.commands
+
+def test_vdut_3_garbage(dut, uart):
+    """Test that undecodable bytes don't stop the Uart reader"""
+    dut.inject_garbage(64)
+    dut.inject_burst(["after garbage"])
+    uart.wait_for_str("after garbage", timeout=5)
+
+def test_vdut_4_views(dut, uart):
+    """Test that per-test views of a session Uart only see their own lines"""
+    first = UartView(uart)
+    dut.send("first test")
+    first.wait_for_str("first test", timeout=5)
+    first.stop()
+    dut.send("between tests")
+    uart.wait_for_str("between tests", timeout=5)
+    assert "between tests" not in first.whole_log
+    first.release()
+
+    second = UartView(uart)
+    dut.send("second test")
+    second.wait_for_str("second test", timeout=5)
+    second.stop()
+    assert "first test" not in second.whole_log
+    assert "first test" not in uart.whole_log
+    assert "second test" in second.whole_log
+    with pytest.raises(RuntimeError):
+        second.wait_for_str("never sent", timeout=1)
+
+def test_vdut_5_load_log(tmp_path):
+    """Test that load_log() keeps timing of harness debug logs"""
+    log = tmp_path / "log_debug.txt"
+    log.write_text(
+        "2025-01-01 12:00:00:uart:DEBUG:: first\n"
+        "2025-01-01 12:00:00:conftest:INFO:Starting test\n"
+        "2025-01-01 12:00:03:uart:DEBUG:: second: with colon\n"
+    )
+    assert load_log(str(log)) == [(0.0, "first"), (3.0, "second: with colon")]
+
+def test_vdut_6_inject_ahead_of_replay(dut, uart):
+    """Test that injected lines don't wait for pending replay lines and are recorded"""
+    dut.replay([(0, "first"), (60, "much later")])
+    uart.wait_for_str("first", timeout=5)
+    dut.inject_burst(["burst 1", "burst 2"])
+    uart.wait_for_str_ordered(["burst 1", "burst 2"], timeout=5)
+    assert [line for _, line in dut.sent] == ["first", "burst 1", "burst 2"]
+    assert dut.stats["lines"] == 3
+    assert dut.stats["bytes"] == len(b"first\r\nburst 1\r\nburst 2\r\n")
+    assert "much later" not in uart.log
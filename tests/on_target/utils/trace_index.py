@@ -0,0 +1,177 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Time index for modem trace captures.
+
+UartBinary records the host time and byte offset of the received data while
+capturing and saves it next to the trace as <trace>.bin.idx. Time windows can
+then be cut out of multi-GB captures without reading or decoding the whole file:
+
+    python utils/trace_index.py outcomes/trace_test_coap_mfw_full_fota.bin --info
+    python utils/trace_index.py outcomes/trace_test_coap_mfw_full_fota.bin \\
+        --start 1735732800 --duration 30 -o window.bin
+    nrfutil trace lte --input-file window.bin --output-pcapng window.pcapng
+
+Times are seconds since epoch like the log and JSON-lines outcome timestamps.
+Windows start at an entry boundary, at most INDEX_INTERVAL seconds before the
+requested start.
+"""
+
+import os
+import sys
+import time
+import struct
+import bisect
+import argparse
+from array import array
+from typing import Iterator, Optional, Tuple
+
+MAGIC = b"TRIDX1\0\0"
+ENTRY = struct.Struct("<dQ")
+# An entry is added at most every INDEX_INTERVAL seconds or INDEX_BYTES bytes
+INDEX_INTERVAL = 0.1
+INDEX_BYTES = 64 * 1024
+COPY_CHUNK = 1024 * 1024
+
+
+def index_path(trace_path: str) -> str:
+    return trace_path + ".idx"
+
+
+class TraceIndex:
+    def __init__(self) -> None:
+        # Host time and offset of the first byte received at that time
+        self.times = array("d")
+        self.offsets = array("Q")
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def add(self, t: float, offset: int) -> None:
+        """ Record data received at time t starting at offset, decimated """
+        if self.times and t - self.times[-1] < INDEX_INTERVAL and offset - self.offsets[-1] < INDEX_BYTES:
+            return
+        self.times.append(t)
+        self.offsets.append(offset)
+
+    def discard_before(self, offset: int) -> None:
+        """ Drop entries before offset, keeping the one covering it """
+        i = bisect.bisect_right(self.offsets, offset) - 1
+        if i > 0:
+            del self.times[:i]
+            del self.offsets[:i]
+
+    def slice(self, start: int, end: int = None) -> "TraceIndex":
+        """ Index of data[start:end] with offsets relative to start """
+        result = TraceIndex()
+        first = max(bisect.bisect_right(self.offsets, start) - 1, 0)
+        last = len(self.offsets) if end is None else bisect.bisect_left(self.offsets, end)
+        for i in range(first, last):
+            result.times.append(self.times[i])
+            result.offsets.append(max(self.offsets[i], start) - start)
+        return result
+
+    def range_for(self, start: float = None, end: float = None, size: int = None) -> Tuple[int, Optional[int]]:
+        """
+        Byte range covering the time window [start, end)
+
+        :param size: Size of the trace, returned as end of range instead of None
+        """
+        first = 0
+        if start is not None and self.times:
+            first = self.offsets[max(bisect.bisect_right(self.times, start) - 1, 0)]
+        last = size
+        if end is not None:
+            i = bisect.bisect_left(self.times, end)
+            if i < len(self.offsets):
+                last = self.offsets[i]
+        return first, last
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            entries = bytearray(ENTRY.size * len(self))
+            for i in range(len(self)):
+                ENTRY.pack_into(entries, ENTRY.size * i, self.times[i], self.offsets[i])
+            f.write(entries)
+
+    @classmethod
+    def load(cls, path: str) -> "TraceIndex":
+        index = cls()
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a trace index")
+            data = f.read()
+        for t, offset in ENTRY.iter_unpack(data[:len(data) // ENTRY.size * ENTRY.size]):
+            index.times.append(t)
+            index.offsets.append(offset)
+        return index
+
+    @property
+    def start_time(self) -> Optional[float]:
+        return self.times[0] if self.times else None
+
+    @property
+    def end_time(self) -> Optional[float]:
+        return self.times[-1] if self.times else None
+
+
+def save_trace(path: str, data: bytes, index: TraceIndex = None) -> None:
+    """ Write a trace and its index """
+    with open(path, "wb") as f:
+        f.write(data)
+    if index is not None and len(index):
+        index.save(index_path(path))
+
+def iter_window(trace_path: str, start: float = None, end: float = None, chunk_size: int = COPY_CHUNK) -> Iterator[bytes]:
+    """ Stream the bytes received in [start, end) from a trace with index """
+    size = os.path.getsize(trace_path)
+    first, last = TraceIndex.load(index_path(trace_path)).range_for(start, end, size)
+    with open(trace_path, "rb") as f:
+        f.seek(first)
+        remaining = last - first
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def read_window(trace_path: str, start: float = None, end: float = None) -> bytes:
+    return b"".join(iter_window(trace_path, start, end))
+
+def extract_window(trace_path: str, output: str, start: float = None, end: float = None) -> int:
+    """ Copy the window to output, with its own index, returns the number of bytes """
+    index = TraceIndex.load(index_path(trace_path))
+    first, last = index.range_for(start, end, os.path.getsize(trace_path))
+    written = 0
+    with open(output, "wb") as f:
+        for chunk in iter_window(trace_path, start, end):
+            f.write(chunk)
+            written += len(chunk)
+    index.slice(first, last).save(index_path(output))
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cut time windows out of indexed modem traces")
+    parser.add_argument("trace", help="trace file with a .idx next to it")
+    parser.add_argument("--info", action="store_true", help="print time range and size")
+    parser.add_argument("--start", type=float, help="window start, seconds since epoch")
+    parser.add_argument("--end", type=float, help="window end, seconds since epoch")
+    parser.add_argument("--duration", type=float, help="window length in seconds, instead of --end")
+    parser.add_argument("-o", "--output", help="output trace file")
+    args = parser.parse_args()
+
+    index = TraceIndex.load(index_path(args.trace))
+    if args.info or not args.output:
+        fmt = lambda t: time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t)) if t else "-"
+        print(f"{args.trace}: {os.path.getsize(args.trace)} bytes, {len(index)} index entries, "
+              f"{fmt(index.start_time)} - {fmt(index.end_time)}")
+        sys.exit(0)
+    end = args.start + args.duration if args.duration is not None and args.start is not None else args.end
+    n = extract_window(args.trace, args.output, args.start, end)
+    print(f"Wrote {n} bytes to {args.output}")
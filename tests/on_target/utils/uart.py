@@ -11,7 +11,10 @@ import os
 import sys
 import re
 sys.path.append(os.getcwd())
-from utils.logger import get_logger
+from utils.logger import get_logger, log_device_line, log_event
+from utils.serial_registry import get_registry
+from utils.dict_log import DictLogDecoder
+from utils.trace_index import TraceIndex, save_trace
 from typing import Union
 
 DEFAULT_UART_TIMEOUT = 60 * 15
@@ -38,14 +41,26 @@ class Uart:
         self.serial_timeout = serial_timeout
         self.log = ""
         self.whole_log = ""
+        # {"time", "latency", "attempts"} for every reopen after a SerialException
+        self.reconnects = []
+        # Called with (time.time(), line) for every received line, e.g. by PowerCapture
+        self.line_listeners = []
+        # Absolute position of whole_log[0], advanced by discard_before()
+        self._base = 0
+        self._log_lock = threading.Lock()
+        # Set once the port is opened and its stale input flushed, writes to the DUT before are lost
+        self.opened = threading.Event()
         self._evt = threading.Event()
         self._writeq = queue.Queue()
         self._t = threading.Thread(target=self._uart)
         self._t.start()
-        self._selfdestruct = threading.Timer(
-            timeout , self.selfdestruct
-        )
-        self._selfdestruct.start()
+        # No self destruct timer for session-wide owners (timeout=None)
+        self._selfdestruct = None
+        if timeout is not None:
+            self._selfdestruct = threading.Timer(
+                timeout , self.selfdestruct
+            )
+            self._selfdestruct.start()
 
     def write(self, data: bytes) -> None:
         chunked = False
@@ -81,7 +96,7 @@ class Uart:
 
     def _uart(self) -> None:
         data = None
-        s = serial.Serial(
+        s = serial.serial_for_url(
             self.uart, baudrate=self.baudrate, timeout=self.serial_timeout
         )
 
@@ -89,54 +104,31 @@ class Uart:
             logger.warning(f"Uart {self.uart} has {s.in_waiting} bytes of unread data, resetting input buffer")
             s.reset_input_buffer()
 
-        if s.out_waiting:
+        # Not available for socket:// ports, e.g. behind the UART mux
+        if getattr(s, "out_waiting", 0):
             logger.warning(f"Uart {self.uart} has {s.out_waiting} bytes of unwritten data, resetting output buffer")
             s.reset_output_buffer()
+        self.opened.set()
 
         line = ""
         while not self._evt.is_set():
-            if not self._writeq.empty():
-                try:
-                    write_data, chunked = self._writeq.get_nowait()
-                    if isinstance(write_data, str):
-                        write_data = write_data.encode('utf-8')
-                    if chunked:
-                        # Write in chunks to avoid buffer overflows
-                        chunk_size = 16
-                        chunks = [write_data[i:i + chunk_size] for i in range(0, len(write_data), chunk_size)]
-                        for chunk in chunks:
-                            s.write(chunk)
-                            time.sleep(0.1)
-                    else:
-                        s.write(write_data)
-                    logger.debug(f"UART write {self.name}: {write_data}")
-                except queue.Empty:
-                    pass
+            self._process_writes(s)
 
             try:
                 read_byte = s.read(1)
                 data = read_byte.decode("utf-8")
             except UnicodeDecodeError:
-                logger.debug(f"{self.name}: Got unexpected UART value")
-                logger.debug(f"{self.name}: Not decodeable data: {hex(ord(read_byte))}")
+                logger.debug("%s: Got unexpected UART value", self.name)
+                logger.debug("%s: Not decodeable data: %s", self.name, hex(ord(read_byte)))
                 continue
             except serial.serialutil.SerialException:
                 logger.error(f"{self.name}: Caught SerialException, restarting")
                 s.close()
-                while True:
-                    if self._evt.is_set():
-                        return
-                    time.sleep(5)
-                    try:
-                        s = serial.Serial(
-                            self.uart,
-                            baudrate=self.baudrate,
-                            timeout=self.serial_timeout,
-                        )
-                    except FileNotFoundError:
-                        logger.warning(f"{self.uart} not available, retrying")
-                        continue
-                    break
+                self.opened.clear()
+                s = self._reconnect()
+                if s is None:
+                    return
+                # A partial line read before the disconnect is kept
                 continue
 
             if not data:
@@ -146,13 +138,67 @@ class Uart:
             if data != "\n":
                 continue
             # Full line received
-            line = line.strip()
-            logger.debug(f"{self.name}: {line}")
-            self.log = self.log + "\n" + line
-            self.whole_log = self.whole_log + "\n" + line
+            self._handle_line(line.strip())
             line = ""
         s.close()
 
+    def _process_writes(self, s: serial.Serial) -> None:
+        if self._writeq.empty():
+            return
+        try:
+            write_data, chunked = self._writeq.get_nowait()
+            if isinstance(write_data, str):
+                write_data = write_data.encode('utf-8')
+            if chunked:
+                # Write in chunks to avoid buffer overflows
+                chunk_size = 16
+                chunks = [write_data[i:i + chunk_size] for i in range(0, len(write_data), chunk_size)]
+                for chunk in chunks:
+                    s.write(chunk)
+                    time.sleep(0.1)
+            else:
+                s.write(write_data)
+            logger.debug("UART write %s: %s", self.name, write_data)
+        except queue.Empty:
+            pass
+
+    def _handle_line(self, line: str) -> None:
+        log_device_line(self.name, line)
+        with self._log_lock:
+            self.log = self.log + "\n" + line
+            self.whole_log = self.whole_log + "\n" + line
+        if self.line_listeners:
+            t = time.time()
+            for listener in self.line_listeners:
+                listener(t, line)
+
+    def _reconnect(self) -> serial.Serial:
+        # Reopen as soon as the port reappears, None if stopped meanwhile
+        lost = time.time()
+        attempts = 0
+        while not self._evt.is_set():
+            if "://" not in self.uart:
+                get_registry().wait_for_path(self.uart, timeout=1)
+            attempts += 1
+            try:
+                s = serial.serial_for_url(
+                    self.uart,
+                    baudrate=self.baudrate,
+                    timeout=self.serial_timeout,
+                )
+            except (serial.serialutil.SerialException, OSError) as e:
+                logger.debug("%s not available, retrying: %s", self.uart, e)
+                # Port exists but can't be opened yet, e.g. udev still setting permissions
+                self._evt.wait(0.05 if "://" not in self.uart else 1)
+                continue
+            latency = time.time() - lost
+            self.reconnects.append({"time": lost, "latency": latency, "attempts": attempts})
+            logger.info(f"{self.name}: reconnected to {self.uart} after {latency:.3f} s")
+            log_event("uart_reconnect", name=self.name, port=self.uart, latency=latency, attempts=attempts)
+            self.opened.set()
+            return s
+        return None
+
     def flush(self) -> None:
         self.log = ""
 
@@ -161,23 +207,47 @@ class Uart:
         self.stop()
 
     def stop(self) -> None:
-        self._selfdestruct.cancel()
+        if self._selfdestruct:
+            self._selfdestruct.cancel()
         self._evt.set()
         self._t.join()
+        self.opened.clear()
 
     def start(self, timeout: int = DEFAULT_UART_TIMEOUT) -> None:
         # Start the UART thread after it has been stopped
+        self.opened.clear()
         self._evt = threading.Event()
         self._writeq = queue.Queue()
         self._t = threading.Thread(target=self._uart)
         self._t.start()
-        self._selfdestruct = threading.Timer(timeout , self.selfdestruct)
-        self._selfdestruct.start()
+        self._selfdestruct = None
+        if timeout is not None:
+            self._selfdestruct = threading.Timer(timeout , self.selfdestruct)
+            self._selfdestruct.start()
 
     def get_size(self) -> int:
         # Return the current size of the log
         return len(self.log)
 
+    def position(self) -> int:
+        # Absolute position in whole_log, unaffected by discard_before()
+        with self._log_lock:
+            return self._base + len(self.whole_log)
+
+    def read_from(self, pos: int, end: int = None) -> str:
+        # whole_log from absolute position pos (up to end)
+        with self._log_lock:
+            whole_log, base = self.whole_log, self._base
+        return whole_log[max(pos - base, 0):None if end is None else max(end - base, 0)]
+
+    def discard_before(self, pos: int) -> None:
+        # Free whole_log before absolute position pos, e.g. after a test has finished
+        with self._log_lock:
+            if pos > self._base:
+                self.whole_log = self.whole_log[pos - self._base:]
+                self._base = pos
+                self.log = self.log[-len(self.whole_log):] if self.whole_log else ""
+
     def wait_for_str_ordered(
         self, msgs: list, error_msg: str = "", timeout: int = DEFAULT_WAIT_FOR_STR_TIMEOUT
     ) -> None:
@@ -267,7 +337,9 @@ class UartBinary(Uart):
         serial_timeout: int = 5,
         baudrate: int = 1000000,
     ) -> None:
-        self.data = b""
+        self.data = bytearray()
+        # Receive time of the data by absolute position, saved next to the trace
+        self.index = TraceIndex()
         super().__init__(
             uart=uart,
             timeout=timeout,
@@ -276,16 +348,18 @@ class UartBinary(Uart):
         )
 
     def _uart(self) -> None:
-        s = serial.Serial(
+        s = serial.serial_for_url(
             self.uart, baudrate=self.baudrate, timeout=self.serial_timeout
         )
         if s.in_waiting:
             logger.warning(f"Uart {self.uart} has {s.in_waiting} bytes of unread data, resetting input buffer")
             s.reset_input_buffer()
 
-        if s.out_waiting:
+        # Not available for socket:// ports, e.g. behind the UART mux
+        if getattr(s, "out_waiting", 0):
             logger.warning(f"Uart {self.uart} has {s.out_waiting} bytes of unwritten data, resetting output buffer")
             s.reset_output_buffer()
+        self.opened.set()
 
         while not self._evt.is_set():
             try:
@@ -293,41 +367,198 @@ class UartBinary(Uart):
             except serial.serialutil.SerialException:
                 logger.error("Caught SerialException, restarting")
                 s.close()
-                time.sleep(1)
-                s = serial.Serial(
-                    self.uart, baudrate=self.baudrate, timeout=self.serial_timeout
-                )
+                self.opened.clear()
+                s = self._reconnect()
+                if s is None:
+                    return
                 continue
             if not data:
                 continue
-            self.data = self.data + data
+            with self._log_lock:
+                self.index.add(time.time(), self._base + len(self.data))
+                self.data += data
+        s.close()
+
+    def flush(self) -> None:
+        self.discard_before(self.position())
+
+    def position(self) -> int:
+        with self._log_lock:
+            return self._base + len(self.data)
+
+    def read_from(self, pos: int, end: int = None) -> bytes:
+        with self._log_lock:
+            base = self._base
+            return bytes(self.data[max(pos - base, 0):None if end is None else max(end - base, 0)])
+
+    def index_from(self, pos: int, end: int = None) -> TraceIndex:
+        # Index of read_from(pos, end), offsets relative to pos
+        with self._log_lock:
+            return self.index.slice(pos, end)
+
+    def discard_before(self, pos: int) -> None:
+        with self._log_lock:
+            if pos > self._base:
+                del self.data[:pos - self._base]
+                self._base = pos
+                self.index.discard_before(pos)
+
+    def save_to_file(self, filename: str) -> None:
+        # Writes the trace and its time index, see utils/trace_index.py
+        data = self.read_from(0)
+        if len(data) == 0:
+            logger.warning("No trace data to save")
+            return
+        save_trace(filename, data, self.index_from(self._base))
+
+    def get_size(self) -> int:
+        return len(self.data)
+
+class UartDict(Uart):
+    """
+    Uart for images with dictionary based logging, frames are decoded with the
+    log_dictionary.json of the image and handled like text lines.
+    """
+    def __init__(
+        self,
+        uart: str,
+        dictionary: str,
+        timeout: int = DEFAULT_UART_TIMEOUT,
+        baudrate: int = 115200,
+        name: str = "",
+        serial_timeout: int = 1,
+        hex_encoded: bool = False,
+    ) -> None:
+        self.decoder = DictLogDecoder(dictionary, hex_encoded=hex_encoded)
+        super().__init__(
+            uart=uart,
+            timeout=timeout,
+            baudrate=baudrate,
+            name=name,
+            serial_timeout=serial_timeout,
+        )
+
+    def _uart(self) -> None:
+        s = serial.serial_for_url(
+            self.uart, baudrate=self.baudrate, timeout=self.serial_timeout
+        )
+        if s.in_waiting:
+            logger.warning(f"Uart {self.uart} has {s.in_waiting} bytes of unread data, resetting input buffer")
+            s.reset_input_buffer()
+        self.opened.set()
+
+        while not self._evt.is_set():
+            self._process_writes(s)
+            try:
+                # Block for the first byte only, then take everything buffered
+                data = s.read(1)
+                if data and s.in_waiting:
+                    data += s.read(s.in_waiting)
+            except serial.serialutil.SerialException:
+                logger.error(f"{self.name}: Caught SerialException, restarting")
+                s.close()
+                self.opened.clear()
+                s = self._reconnect()
+                if s is None:
+                    return
+                # Bytes after the reconnect don't continue a frame cut by the disconnect
+                self.decoder.reset()
+                continue
+            for line in self.decoder.feed(data):
+                self._handle_line(line)
         s.close()
 
+class UartView(Uart):
+    """
+    Per-test view of a Uart owned by the session.
+
+    The view has its own log, whole_log, flush() and self destruct timer, while
+    the port and reader thread stay open across tests.
+    """
+    def __init__(self, owner: Uart, timeout: int = DEFAULT_UART_TIMEOUT) -> None:
+        self.owner = owner
+        self.baudrate = owner.baudrate
+        self.uart = owner.uart
+        self.name = owner.name
+        self._start = owner.position()
+        self._log_start = self._start
+        self._end = None
+        self._stopped = threading.Event()
+        self._selfdestruct = None
+        if timeout is not None:
+            self._selfdestruct = threading.Timer(timeout, self.selfdestruct)
+            self._selfdestruct.start()
+
+    @property
+    def _evt(self) -> threading.Event:
+        return self._stopped if self._stopped.is_set() else self.owner._evt
+
+    @property
+    def opened(self) -> threading.Event:
+        return self.owner.opened
+
+    @property
+    def log(self) -> str:
+        return self.owner.read_from(self._log_start, self._end)
+
+    @property
+    def whole_log(self) -> str:
+        return self.owner.read_from(self._start, self._end)
+
+    def write(self, data: bytes) -> None:
+        self.owner.write(data)
+
+    def write_chunked(self, data: bytes) -> None:
+        self.owner.write_chunked(data)
+
     def flush(self) -> None:
-        self.data = b""
+        self._log_start = self.owner.position()
+
+    def stop(self) -> None:
+        # Freeze the view, the owner keeps reading
+        if self._selfdestruct:
+            self._selfdestruct.cancel()
+        if self._end is None:
+            self._end = self.owner.position()
+        self._stopped.set()
+
+    def start(self, timeout: int = DEFAULT_UART_TIMEOUT) -> None:
+        self._end = None
+        self._stopped = threading.Event()
+        self._selfdestruct = None
+        if timeout is not None:
+            self._selfdestruct = threading.Timer(timeout, self.selfdestruct)
+            self._selfdestruct.start()
+
+    def release(self) -> None:
+        # Let the owner free everything this view has seen
+        self.stop()
+        self.owner.discard_before(self._end)
+
+class UartBinaryView(UartView):
+    """ Per-test slice of the modem traces captured by a session-wide UartBinary """
+
+    @property
+    def data(self) -> bytes:
+        return self.owner.read_from(self._start, self._end)
+
+    def flush(self) -> None:
+        self._start = self.owner.position()
 
     def save_to_file(self, filename: str) -> None:
-        if len(self.data) == 0:
+        data = self.data
+        if len(data) == 0:
             logger.warning("No trace data to save")
             return
-        with open(filename, "wb" ) as f:
-            f.write(self.data)
+        save_trace(filename, data, self.owner.index_from(self._start, self._end))
 
     def get_size(self) -> int:
         return len(self.data)
 
 def wait_until_uart_available(name, timeout_seconds=60):
-    base_path = "/dev/serial/by-id"
-    while timeout_seconds > 0:
-        try:
-            serial_paths = [os.path.join(base_path, entry) for entry in os.listdir(base_path)]
-            for path in sorted(serial_paths):
-                if name in path:
-                    logger.info(f"UART found: {path}")
-                    return path
-        except (FileNotFoundError, PermissionError) as e:
-            logger.info(f"Uart not available yet (error: {e}), retrying...")
-        time.sleep(1)
-        timeout_seconds -= 1
+    path = get_registry().find(name, timeout=timeout_seconds)
+    if path:
+        logger.info(f"UART found: {path}")
+        return path
     logger.error(f"UART '{name}' not found within {timeout_seconds} seconds")
     return None
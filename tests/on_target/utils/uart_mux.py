@@ -0,0 +1,453 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+UART fan-out multiplexer.
+
+The mux owns the serial ports and shares them with any number of local clients:
+
+- Every port gets a raw TCP listener on localhost. Clients receive all bytes read
+  from the port and can write to it. The listener is compatible with pyserial's
+  socket:// URLs, so Uart("socket://127.0.0.1:<port>") works unchanged.
+- A control listener (TCP or Unix socket) speaks JSON lines:
+    {"cmd": "ports"}                                  -> {"ports": {path: "socket://..."}}
+    {"cmd": "stats"}                                  -> throughput and backpressure stats
+    {"cmd": "subscribe", "port": path, "mode": "lines"} -> stream of decoded lines
+    {"cmd": "baudrate", "port": path, "baudrate": n}  -> {"baudrate": n}
+
+Every client has a bounded send buffer. A slow client loses its oldest data
+instead of slowing down the port or other clients. Writes from different clients
+are arbitrated per line, so concurrent AT commands don't interleave.
+
+Every port has its own baudrate, given as path@baudrate (the modem trace port
+runs at 1000000, the log port at 115200) or set by a client before use:
+
+    python utils/uart_mux.py --control unix:/tmp/uart_mux.sock \
+        /dev/serial/by-id/usb-...-if00 /dev/serial/by-id/usb-...-if02@1000000
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import collections
+import serial
+sys.path.append(os.getcwd())
+from utils.logger import get_logger
+
+logger = get_logger()
+
+DEFAULT_CLIENT_BUFFER = 1024 * 1024
+WRITE_FLUSH_TIMEOUT = 0.1
+WRITE_MAX_CHUNK = 4096
+
+
+def parse_port(spec: str, baudrate: int = None) -> tuple:
+    """ (path, baudrate) of "path" or "path@baudrate" """
+    path, sep, baud = spec.rpartition("@")
+    if sep and baud.isdigit():
+        return path, int(baud)
+    return spec, baudrate
+
+def _listen(address: str) -> socket.socket:
+    """ Listen on "host:port" or "unix:/path" """
+    if address.startswith("unix:"):
+        path = address[len("unix:"):]
+        if os.path.exists(path):
+            os.remove(path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(path)
+    else:
+        host, port = address.rsplit(":", 1)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, int(port)))
+    sock.listen()
+    return sock
+
+def _close_listener(sock: socket.socket) -> None:
+    # Closing alone doesn't wake up a thread blocked in accept()
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    sock.close()
+
+def _connect(address: str) -> socket.socket:
+    if address.startswith("unix:"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(address[len("unix:"):])
+        return sock
+    host, port = address.rsplit(":", 1)
+    return socket.create_connection((host, int(port)))
+
+
+class MuxClient:
+    """ One subscriber with a bounded send buffer drained by its own thread """
+
+    def __init__(self, conn: socket.socket, name: str, max_buffer: int = DEFAULT_CLIENT_BUFFER) -> None:
+        self.conn = conn
+        self.name = name
+        self.max_buffer = max_buffer
+        self.buffered = 0
+        self.stats = {"sent_bytes": 0, "dropped_bytes": 0, "buffer_high_water": 0}
+        self.closed = threading.Event()
+        self._chunks = collections.deque()
+        self._cond = threading.Condition()
+        self._t = threading.Thread(target=self._sender, daemon=True)
+        self._t.start()
+
+    def send(self, data: bytes) -> None:
+        with self._cond:
+            self._chunks.append(data)
+            self.buffered += len(data)
+            while self.buffered > self.max_buffer and len(self._chunks) > 1:
+                dropped = self._chunks.popleft()
+                self.buffered -= len(dropped)
+                self.stats["dropped_bytes"] += len(dropped)
+            self.stats["buffer_high_water"] = max(self.stats["buffer_high_water"], self.buffered)
+            self._cond.notify()
+
+    def _sender(self) -> None:
+        while not self.closed.is_set():
+            with self._cond:
+                while not self._chunks and not self.closed.is_set():
+                    self._cond.wait(0.5)
+                if self.closed.is_set():
+                    break
+                data = b"".join(self._chunks)
+                self._chunks.clear()
+                self.buffered = 0
+            try:
+                self.conn.sendall(data)
+            except OSError:
+                self.close()
+                break
+            self.stats["sent_bytes"] += len(data)
+
+    def close(self) -> None:
+        self.closed.set()
+        with self._cond:
+            self._cond.notify()
+        try:
+            self.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.conn.close()
+
+    def get_stats(self) -> dict:
+        return {"name": self.name, "buffered": self.buffered, **self.stats}
+
+
+class MuxPort:
+    """ Owner of one serial port """
+
+    def __init__(self, path: str, baudrate: int = 115200, host: str = "127.0.0.1", tcp_port: int = 0,
+                 max_buffer: int = DEFAULT_CLIENT_BUFFER) -> None:
+        self.path = path
+        self.baudrate = baudrate
+        self.max_buffer = max_buffer
+        self.raw_clients = []
+        self.line_clients = []
+        self.stats = {"bytes_in": 0, "bytes_out": 0, "lines": 0, "writes": 0, "reconnects": 0}
+        self.started = time.time()
+        self._clients_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._evt = threading.Event()
+        self._serial = None
+        self._line = b""
+        self._listener = _listen(f"{host}:{tcp_port}")
+        self._threads = []
+
+    @property
+    def url(self) -> str:
+        host, port = self._listener.getsockname()[:2]
+        return f"socket://{host}:{port}"
+
+    def start(self) -> None:
+        self._serial = serial.serial_for_url(self.path, baudrate=self.baudrate, timeout=0.1)
+        for target in [self._reader, self._acceptor]:
+            t = threading.Thread(target=target, daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self) -> None:
+        self._evt.set()
+        _close_listener(self._listener)
+        for t in self._threads:
+            t.join()
+        with self._clients_lock:
+            for client in self.raw_clients + self.line_clients:
+                client.close()
+        if self._serial:
+            self._serial.close()
+
+    def set_baudrate(self, baudrate: int) -> None:
+        self.baudrate = baudrate
+        if self._serial is not None and self._serial.baudrate != baudrate:
+            self._serial.baudrate = baudrate
+            logger.info(f"Mux: {self.path} set to {baudrate} baud")
+
+    def _reopen(self) -> None:
+        self.stats["reconnects"] += 1
+        try:
+            self._serial.close()
+        except serial.SerialException:
+            pass
+        while not self._evt.is_set():
+            try:
+                self._serial = serial.serial_for_url(self.path, baudrate=self.baudrate, timeout=0.1)
+                return
+            except (serial.SerialException, OSError):
+                self._evt.wait(0.2)
+
+    def _reader(self) -> None:
+        while not self._evt.is_set():
+            try:
+                data = self._serial.read(max(1, self._serial.in_waiting))
+            except (serial.SerialException, OSError):
+                logger.warning(f"Mux: {self.path} lost, reopening")
+                self._reopen()
+                continue
+            if data:
+                self._fan_out(data)
+
+    def _fan_out(self, data: bytes) -> None:
+        self.stats["bytes_in"] += len(data)
+        with self._clients_lock:
+            raw_clients = [x for x in self.raw_clients if not x.closed.is_set()]
+            line_clients = [x for x in self.line_clients if not x.closed.is_set()]
+            self.raw_clients, self.line_clients = raw_clients, line_clients
+        for client in raw_clients:
+            client.send(data)
+        self._line += data
+        if b"\n" not in data:
+            if len(self._line) > WRITE_MAX_CHUNK * 16:
+                # Binary port, no lines to fan out
+                self._line = b""
+            return
+        lines, self._line = self._line.rsplit(b"\n", 1)
+        lines = [x.rstrip(b"\r") + b"\n" for x in lines.split(b"\n")]
+        self.stats["lines"] += len(lines)
+        if line_clients:
+            chunk = b"".join(lines)
+            for client in line_clients:
+                client.send(chunk)
+
+    def write(self, data: bytes) -> None:
+        """ Write one complete command, never interleaved with writes of other clients """
+        with self._write_lock:
+            try:
+                self._serial.write(data)
+            except (serial.SerialException, OSError) as e:
+                logger.warning(f"Mux: write to {self.path} failed: {e}")
+                return
+            self.stats["bytes_out"] += len(data)
+            self.stats["writes"] += 1
+
+    def add_line_client(self, conn: socket.socket) -> MuxClient:
+        client = MuxClient(conn, f"lines:{conn.fileno()}", self.max_buffer)
+        with self._clients_lock:
+            self.line_clients.append(client)
+        return client
+
+    def _acceptor(self) -> None:
+        while not self._evt.is_set():
+            try:
+                conn, addr = self._listener.accept()
+            except OSError:
+                break
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client = MuxClient(conn, f"raw:{addr[1]}", self.max_buffer)
+            with self._clients_lock:
+                self.raw_clients.append(client)
+            t = threading.Thread(target=self._client_writer, args=(client,), daemon=True)
+            t.start()
+
+    def _client_writer(self, client: MuxClient) -> None:
+        """ Collect bytes written by a client and forward them line by line """
+        pending = b""
+        client.conn.settimeout(WRITE_FLUSH_TIMEOUT)
+        while not client.closed.is_set() and not self._evt.is_set():
+            try:
+                data = client.conn.recv(WRITE_MAX_CHUNK)
+            except socket.timeout:
+                # Partial command without line ending, e.g. chunked writes
+                if pending:
+                    self.write(pending)
+                    pending = b""
+                continue
+            except OSError:
+                break
+            if not data:
+                break
+            pending += data
+            while True:
+                end = max(pending.rfind(b"\n"), pending.rfind(b"\r"))
+                if end < 0 and len(pending) < WRITE_MAX_CHUNK:
+                    break
+                end = end + 1 if end >= 0 else len(pending)
+                self.write(pending[:end])
+                pending = pending[end:]
+                if not pending:
+                    break
+        if pending:
+            self.write(pending)
+        client.close()
+
+    def get_stats(self) -> dict:
+        uptime = time.time() - self.started
+        with self._clients_lock:
+            clients = [x.get_stats() for x in self.raw_clients + self.line_clients]
+        return {
+            "url": self.url,
+            "uptime": uptime,
+            **self.stats,
+            "bytes_in_per_second": self.stats["bytes_in"] / uptime if uptime else 0,
+            "lines_per_second": self.stats["lines"] / uptime if uptime else 0,
+            "clients": clients,
+        }
+
+
+class UartMux:
+    def __init__(self, ports, control: str = "127.0.0.1:0", baudrate: int = 115200,
+                 max_buffer: int = DEFAULT_CLIENT_BUFFER, host: str = "127.0.0.1") -> None:
+        """
+        :param ports: Serial port paths or pyserial URLs to own, "path@baudrate" or a {path: baudrate} dict
+        :param control: Control listener address, "host:port" or "unix:/path"
+        :param baudrate: Baudrate of ports without their own
+        :param max_buffer: Send buffer per client in bytes
+        """
+        specs = ports.items() if isinstance(ports, dict) else [parse_port(x) for x in ports]
+        self.ports = {}
+        for path, port_baudrate in specs:
+            self.ports[path] = MuxPort(path, baudrate=port_baudrate or baudrate, host=host, max_buffer=max_buffer)
+        self._control = _listen(control)
+        self._control_address = control
+        self._evt = threading.Event()
+        self._t = None
+
+    @property
+    def control_address(self) -> str:
+        if self._control.family == socket.AF_UNIX:
+            return self._control_address
+        host, port = self._control.getsockname()[:2]
+        return f"{host}:{port}"
+
+    def start(self) -> "UartMux":
+        for port in self.ports.values():
+            port.start()
+            logger.info(f"Mux: {port.path} available at {port.url}")
+        self._t = threading.Thread(target=self._control_loop, daemon=True)
+        self._t.start()
+        return self
+
+    def stop(self) -> None:
+        self._evt.set()
+        _close_listener(self._control)
+        self._t.join()
+        for port in self.ports.values():
+            port.stop()
+
+    def __enter__(self) -> "UartMux":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def get_stats(self) -> dict:
+        return {path: port.get_stats() for path, port in self.ports.items()}
+
+    def _control_loop(self) -> None:
+        while not self._evt.is_set():
+            try:
+                conn, _ = self._control.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve_control, args=(conn,), daemon=True).start()
+
+    def _serve_control(self, conn: socket.socket) -> None:
+        f = conn.makefile("rb")
+        try:
+            request = json.loads(f.readline() or b"{}")
+        except ValueError:
+            request = {}
+        cmd = request.get("cmd")
+        if cmd == "subscribe" and request.get("port") in self.ports:
+            # Connection is handed over to the line client
+            self.ports[request["port"]].add_line_client(conn)
+            return
+        if cmd == "ports":
+            response = {"ports": {path: port.url for path, port in self.ports.items()}}
+        elif cmd == "stats":
+            response = self.get_stats()
+        elif cmd == "baudrate" and request.get("port") in self.ports and isinstance(request.get("baudrate"), int):
+            port = self.ports[request["port"]]
+            try:
+                port.set_baudrate(request["baudrate"])
+                response = {"baudrate": port.baudrate}
+            except (serial.SerialException, ValueError) as e:
+                response = {"error": f"Failed to set baudrate of {request['port']}: {e}"}
+        else:
+            response = {"error": f"Invalid request {request}"}
+        try:
+            conn.sendall(json.dumps(response).encode("utf-8") + b"\n")
+        finally:
+            conn.close()
+
+
+def mux_request(control: str, request: dict) -> dict:
+    """ Send one control request to a running mux """
+    with _connect(control) as sock:
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        return json.loads(sock.makefile("rb").readline())
+
+def mux_port_url(control: str, path: str, baudrate: int = None) -> str:
+    """
+    socket:// URL for the raw stream of path, to be used in place of the port path
+
+    :param baudrate: Set the port to this baudrate, the URL itself carries none
+    """
+    ports = mux_request(control, {"cmd": "ports"})["ports"]
+    if path not in ports:
+        raise RuntimeError(f"{path} not owned by UART mux at {control}")
+    if baudrate:
+        response = mux_request(control, {"cmd": "baudrate", "port": path, "baudrate": baudrate})
+        if "error" in response:
+            raise RuntimeError(response["error"])
+    return ports[path]
+
+def mux_subscribe_lines(control: str, path: str):
+    """ Iterator of lines read from path, for consumers that don't write """
+    sock = _connect(control)
+    sock.sendall(json.dumps({"cmd": "subscribe", "port": path, "mode": "lines"}).encode("utf-8") + b"\n")
+
+    def lines():
+        with sock:
+            for line in sock.makefile("rb"):
+                yield line.rstrip(b"\n").decode("utf-8", errors="replace")
+    return lines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Share serial ports between several local consumers")
+    parser.add_argument("ports", nargs="+", help="serial ports to own, path or path@baudrate")
+    parser.add_argument("-c", "--control", default="127.0.0.1:7700", help="control address, host:port or unix:/path")
+    parser.add_argument("-b", "--baudrate", type=int, default=115200, help="baudrate of ports without @baudrate")
+    parser.add_argument("--buffer", type=int, default=DEFAULT_CLIENT_BUFFER, help="send buffer per client in bytes")
+    parser.add_argument("--stats-interval", type=float, default=60, help="seconds between stats log lines")
+    args = parser.parse_args()
+
+    with UartMux(args.ports, control=args.control, baudrate=args.baudrate, max_buffer=args.buffer) as mux:
+        logger.info(f"Mux control at {mux.control_address}")
+        try:
+            while True:
+                time.sleep(args.stats_interval)
+                logger.info(f"Mux stats: {json.dumps(mux.get_stats())}")
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,352 @@
+##########################################################################################
+# Copyright (c) 2025 Nordic Semiconductor
+# SPDX-License-Identifier: LicenseRef-Nordic-5-Clause
+##########################################################################################
+
+"""
+Virtual device under test behind a pseudo-terminal.
+
+The device is reachable through a stable symlink (VirtualDut.port) which can be
+opened by Uart like a /dev/serial/by-id path. It replays captured UART logs with
+their original timing (optionally scaled), answers AT commands and can inject
+bursts, garbage bytes and disconnects.
+
+    with VirtualDut() as dut:
+        uart = Uart(dut.port)
+        dut.replay(load_log("outcomes/nrfcloud_fw_test_log_debug.txt"), speed=10)
+"""
+
+import os
+import re
+import sys
+import pty
+import tty
+import time
+import errno
+import select
+import random
+import argparse
+import tempfile
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Union
+sys.path.append(os.getcwd())
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# Device lines as written to the debug log file by Uart, e.g.
+# "2025-01-01 12:00:00:uart:DEBUG:: nrf_cloud_info: Modem FW: mfw_nrf91x1_2.0.2"
+LOG_FILE_LINE_RE = re.compile(r"^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d):uart:DEBUG:[^:]*: (.*)$")
+
+DEFAULT_AT_RESPONSES = [
+    (r"AT\+CGMR", ["mfw_nrf91x1_2.0.2", "OK"]),
+    (r"AT.*", ["OK"]),
+]
+
+
+def load_log(path: str) -> list:
+    """
+    Load a captured UART log as a list of (seconds since first line, line).
+
+    Debug log files written by the harness keep their timestamps, other files are
+    treated as plain device output without timing.
+    """
+    lines = []
+    first = None
+    with open(path, errors="replace") as f:
+        for raw in f:
+            raw = raw.rstrip("\r\n")
+            m = LOG_FILE_LINE_RE.match(raw)
+            if m:
+                t = datetime.strptime(m.group(1), "%Y-%m-%d %H:%M:%S").timestamp()
+                first = t if first is None else first
+                lines.append((t - first, m.group(2)))
+            elif first is None:
+                lines.append((0.0, raw))
+    return lines
+
+
+class VirtualDut:
+    def __init__(
+        self,
+        at_responses: list = DEFAULT_AT_RESPONSES,
+        link_dir: str = None,
+        name: str = "virtual_dut",
+        line_ending: bytes = b"\r\n",
+    ) -> None:
+        """
+        :param at_responses: List of (regex, response) tried in order for every received
+                             command. Response is a list of lines or a callable taking the
+                             command and returning a list of lines.
+        :param link_dir: Directory for the port symlink, temporary directory if not given
+        :param line_ending: Line ending of emitted lines
+        """
+        self.at_responses = [(re.compile(p, re.IGNORECASE), r) for p, r in at_responses]
+        self.name = name
+        self.line_ending = line_ending
+        self._tmpdir = None if link_dir else tempfile.TemporaryDirectory(prefix="vdut")
+        self.port = os.path.join(link_dir or self._tmpdir.name, name)
+        self.commands = []
+        self.stats = {"lines": 0, "bytes": 0, "garbage_bytes": 0, "disconnects": 0}
+        # (time.time() when written, line) for latency measurements
+        self.sent = []
+        self._master = None
+        self._slave = None
+        self._fd_lock = threading.RLock()
+        # (deadline, payload) in order, and injected payloads written ahead of them
+        self._outq = deque()
+        self._injectq = deque()
+        self._out_cond = threading.Condition()
+        self._writing = False
+        self._evt = threading.Event()
+        self._threads = []
+
+    def start(self) -> "VirtualDut":
+        self._open_pty()
+        for target in [self._writer, self._reader]:
+            t = threading.Thread(target=target, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self) -> None:
+        self._evt.set()
+        with self._out_cond:
+            self._out_cond.notify_all()
+        for t in self._threads:
+            t.join()
+        self._close_pty()
+        if self._tmpdir:
+            self._tmpdir.cleanup()
+
+    def __enter__(self) -> "VirtualDut":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def _open_pty(self) -> None:
+        with self._fd_lock:
+            master, slave = pty.openpty()
+            tty.setraw(slave)
+            self._master, self._slave = master, slave
+            tmp_link = self.port + ".tmp"
+            if os.path.lexists(tmp_link):
+                os.remove(tmp_link)
+            os.symlink(os.ttyname(slave), tmp_link)
+            os.replace(tmp_link, self.port)
+
+    def _close_pty(self) -> None:
+        with self._fd_lock:
+            if os.path.lexists(self.port):
+                os.remove(self.port)
+            for fd in [self._master, self._slave]:
+                if fd is not None:
+                    os.close(fd)
+            self._master = self._slave = None
+
+    def _write(self, data: bytes) -> None:
+        with self._fd_lock:
+            if self._master is None:
+                return
+            view = memoryview(data)
+            while view:
+                try:
+                    n = os.write(self._master, view)
+                except BlockingIOError:
+                    time.sleep(0.001)
+                    continue
+                view = view[n:]
+
+    def _emit_line(self, line: str) -> None:
+        data = line.encode("utf-8") + self.line_ending
+        self._write(data)
+        self.sent.append((time.time(), line))
+        self.stats["lines"] += 1
+        self.stats["bytes"] += len(data)
+
+    def _emit_burst(self, lines: list) -> None:
+        data = b"".join(x.encode("utf-8") + self.line_ending for x in lines)
+        self._write(data)
+        t = time.time()
+        self.sent += [(t, x) for x in lines]
+        self.stats["lines"] += len(lines)
+        self.stats["bytes"] += len(data)
+
+    def _queue(self, deadline: float, payload, inject: bool = False) -> None:
+        with self._out_cond:
+            if inject:
+                self._injectq.append(payload)
+            else:
+                self._outq.append((deadline, payload))
+            self._out_cond.notify_all()
+
+    def _next_payload(self):
+        # Injected payloads first, queued ones when due, None when stopped
+        with self._out_cond:
+            self._writing = False
+            self._out_cond.notify_all()
+            while not self._evt.is_set():
+                if self._injectq:
+                    payload = self._injectq.popleft()
+                elif self._outq and self._outq[0][0] <= time.time():
+                    payload = self._outq.popleft()[1]
+                else:
+                    self._out_cond.wait(self._outq[0][0] - time.time() if self._outq else None)
+                    continue
+                self._writing = True
+                return payload
+            return None
+
+    def _writer(self) -> None:
+        while True:
+            payload = self._next_payload()
+            if payload is None:
+                break
+            if isinstance(payload, bytes):
+                self._write(payload)
+            elif isinstance(payload, list):
+                self._emit_burst(payload)
+            elif callable(payload):
+                payload()
+            else:
+                self._emit_line(payload)
+
+    def _reader(self) -> None:
+        buf = b""
+        while not self._evt.is_set():
+            with self._fd_lock:
+                master = self._master
+            if master is None:
+                time.sleep(0.01)
+                continue
+            try:
+                ready, _, _ = select.select([master], [], [], 0.1)
+                if not ready:
+                    continue
+                data = os.read(master, 4096)
+            except OSError as e:
+                # fd closed by disconnect()
+                if e.errno not in [errno.EBADF, errno.EIO]:
+                    raise
+                time.sleep(0.01)
+                continue
+            buf += data
+            while True:
+                m = re.search(rb"[\r\n]", buf)
+                if not m:
+                    break
+                cmd, buf = buf[:m.start()], buf[m.end():]
+                if cmd.strip():
+                    self._handle_command(cmd.decode("utf-8", errors="replace").strip())
+
+    def _handle_command(self, cmd: str) -> None:
+        self.commands.append(cmd)
+        # Shell prefix used by Uart.xfactoryreset(shell=True)
+        at_cmd = cmd[3:] if cmd.lower().startswith("at ") else cmd
+        for pattern, response in self.at_responses:
+            if pattern.fullmatch(at_cmd):
+                lines = response(at_cmd) if callable(response) else response
+                self.send(lines)
+                return
+
+    def send(self, lines: Union[str, list], delay: float = 0.0) -> None:
+        """ Emit lines after delay seconds, in order with everything already queued """
+        lines = [lines] if isinstance(lines, str) else lines
+        deadline = time.time() + delay
+        for line in lines:
+            self._queue(deadline, line)
+
+    def replay(self, lines: list, speed: float = 1.0, wait: bool = False) -> None:
+        """
+        Replay (offset, line) pairs as returned by load_log()
+
+        :param speed: 1.0 for original timing, 10 for ten times faster, None for max speed
+        :param wait: Block until all lines are written
+        """
+        start = time.time()
+        for offset, line in lines:
+            deadline = start + offset / speed if speed else start
+            self._queue(deadline, line)
+        if wait:
+            self.wait_idle()
+
+    def inject_burst(self, lines: list) -> None:
+        """ Emit lines back to back right away, ahead of pending replay lines """
+        self._queue(0, list(lines), inject=True)
+
+    def inject_garbage(self, data: Union[int, bytes] = 16) -> None:
+        """ Emit random bytes which are not valid UTF-8, or the given bytes, right away """
+        if isinstance(data, int):
+            data = bytes(random.choice(range(0x80, 0x100)) for _ in range(data))
+        self._queue(0, data, inject=True)
+        self.stats["garbage_bytes"] += len(data)
+
+    def disconnect(self, duration: float = 1.0) -> None:
+        """ Remove the port like a USB re-enumeration, it reappears after duration seconds """
+        def _disconnect():
+            self._close_pty()
+            self.stats["disconnects"] += 1
+            self._evt.wait(duration)
+            if not self._evt.is_set():
+                self._open_pty()
+        self._queue(0, _disconnect)
+
+    def wait_idle(self, timeout: float = 60) -> None:
+        """ Block until everything queued has been written """
+        with self._out_cond:
+            if not self._out_cond.wait_for(lambda: not (self._outq or self._injectq or self._writing), timeout):
+                raise TimeoutError("Virtual DUT output not drained")
+
+
+def benchmark_uart(n_lines: int = 10000, line: str = "nrf_cloud_info: benchmark line {}") -> dict:
+    """
+    Measure Uart reader throughput and wait_for_str() latency against a virtual DUT
+    writing at max speed.
+    """
+    from utils.uart import Uart
+
+    with VirtualDut() as dut:
+        uart = Uart(dut.port, name="vdut")
+        try:
+            start = time.time()
+            dut.replay([(0, line.format(i)) for i in range(n_lines)], speed=None)
+            uart.wait_for_str(line.format(n_lines - 1), timeout=600)
+            duration = time.time() - start
+
+            dut.send("benchmark marker")
+            uart.wait_for_str("benchmark marker", timeout=60)
+            latency = time.time() - dut.sent[-1][0]
+        finally:
+            uart.stop()
+    return {
+        "lines": n_lines,
+        "seconds": duration,
+        "lines_per_second": n_lines / duration,
+        "wait_for_str_latency": latency,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Virtual DUT on a pseudo-terminal")
+    parser.add_argument("-l", "--log", help="captured UART log to replay")
+    parser.add_argument("-s", "--speed", type=float, default=1.0, help="replay speed factor, 0 for max speed")
+    parser.add_argument("--link-dir", help="directory for the port symlink")
+    parser.add_argument("--benchmark", type=int, metavar="LINES", help="benchmark Uart with LINES lines")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        logger.info(f"Uart benchmark: {benchmark_uart(args.benchmark)}")
+        sys.exit(0)
+
+    with VirtualDut(link_dir=args.link_dir) as dut:
+        logger.info(f"Virtual DUT available at {dut.port}")
+        if args.log:
+            dut.replay(load_log(args.log), speed=args.speed or None)
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass